@@ -0,0 +1,573 @@
+"""
+Async Google Sheets Service for BOL Processor
+asyncio/aiohttp variant of google_sheets_service.py for many concurrent uploads per process
+Makes the same Sheets v4 REST calls gspread makes, over one pooled async HTTP session
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import quote
+
+import aiohttp
+from aiohttp import web
+
+from google_sheets_service import (
+    CSV_MIMETYPES,
+    LazyModule,
+    NON_IDEMPOTENT_OPERATIONS,
+    SCOPES,
+    SHEET_TARGETS,
+    SUMMARY_PROBE_ROWS,
+    config,
+    column_number_to_letter,
+    detect_data_type,
+    get_service_account_info,
+    group_contiguous_rows,
+    parse_csv_content,
+    sheets_api_operation,
+    sheets_scheduler,
+    summary_from_tail,
+    target_config
+)
+
+logger = logging.getLogger(__name__)
+
+gspread = LazyModule('gspread')
+
+SHEETS_API_BASE_URL = config['sheets_api_base_url']
+
+class SheetsAPIError(Exception):
+    """Error response from the Sheets REST API"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def decode_api_response(status, reason, text):
+    """Return the decoded JSON body, or raise SheetsAPIError for an error status.
+    Bodies are decoded defensively: proxies and load balancers answer with HTML or plain text."""
+    try:
+        body = json.loads(text) if text else {}
+    except ValueError:
+        body = None
+    if status >= 400:
+        error = body.get('error') if isinstance(body, dict) else None
+        message = error.get('message') if isinstance(error, dict) else None
+        raise SheetsAPIError(status, message or f'HTTP {status} {reason or ""}'.strip())
+    if body is None:
+        raise SheetsAPIError(502, f'Sheets API returned a non-JSON response (HTTP {status})')
+    return body
+
+# Priority (a SHEETS_PRIORITIES name) of the Sheets calls made by the current request's task
+current_priority = contextvars.ContextVar('sheets_priority', default='maintenance')
+
+@contextmanager
+def sheets_priority(name):
+    """Run Sheets calls made by this task at the given priority, like sheets_scheduler.priority() for threads"""
+    token = current_priority.set(name)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+class AsyncSheetsClient:
+    """Sheets v4 REST client on a pooled aiohttp session with shared, pre-refreshed credentials"""
+
+    def __init__(self, pool_size=100, refresh_margin=300, metadata_ttl=300):
+        self.pool_size = pool_size
+        self.refresh_margin = refresh_margin
+        self.metadata_ttl = metadata_ttl
+        self._session = None
+        self._credentials = None
+        self._token_lock = asyncio.Lock()
+        self._targets = {}
+
+    async def start(self):
+        """Open the pooled HTTP session and fetch the first access token"""
+        from google.oauth2.service_account import Credentials
+
+        self._credentials = Credentials.from_service_account_info(
+            get_service_account_info(),
+            scopes=SCOPES
+        )
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=120)
+        )
+        await self._access_token()
+        logger.info(f"✅ Async Google Sheets client initialized successfully (pool size: {self.pool_size})")
+
+    async def close(self):
+        """Close the HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+
+    async def _access_token(self):
+        """Return a valid access token, refreshing it ahead of expiry"""
+        async with self._token_lock:
+            credentials = self._credentials
+            expiring = not credentials.token or (
+                credentials.expiry is not None and
+                (credentials.expiry - datetime.utcnow()).total_seconds() <= self.refresh_margin
+            )
+            if expiring:
+                from google.auth.transport.requests import Request
+
+                # google-auth refresh is blocking; keep it off the event loop
+                await asyncio.to_thread(credentials.refresh, Request())
+                logger.info("🔑 Google access token refreshed")
+            return credentials.token
+
+    async def request(self, method, path, params=None, json=None):
+        """Call the Sheets API through the shared rate-limit scheduler and return the decoded JSON body"""
+        url = f"{SHEETS_API_BASE_URL}/v4/spreadsheets/{path}"
+        spreadsheet_id = path.split('/')[0].split(':')[0]
+        idempotent = sheets_api_operation(method, url) not in NON_IDEMPOTENT_OPERATIONS
+        attempt = 0
+        while True:
+            await sheets_scheduler.acquire_async(spreadsheet_id, current_priority.get())
+            token = await self._access_token()
+            headers = {'Authorization': f'Bearer {token}'}
+            try:
+                async with self._session.request(method, url, params=params, json=json, headers=headers) as response:
+                    status = response.status
+                    retry_after = response.headers.get('Retry-After')
+                    reason = response.reason
+                    text = await response.text()
+            except aiohttp.ClientConnectorError:
+                # The connection was never established, so even an append is safe to send again
+                if attempt >= sheets_scheduler.max_retries:
+                    raise
+                attempt += 1
+                delay = sheets_scheduler.backoff_delay(attempt)
+                logger.warning(f"⏳ Could not connect to the Sheets API, retry {attempt}/{sheets_scheduler.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if sheets_scheduler.retryable_status(status, idempotent) and attempt < sheets_scheduler.max_retries:
+                sheets_scheduler.record_result(spreadsheet_id, status)
+                attempt += 1
+                delay = sheets_scheduler.backoff_delay(attempt, retry_after)
+                logger.warning(f"⏳ Sheets API returned {status}, retry {attempt}/{sheets_scheduler.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            sheets_scheduler.record_result(spreadsheet_id, status)
+            return decode_api_response(status, reason, text)
+
+    async def get_target(self, data_type):
+        """Return cached spreadsheet/worksheet metadata for a data type"""
+        key = data_type if data_type in SHEET_TARGETS else 'allura'
+        cached = self._targets.get(key)
+        if cached and time.monotonic() - cached['opened_at'] < self.metadata_ttl:
+            return cached
+
+        target = SHEET_TARGETS[key]
+        metadata = await self.request(
+            'GET', target['spreadsheet_id'],
+            params={'fields': 'spreadsheetId,properties.title,sheets.properties'}
+        )
+        for sheet in metadata.get('sheets', []):
+            properties = sheet['properties']
+            if properties['title'] == target['sheet_name']:
+                break
+        else:
+            raise gspread.exceptions.WorksheetNotFound(target['sheet_name'])
+
+        cached = {
+            'key': key,
+            'spreadsheet_id': target['spreadsheet_id'],
+            'spreadsheet_title': metadata['properties']['title'],
+            'sheet_name': properties['title'],
+            'sheet_id': properties['sheetId'],
+            'row_count': properties['gridProperties']['rowCount'],
+            'col_count': properties['gridProperties']['columnCount'],
+            'opened_at': time.monotonic()
+        }
+        self._targets[key] = cached
+        logger.info(f"📊 Connected to {target['label']} sheet: {cached['sheet_name']}")
+        return cached
+
+    def invalidate(self, data_type):
+        """Drop cached metadata after a 404 or a renamed sheet"""
+        self._targets.pop(data_type, None)
+
+    async def values_append(self, target, range_name, values):
+        path = f"{target['spreadsheet_id']}/values/{quote(range_name)}:append"
+        params = {'valueInputOption': 'RAW', 'insertDataOption': 'OVERWRITE'}
+        return await self.request('POST', path, params=params, json={'values': values})
+
+    async def values_get(self, target, range_name):
+        path = f"{target['spreadsheet_id']}/values/{quote(range_name)}"
+        return await self.request('GET', path)
+
+    async def grid_row_count(self, target):
+        """Current grid height; the cached target's row_count is only as fresh as its metadata"""
+        metadata = await self.request('GET', target['spreadsheet_id'], params={'fields': 'sheets.properties'})
+        for sheet in metadata.get('sheets', []):
+            if sheet['properties']['sheetId'] == target['sheet_id']:
+                return sheet['properties']['gridProperties']['rowCount']
+        raise gspread.exceptions.WorksheetNotFound(target['sheet_name'])
+
+    async def values_batch_get(self, target, ranges):
+        path = f"{target['spreadsheet_id']}/values:batchGet"
+        return await self.request('GET', path, params=[('ranges', r) for r in ranges])
+
+    async def batch_update(self, target, body):
+        path = f"{target['spreadsheet_id']}:batchUpdate"
+        return await self.request('POST', path, json=body)
+
+sheets_client = AsyncSheetsClient(
+    pool_size=int(os.getenv('ASYNC_HTTP_POOL_SIZE', '100')),
+    refresh_margin=config['token_refresh_margin'],
+    metadata_ttl=config['worksheet_cache_ttl']
+)
+
+def error_response(data_type, error, status=500, prefix=''):
+    """Build the JSON error body used by every endpoint"""
+    # A missing or renamed sheet means the cached metadata is stale
+    if isinstance(error, gspread.exceptions.WorksheetNotFound) or (
+            isinstance(error, SheetsAPIError) and error.status in (400, 404)):
+        sheets_client.invalidate(data_type)
+    return web.json_response({
+        'success': False,
+        'error': f'{prefix}{str(error)}',
+        'dataType': data_type.upper(),
+        'timestamp': datetime.now().isoformat()
+    }, status=status)
+
+async def read_csv_text(request):
+    """Read a raw text/csv body or the multipart file part named "file" (None if there is none)"""
+    if request.content_type == 'multipart/form-data':
+        reader = await request.multipart()
+        async for part in reader:
+            if part.filename:
+                data = await part.read()
+                return data.decode(part.get_charset('utf-8-sig'))
+        return None
+    return (await request.read()).decode(request.charset or 'utf-8-sig')
+
+async def read_csv_payload(request):
+    """Decode the JSON, text/csv or multipart body and parse its CSV; returns (csv_content, header, data_rows) or an error response"""
+    if request.content_type in CSV_MIMETYPES or request.content_type == 'multipart/form-data':
+        csv_content = await read_csv_text(request)
+        if csv_content is None:
+            return None, web.json_response({
+                'success': False,
+                'error': 'No CSV file provided (expected a multipart file field named "file")'
+            }, status=400)
+    else:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+
+        if not data or 'csvContent' not in data:
+            return None, web.json_response({'success': False, 'error': 'No CSV content provided'}, status=400)
+
+        csv_content = data['csvContent']
+    if not csv_content or not csv_content.strip():
+        return None, web.json_response({'success': False, 'error': 'Empty CSV content'}, status=400)
+
+    # Parsing is CPU-bound; run it in a thread so other uploads keep flowing
+    header, data_rows = await asyncio.to_thread(parse_csv_content, csv_content)
+    return (csv_content, header, data_rows), None
+
+async def upload_rows(data_type, data_rows):
+    """Append rows starting at column B and return the upload result"""
+    with sheets_priority('upload'):
+        target = await sheets_client.get_target(data_type)
+        max_columns = max(len(row) for row in data_rows) if data_rows else 1
+        end_column = column_number_to_letter(max_columns + 1)  # Add 1 to account for B start
+        table_range = gspread.utils.absolute_range_name(target['sheet_name'], f"B1:{end_column}1")
+
+        logger.info(f"📍 Appending {len(data_rows)} rows starting at column B")
+        response = await sheets_client.values_append(target, table_range, data_rows)
+    updated_range = response['updates']['updatedRange']
+    first_cell, _, last_cell = updated_range.split('!')[-1].partition(':')
+    start_row, _ = gspread.utils.a1_to_rowcol(first_cell)
+    end_row, _ = gspread.utils.a1_to_rowcol(last_cell or first_cell)
+
+    logger.info(f"✅ Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets")
+    return {
+        'success': True,
+        'message': f'Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets',
+        'rowsAdded': len(data_rows),
+        'startRow': start_row,
+        'endRow': end_row,
+        'sheetName': target['sheet_name'],
+        'spreadsheetId': target['spreadsheet_id'],
+        'dataType': data_type.upper(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+async def upload_csv_generic(request, data_type='allura', payload=None):
+    """Generic handler to upload CSV data to Google Sheets"""
+    try:
+        if payload is None:
+            payload, response = await read_csv_payload(request)
+            if response is not None:
+                return response
+        csv_content, header, data_rows = payload
+        logger.info(f"📥 Received {data_type.upper()} CSV upload request ({len(csv_content)} characters)")
+        return web.json_response(await upload_rows(data_type, data_rows))
+    except ValueError as ve:
+        logger.error(f"❌ {data_type.upper()} validation error: {str(ve)}")
+        return error_response(data_type, ve, status=400)
+    except Exception as e:
+        logger.error(f"❌ {data_type.upper()} upload failed: {str(e)}")
+        return error_response(data_type, e, prefix='Upload failed: ')
+
+async def upload_csv(request):
+    """Upload CSV data with automatic data type detection and routing"""
+    try:
+        payload, response = await read_csv_payload(request)
+    except ValueError as ve:
+        logger.error(f"❌ ALLURA validation error: {str(ve)}")
+        return error_response('allura', ve, status=400)
+    if response is not None:
+        return response
+
+    csv_content, header, data_rows = payload
+    detected_type, detection_score = await asyncio.to_thread(detect_data_type, csv_content, header, data_rows)
+    logger.info(f"🎯 Auto-routing to {detected_type.upper()} endpoint (detection score: {detection_score})")
+    return await upload_csv_generic(request, detected_type, payload)
+
+async def read_sheet_summary(target, tail_rows=0):
+    """Read the header, last row with data and optionally the last data rows with targeted range reads"""
+    title = target['sheet_name']
+    last_column = column_number_to_letter(max(target['col_count'], 1))
+    window = max(tail_rows, SUMMARY_PROBE_ROWS)
+    read_to = await sheets_client.grid_row_count(target)
+    read_from = max(read_to - window + 1, 1)
+    response = await sheets_client.values_batch_get(target, [
+        gspread.utils.absolute_range_name(title, '1:1'),
+        gspread.utils.absolute_range_name(title, f'A{read_from}:{last_column}{read_to}')
+    ])
+    header_range, tail_range = response.get('valueRanges', [{}, {}])
+    header = (header_range.get('values') or [[]])[0]
+    values = tail_range.get('values', [])
+
+    # Blank rows at the end of the grid: step back in doubling windows, as the Flask service does
+    while not values and read_from > 1:
+        read_to, window = read_from - 1, window * 2
+        read_from = max(read_to - window + 1, 1)
+        values = (await sheets_client.values_get(
+            target, gspread.utils.absolute_range_name(title, f'A{read_from}:{last_column}{read_to}')
+        )).get('values', [])
+
+    total_rows = read_from + len(values) - 1
+    if values and tail_rows and read_from > 2 and total_rows - read_from + 1 < tail_rows:
+        prefix_from = max(total_rows - tail_rows + 1, 2)
+        prefix = (await sheets_client.values_get(
+            target, gspread.utils.absolute_range_name(title, f'A{prefix_from}:{last_column}{read_from - 1}')
+        )).get('values', [])
+        values = prefix + [[]] * (read_from - prefix_from - len(prefix)) + values
+        read_from = prefix_from
+
+    summary = summary_from_tail(header, read_from, values, tail_rows)
+    return header, summary['total_rows'], summary['last_rows']
+
+async def test_connection_generic(data_type='allura'):
+    """Generic handler to test Google Sheets connection"""
+    try:
+        with sheets_priority('probe'):
+            target = await sheets_client.get_target(data_type)
+            header, total_rows, _ = await read_sheet_summary(target)
+        logger.info(f"✅ {data_type.upper()} Google Sheets connection test successful")
+        return web.json_response({
+            'success': True,
+            'message': f'{data_type.upper()} Google Sheets connection successful',
+            'sheet_info': {
+                'spreadsheet_title': target['spreadsheet_title'],
+                'sheet_name': target['sheet_name'],
+                'row_count': target['row_count'],
+                'col_count': target['col_count'],
+                'last_row_with_data': total_rows,
+                'data_type': data_type.upper()
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"❌ {data_type.upper()} Google Sheets connection test failed: {str(e)}")
+        return error_response(data_type, e)
+
+async def get_sheet_info_generic(data_type='allura'):
+    """Generic handler to get information about the target sheet"""
+    try:
+        with sheets_priority('probe'):
+            target = await sheets_client.get_target(data_type)
+            header, total_rows, last_rows = await read_sheet_summary(target, tail_rows=5)
+        return web.json_response({
+            'success': True,
+            'sheet_info': {
+                'spreadsheet_title': target['spreadsheet_title'],
+                'spreadsheet_id': target['spreadsheet_id'],
+                'sheet_name': target['sheet_name'],
+                'total_rows': total_rows,
+                'data_rows': max(total_rows - 1, 0),
+                'columns': len(header),
+                'header': header,
+                'last_5_rows': last_rows,
+                'data_type': data_type.upper()
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"❌ Failed to get {data_type.upper()} sheet info: {str(e)}")
+        return error_response(data_type, e)
+
+async def clear_test_data_generic(request, data_type='allura'):
+    """Generic handler to clear test data from the sheet (rows containing 'TEST'); ?dry_run=1 only reports them"""
+    try:
+        target = await sheets_client.get_target(data_type)
+        all_values = (await sheets_client.values_get(target, target['sheet_name'])).get('values', [])
+        rows_to_delete = [i + 1 for i, row in enumerate(all_values) if any('TEST' in str(cell) for cell in row)]
+
+        if not rows_to_delete:
+            return web.json_response({
+                'success': True,
+                'message': f'No test data found to clear in {data_type.upper()} sheet',
+                'rows_deleted': 0,
+                'data_type': data_type.upper()
+            })
+
+        ranges = group_contiguous_rows(rows_to_delete)
+        if request.query.get('dry_run', '').lower() in ('1', 'true', 'yes'):
+            return web.json_response({
+                'success': True,
+                'dry_run': True,
+                'message': f'Would clear {len(rows_to_delete)} test rows in {len(ranges)} ranges from {data_type.upper()} sheet',
+                'rows_to_delete': len(rows_to_delete),
+                'ranges': [{'start_row': start, 'end_row': end} for start, end in ranges],
+                'data_type': data_type.upper(),
+                'timestamp': datetime.now().isoformat()
+            })
+        await sheets_client.batch_update(target, {
+            'requests': [
+                {
+                    'deleteDimension': {
+                        'range': {
+                            'sheetId': target['sheet_id'],
+                            'dimension': 'ROWS',
+                            'startIndex': start - 1,
+                            'endIndex': end
+                        }
+                    }
+                }
+                for start, end in reversed(ranges)
+            ]
+        })
+        logger.info(f"✅ Deleted {len(rows_to_delete)} test rows in {len(ranges)} ranges from {data_type.upper()} sheet")
+        return web.json_response({
+            'success': True,
+            'message': f'Cleared {len(rows_to_delete)} test rows from {data_type.upper()} sheet',
+            'rows_deleted': len(rows_to_delete),
+            'ranges': [{'start_row': start, 'end_row': end} for start, end in ranges],
+            'data_type': data_type.upper(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"❌ Failed to clear {data_type.upper()} test data: {str(e)}")
+        return error_response(data_type, e)
+
+async def health_check(request):
+    """Health check endpoint"""
+    return web.json_response({
+        'status': 'healthy',
+        'service': 'Google Sheets BOL Processor (async)',
+        'allura_config': target_config('allura'),
+        'ihl_config': target_config('ihl'),
+        'targets': {name: target_config(name) for name in SHEET_TARGETS},
+        'timestamp': datetime.now().isoformat()
+    })
+
+async def list_targets(request):
+    """List the configured sheet targets"""
+    return web.json_response({
+        'success': True,
+        'targets': {name: target_config(name) for name in SHEET_TARGETS},
+        'timestamp': datetime.now().isoformat()
+    })
+
+def target_route(handler, needs_request=False):
+    """Wrap a generic handler for /targets/{name}/... routes, returning 404 for unknown targets"""
+    async def route(request):
+        name = request.match_info['name'].lower()
+        if name not in SHEET_TARGETS:
+            return web.json_response({
+                'success': False,
+                'error': f"Unknown target: {request.match_info['name']}",
+                'available_targets': list(SHEET_TARGETS),
+                'timestamp': datetime.now().isoformat()
+            }, status=404)
+        return await (handler(request, name) if needs_request else handler(name))
+    return route
+
+def fixed_target_route(handler, data_type, needs_request=False):
+    """Wrap a generic handler for one of the built-in Allura/IHL routes"""
+    async def route(request):
+        return await (handler(request, data_type) if needs_request else handler(data_type))
+    return route
+
+@web.middleware
+async def cors_middleware(request, handler):
+    """Allow all origins, like flask_cors does for the Flask service"""
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = request.headers.get('Access-Control-Request-Headers', '*')
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+@web.middleware
+async def compression_middleware(request, handler):
+    """Compress large responses; aiohttp already inflates gzip/deflate (and br with brotli) request bodies"""
+    response = await handler(request)
+    if isinstance(response, web.Response) and response.body is not None and len(response.body) >= config['compress_min_bytes']:
+        response.enable_compression()
+    return response
+
+async def on_startup(app):
+    await sheets_client.start()
+    # Open every target up front so the first request skips the metadata call
+    for name in SHEET_TARGETS:
+        try:
+            await sheets_client.get_target(name)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not open {name.upper()} sheet during startup: {str(e)}")
+
+async def on_cleanup(app):
+    await sheets_client.close()
+
+def create_app():
+    """Build the aiohttp application with the same routes as the Flask service"""
+    app = web.Application(middlewares=[cors_middleware, compression_middleware], client_max_size=256 * 1024 * 1024)
+    app.router.add_get('/health', health_check)
+    app.router.add_post('/upload-csv', upload_csv)
+    for data_type, suffix in (('allura', ''), ('ihl', '-ihl')):
+        app.router.add_get(f'/test{suffix}', fixed_target_route(test_connection_generic, data_type))
+        app.router.add_get(f'/sheet-info{suffix}', fixed_target_route(get_sheet_info_generic, data_type))
+        app.router.add_post(f'/clear-test-data{suffix}', fixed_target_route(clear_test_data_generic, data_type, needs_request=True))
+    app.router.add_post('/upload-csv-allura', fixed_target_route(upload_csv_generic, 'allura', needs_request=True))
+    app.router.add_post('/upload-csv-ihl', fixed_target_route(upload_csv_generic, 'ihl', needs_request=True))
+    app.router.add_get('/targets', list_targets)
+    app.router.add_get('/targets/{name}/test', target_route(test_connection_generic))
+    app.router.add_post('/targets/{name}/upload-csv', target_route(upload_csv_generic, needs_request=True))
+    app.router.add_get('/targets/{name}/sheet-info', target_route(get_sheet_info_generic))
+    app.router.add_post('/targets/{name}/clear-test-data', target_route(clear_test_data_generic, needs_request=True))
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+if __name__ == '__main__':
+    logger.info(f"🚀 Starting async server on {config['flask_host']}:{config['flask_port']}")
+    web.run_app(create_app(), host=config['flask_host'], port=config['flask_port'])
@@ -0,0 +1,273 @@
+"""
+Microbenchmarks for the upload CSV pipeline
+Compares the streaming CSV parser with the original multi-copy parser, and single-count keyword
+detection with the original per-keyword rescanning, on synthetic BOL files of the given sizes.
+Reports best-of-N wall time and peak traced memory for each.
+The inputs are generated deterministically, so two runs (or two builds) are comparable.
+
+Usage:
+    python benchmark_parsing.py --sizes-mb 1 10 100
+    python benchmark_parsing.py --benchmarks detect --sizes-mb 1 10 50 100
+    python benchmark_parsing.py --sizes-mb 1 10 --repeat 5 --output parse-bench.json
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmark_service import MOCK_TARGETS
+
+# The service needs its sheet targets configured to import; parsing never contacts them
+for key, value in MOCK_TARGETS.items():
+    os.environ.setdefault(key, value)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import google_sheets_service as service
+
+HEADER = 'Order,Carrier,Ship Date,SKU,Quantity,Description,Price\n'
+
+def legacy_parse_csv_content(csv_content):
+    """The parser this service shipped before the streaming one, kept verbatim as the baseline"""
+    # Handle different line endings
+    csv_content = csv_content.replace('\r\n', '\n').replace('\r', '\n')
+
+    # Split into lines and filter empty ones
+    lines = [line.strip() for line in csv_content.split('\n') if line.strip()]
+
+    if len(lines) <= 1:
+        raise ValueError("CSV must contain at least header and one data row")
+
+    # Parse each line as CSV
+    parsed_rows = []
+    csv_reader = csv.reader(lines)
+
+    for row in csv_reader:
+        if row:  # Skip empty rows
+            # Clean and strip each cell
+            cleaned_row = [cell.strip() for cell in row]
+            parsed_rows.append(cleaned_row)
+
+    # Separate header and data
+    header = parsed_rows[0] if parsed_rows else []
+    data_rows = parsed_rows[1:] if len(parsed_rows) > 1 else []
+    return header, data_rows
+
+def legacy_detect_data_type(csv_content, header):
+    """The detector this service shipped before keyword counting was shared, kept verbatim as the baseline"""
+    # Convert all content to lowercase for case-insensitive matching
+    content_lower = csv_content.lower()
+    header_lower = [col.lower() for col in header] if header else []
+
+    # IHL detection keywords and patterns
+    ihl_indicators = [
+        'ihl', 'sensual', 'sensuelle', 'intimate', 'intimates',
+        'lingerie', 'bra', 'panty', 'panties', 'sleepwear',
+        'nightwear', 'hosiery', 'shapewear', 'bodysuit'
+    ]
+
+    # Check content for IHL indicators
+    ihl_score = 0
+    for indicator in ihl_indicators:
+        if indicator in content_lower:
+            ihl_score += content_lower.count(indicator)
+
+    # Check header columns for IHL-specific terms
+    header_ihl_score = 0
+    for col in header_lower:
+        for indicator in ihl_indicators:
+            if indicator in col:
+                header_ihl_score += 2  # Header matches are weighted higher
+
+    total_ihl_score = ihl_score + header_ihl_score
+
+    # Additional pattern checks
+    pattern_score = 0
+    if 'sensual' in content_lower or 'sensuelle' in content_lower:
+        pattern_score += 5  # Strong indicator
+    if 'intimate' in content_lower and 'apparel' in content_lower:
+        pattern_score += 3
+
+    total_score = total_ihl_score + pattern_score
+
+    # Decision logic: if score >= 3, likely IHL data
+    is_ihl = total_score >= 3
+
+    detected_type = 'ihl' if is_ihl else 'allura'
+    return detected_type, total_score
+
+# Product descriptions: 'allura' never matches a keyword, 'ihl' matches several on every row
+PRODUCTS = {
+    'allura': ('Carton {0}, stacked', 'Pallet {0} shrink wrapped', 'Crate {0}'),
+    'ihl': ('Sensual lace bra {0}', 'Intimates apparel set {0}', 'Silk sleepwear, brand {0}')
+}
+
+def bol_csv(size_mb, profile='allura'):
+    """A synthetic BOL CSV of about size_mb megabytes (same content on every run)"""
+    target = int(size_mb * 1024 * 1024)
+    products = PRODUCTS[profile]
+    lines = [HEADER]
+    written = len(HEADER)
+    index = 0
+    while written < target:
+        product = products[index % len(products)].format(index % 97)
+        line = (f'BOL{index:08d},{("UPS", "FedEx", "DHL", "USPS")[index % 4]},2026-10-{index % 28 + 1:02d},'
+                f'SKU-{index % 9973:05d},{index % 50 + 1},"{product}",{index % 1000 / 10:.2f}\n')
+        lines.append(line)
+        written += len(line)
+        index += 1
+    return ''.join(lines)
+
+def parse_new_string(csv_content, body):
+    return service.parse_csv_content(csv_content)
+
+def parse_new_stream(csv_content, body):
+    return service.parse_csv_stream(service.iter_stream_lines(io.BytesIO(body)))
+
+def parse_legacy(csv_content, body):
+    return legacy_parse_csv_content(csv_content)
+
+# name -> parser(csv_content, body_bytes); 'stream' is the raw text/csv request path
+PARSERS = {
+    'legacy': parse_legacy,
+    'string': parse_new_string,
+    'stream': parse_new_stream
+}
+
+def measure(function, repeat):
+    """Best-of-repeat wall time, then (peak, retained) traced memory from one extra run.
+    Retained is what the result itself holds; peak minus retained is the parser's working memory."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        del result
+    tracemalloc.start()
+    result = function()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, retained, result
+
+def run_parse_benchmark(sizes_mb, repeat):
+    results = []
+    for size_mb in sizes_mb:
+        csv_content = bol_csv(size_mb)
+        body = csv_content.encode('utf-8')
+        reference = None
+        for name, parser in PARSERS.items():
+            seconds, peak, retained, (header, data_rows) = measure(lambda: parser(csv_content, body), repeat)
+            if reference is None:
+                reference = (header, len(data_rows), data_rows[-1])
+            elif (header, len(data_rows), data_rows[-1]) != reference:
+                raise RuntimeError(f'{name} parser disagrees with the legacy parser on the {size_mb} MB input')
+            results.append({
+                'benchmark': 'parse',
+                'size_mb': size_mb,
+                'implementation': name,
+                'rows': len(data_rows),
+                'seconds': round(seconds, 4),
+                'mb_per_second': round(len(body) / 1e6 / seconds, 1),
+                'peak_mb': round(peak / 1e6, 1),
+                'working_mb': round((peak - retained) / 1e6, 1)
+            })
+            del header, data_rows
+    return results
+
+def detect_streamed(csv_content, header, data_rows):
+    """Detection as a raw text/csv upload runs it: keywords tallied per decoded 64 KB block"""
+    counts = {}
+    start = 0
+    while start < len(csv_content):
+        # Blocks end on a line break, like the incremental decoder hands them over
+        end = csv_content.rfind('\n', start, start + 64 * 1024) + 1 or len(csv_content)
+        for keyword, count in service.count_keywords(csv_content[start:end].lower()).items():
+            counts[keyword] = counts.get(keyword, 0) + count
+        start = end
+    return service.detect_data_type(None, header, data_rows, content_counts=counts)
+
+# name -> detector(csv_content, header, data_rows); all are given the parsed rows so only scoring is timed
+DETECTORS = {
+    'legacy': lambda csv_content, header, data_rows: legacy_detect_data_type(csv_content, header),
+    'counted': lambda csv_content, header, data_rows: service.detect_data_type(csv_content, header, data_rows),
+    'streamed': detect_streamed
+}
+
+def run_detect_benchmark(sizes_mb, repeat):
+    results = []
+    for profile in PRODUCTS:
+        for size_mb in sizes_mb:
+            csv_content = bol_csv(size_mb, profile)
+            header, data_rows = service.parse_csv_content(csv_content)
+            reference = None
+            for name, detector in DETECTORS.items():
+                seconds, peak, retained, detection = measure(
+                    lambda detector=detector, header=header, data_rows=data_rows: detector(csv_content, header, data_rows),
+                    repeat
+                )
+                if reference is None:
+                    reference = detection
+                elif detection != reference:
+                    raise RuntimeError(f'{name} detector scored {detection}, legacy scored {reference} ({profile}, {size_mb} MB)')
+                results.append({
+                    'benchmark': f'detect-{profile}',
+                    'size_mb': size_mb,
+                    'implementation': name,
+                    'rows': len(data_rows),
+                    'score': detection[1],
+                    'seconds': round(seconds, 4),
+                    'mb_per_second': round(len(csv_content) / 1e6 / seconds, 1),
+                    'peak_mb': round(peak / 1e6, 1),
+                    'working_mb': round((peak - retained) / 1e6, 1)
+                })
+            del header, data_rows
+    return results
+
+BENCHMARKS = {
+    'parse': run_parse_benchmark,
+    'detect': run_detect_benchmark
+}
+
+def print_results(results):
+    print(f"{'benchmark':<14} {'size':>7} {'impl':<8} {'rows':>9} {'seconds':>9} {'MB/s':>7} {'peak MB':>9} {'working MB':>11}")
+    for result in results:
+        print(f"{result['benchmark']:<14} {result['size_mb']:>5g}MB {result['implementation']:<8} {result['rows']:>9} "
+              f"{result['seconds']:>9.4f} {result['mb_per_second']:>7.1f} {result['peak_mb']:>9.1f} {result['working_mb']:>11.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV pipeline microbenchmarks')
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[1, 10, 100], help='Input sizes in megabytes')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per implementation (best is reported)')
+    parser.add_argument('--output', help='Write results JSON here')
+    args = parser.parse_args()
+
+    # The service logs every parse; keep that out of the timings
+    logging.disable(logging.CRITICAL)
+
+    results = []
+    for name in args.benchmarks:
+        results.extend(BENCHMARKS[name](args.sizes_mb, args.repeat))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'generated_at': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'repeat': args.repeat,
+                'results': results
+            }, f, indent=2)
+        print(f'Results written to {args.output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Benchmark suite for the Google Sheets Service
+Runs the service offline against mock_sheets_server.py and reports p50/p99 latency, throughput,
+Sheets API calls per request and peak RSS for each endpoint, sheet size and server mode.
+Results are written as JSON so two builds can be compared.
+
+Usage:
+    python benchmark_service.py --rows 1000 100000 --requests 200 --concurrency 8 --output bench.json
+    python benchmark_service.py --server flask async --scenarios upload sheet-info
+    python benchmark_service.py --baseline bench.json   # exit 1 if anything regressed past --threshold
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+# name -> (method, path); upload bodies are generated per request so idempotency never dedupes them
+SCENARIOS = {
+    'upload': ('POST', '/upload-csv-allura'),
+    'smart-upload': ('POST', '/upload-csv'),
+    'sheet-info': ('GET', '/sheet-info'),
+    'test': ('GET', '/test'),
+    'clear-test-data': ('POST', '/clear-test-data?dry_run=1')
+}
+
+MOCK_TARGETS = {
+    'SPREADSHEET_ID': 'mock-allura',
+    'SHEET_NAME': 'Allura Test',
+    'IHL_SPREADSHEET_ID': 'mock-ihl',
+    'IHL_SHEET_NAME': 'IHL Test'
+}
+
+# Keep the service's own rate limiter and caches out of the way so the code path itself is measured
+WORKER_ENV_DEFAULTS = {
+    'SHEETS_PROJECT_REQUESTS_PER_MINUTE': '1000000',
+    'SHEETS_SPREADSHEET_REQUESTS_PER_MINUTE': '1000000',
+    'SHEETS_BURST': '1000',
+    'SHEET_INFO_CACHE_TTL_SECONDS': '0',
+    'LOG_LEVEL': 'WARNING'
+}
+
+# Metrics compared against a baseline: (key, True when higher is better)
+COMPARED_METRICS = [
+    ('p50_ms', False),
+    ('p99_ms', False),
+    ('throughput_rps', True),
+    ('api_calls_per_request', False),
+    ('peak_rss_mb', False),
+    ('import_seconds', False),
+    ('first_call_ms', False)
+]
+
+def free_port():
+    """Ask the OS for an unused localhost port"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_ready(url, timeout=30, require_ok=False):
+    """Poll url until it answers (with a 2xx when require_ok) or timeout seconds pass"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).ok or not require_ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f'Timed out waiting for {url}')
+
+def fake_credentials_env():
+    """Service-account env vars with a throwaway key; the mock token endpoint accepts any signed JWT"""
+    import rsa
+    _, private_key = rsa.newkeys(1024)
+    return {
+        'GOOGLE_PROJECT_ID': 'benchmark',
+        'GOOGLE_PRIVATE_KEY_ID': 'benchmark',
+        'GOOGLE_PRIVATE_KEY': private_key.save_pkcs1().decode('ascii'),
+        'GOOGLE_CLIENT_EMAIL': 'benchmark@benchmark.iam.gserviceaccount.com',
+        'GOOGLE_CLIENT_ID': '1'
+    }
+
+def upload_body(index, rows, ihl=False):
+    """A unique CSV upload of rows data rows (IHL-looking when ihl is True)"""
+    product = 'Sensual lingerie bra' if ihl else 'Carton of goods'
+    lines = ['Order,Carrier,Product,Quantity,Status']
+    lines.extend(f'BENCH-{index}-{row},UPS,{product} {row % 97},{row % 50 + 1},Shipped' for row in range(rows))
+    return {'csvContent': '\n'.join(lines)}
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def start_service(server):
+    """Import and start the service on a free port in this process; returns (base_url, import_seconds)"""
+    started = time.perf_counter()
+    if server == 'async':
+        import asyncio
+        from aiohttp import web
+        import async_google_sheets_service
+        import_seconds = time.perf_counter() - started
+
+        port = free_port()
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(async_google_sheets_service.create_app())
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+    else:
+        from werkzeug.serving import make_server
+        import google_sheets_service
+        import_seconds = time.perf_counter() - started
+
+        google_sheets_service.initialize_worker()
+        http_server = make_server('127.0.0.1', 0, google_sheets_service.app, threaded=True)
+        port = http_server.server_port
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{port}'
+    wait_until_ready(f'{base_url}/health')
+    if server == 'flask':
+        # Measured calls start once warm-up has authorized the client and opened the sheets
+        wait_until_ready(f'{base_url}/ready', require_ok=True)
+    return base_url, import_seconds
+
+def run_worker(args):
+    """Child process: start the service, drive one scenario and print a JSON result line"""
+    base_url, import_seconds = start_service(args.server)
+    method, path = SCENARIOS[args.scenario]
+    local = threading.local()
+
+    def call(index):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = None
+        if method == 'POST' and 'upload' in args.scenario:
+            body = upload_body(index, args.upload_rows, ihl=args.scenario == 'smart-upload' and index % 2 == 1)
+        started = time.perf_counter()
+        response = session.request(method, base_url + path, json=body, timeout=300)
+        elapsed = time.perf_counter() - started
+        return elapsed, response.status_code < 400
+
+    # The first call is timed separately (cold caches, first upload) and not counted
+    first_call_seconds, _ = call(-1)
+    startup = requests.get(f'{base_url}/health', timeout=10).json().get('startup', {})
+    requests.post(f'{args.mock_url}/__mock__/reset-stats', timeout=10)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(call, range(args.requests)))
+    wall_seconds = time.perf_counter() - started
+
+    api_calls = requests.get(f'{args.mock_url}/__mock__/stats', timeout=10).json()['calls']
+    api_calls.pop('token', None)
+    latencies = sorted(elapsed for elapsed, _ in outcomes)
+    total_api_calls = sum(count for name, count in api_calls.items() if name not in ('throttled', 'injected_errors'))
+    print(json.dumps({
+        'requests': args.requests,
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'throughput_rps': round(args.requests / wall_seconds, 1),
+        'api_calls': api_calls,
+        'api_calls_per_request': round(total_api_calls / args.requests, 3),
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+        'import_seconds': round(import_seconds, 3),
+        'first_call_ms': round(first_call_seconds * 1000, 2),
+        'ready_seconds': startup.get('ready_seconds'),
+        'first_upload_seconds': startup.get('first_upload_seconds')
+    }))
+
+def start_mock(args, rows, env):
+    """Launch mock_sheets_server.py seeded with rows per sheet; returns (process, base_url)"""
+    port = free_port()
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_sheets_server.py'),
+        '--port', str(port), '--rows', str(rows), '--test-every', '100',
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--quota', str(args.quota), '--error-rate', str(args.error_rate),
+        '--sheet', f"{MOCK_TARGETS['SPREADSHEET_ID']}:{MOCK_TARGETS['SHEET_NAME']}",
+        '--sheet', f"{MOCK_TARGETS['IHL_SPREADSHEET_ID']}:{MOCK_TARGETS['IHL_SHEET_NAME']}"
+    ]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    wait_until_ready(f'{base_url}/__mock__/stats', timeout=600)
+    return process, base_url
+
+def run_scenario(args, env, mock_url, server, scenario):
+    """Run one scenario in a fresh worker process so its peak RSS is its own"""
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker',
+        '--server', server, '--scenarios', scenario, '--mock-url', mock_url,
+        '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+        '--upload-rows', str(args.upload_rows)
+    ]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'{server}/{scenario} worker failed:\n{completed.stderr[-2000:]}')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare(results, baseline, threshold):
+    """Print deltas against a baseline run; returns the list of regressions"""
+    previous = {(r['server'], r['rows'], r['scenario']): r for r in baseline.get('results', [])}
+    regressions = []
+    print(f"\n📈 Compared with baseline from {baseline.get('meta', {}).get('timestamp', 'unknown')}")
+    for result in results:
+        key = (result['server'], result['rows'], result['scenario'])
+        before = previous.get(key)
+        if before is None:
+            continue
+        deltas = []
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            marker = ' ❌' if worse > threshold else ''
+            deltas.append(f'{metric} {change:+.0%}{marker}')
+            if worse > threshold:
+                regressions.append((key, metric, old, new))
+        print(f"   {key[0]:<6} {key[1]:>8} {key[2]:<16} " + ', '.join(deltas))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark for the Google Sheets Service')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000], help='Sheet sizes to seed (data rows)')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--server', nargs='+', default=['flask'], choices=['flask', 'async'])
+    parser.add_argument('--requests', type=int, default=100, help='Measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--upload-rows', type=int, default=100, help='Rows per upload request')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Mock Sheets API latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=5)
+    parser.add_argument('--quota', type=float, default=0, help='Mock requests per minute before 429s (0 = unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of mock calls answered with 429')
+    parser.add_argument('--env', action='append', default=[], help='KEY=VALUE passed to the service (repeatable)')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Results JSON from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative change counted as a regression')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mock-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.server, args.scenario = args.server[0], args.scenarios[0]
+        return run_worker(args)
+
+    print("🏁 Google Sheets Service benchmark (offline, mock Sheets API)")
+    env = dict(os.environ, **WORKER_ENV_DEFAULTS, **MOCK_TARGETS, **fake_credentials_env())
+    env.pop('SHEET_TARGETS_FILE', None)
+    env.update(item.split('=', 1) for item in args.env)
+
+    results = []
+    for rows in args.rows:
+        mock_process, mock_url = start_mock(args, rows, env)
+        print(f"🧪 Mock Sheets API seeded with {rows} rows per sheet at {mock_url}")
+        try:
+            worker_env = dict(env, SHEETS_API_BASE_URL=mock_url, GOOGLE_TOKEN_URI=f'{mock_url}/token')
+            for server in args.server:
+                for scenario in args.scenarios:
+                    result = run_scenario(args, worker_env, mock_url, server, scenario)
+                    result.update(server=server, rows=rows, scenario=scenario)
+                    results.append(result)
+                    print(f"   {server:<6} {scenario:<16} p50 {result['p50_ms']:>9.1f} ms  p99 {result['p99_ms']:>9.1f} ms  "
+                          f"{result['throughput_rps']:>8.1f} req/s  {result['api_calls_per_request']:>6.2f} API calls/req  "
+                          f"RSS {result['peak_rss_mb']:>7.1f} MB  import {result['import_seconds'] * 1000:>5.0f} ms  "
+                          f"first call {result['first_call_ms']:>7.1f} ms  errors {result['errors']}")
+        finally:
+            mock_process.terminate()
+            mock_process.wait()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'git_commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None,
+            'settings': {key: value for key, value in vars(args).items() if key not in ('worker', 'mock_url', 'output', 'baseline')}
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions beyond the threshold")
+
+if __name__ == '__main__':
+    main()
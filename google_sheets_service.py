@@ -5,17 +5,57 @@ Uses service account authentication (no CORS, no popups)
 Works with both .env files (development) and system environment variables (production)
 """
 
-from flask import Flask, request, jsonify
+import time
+MODULE_LOAD_STARTED = time.perf_counter()  # Taken before the imports so the startup report includes them
+
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
-import gspread
-from google.oauth2.service_account import Credentials
+import importlib
 import json
+import gzip
+import zlib
+import hashlib
+import sqlite3
 import os
 import csv
 import io
+import codecs
+import re
 from datetime import datetime
 import logging
+import threading
+import heapq
+import bisect
+import random
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # Optional: enables Content-Encoding: br
+except ImportError:
+    brotli = None
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# gspread pulls in google-auth and oauthlib; load it when the first Sheets call needs it, not at startup
+gspread = LazyModule('gspread')
 
 # Load environment variables from .env file if it exists
 if os.path.exists('.env'):
@@ -35,6 +75,8 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 
+GOOGLE_SHEETS_API_BASE_URL = 'https://sheets.googleapis.com'
+
 def get_service_account_info():
     """Build service account info from environment variables"""
     required_env_vars = [
@@ -58,53 +100,118 @@ def get_service_account_info():
         "client_email": os.getenv('GOOGLE_CLIENT_EMAIL'),
         "client_id": os.getenv('GOOGLE_CLIENT_ID'),
         "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
+        "token_uri": os.getenv('GOOGLE_TOKEN_URI', 'https://oauth2.googleapis.com/token'),
         "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
         "client_x509_cert_url": f"https://www.googleapis.com/oauth2/v1/certs/{os.getenv('GOOGLE_CLIENT_EMAIL').replace('@', '%40')}"
     }
 
-def get_config():
-    """Get configuration from environment variables"""
-    # Allura configuration
-    spreadsheet_id = os.getenv('SPREADSHEET_ID')
-    sheet_name = os.getenv('SHEET_NAME')
+TARGET_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
+
+def load_sheet_targets():
+    """Build the target registry: Allura/IHL from env vars, overlaid with SHEET_TARGETS_FILE"""
+    targets = OrderedDict()
+    targets['allura'] = {'label': 'Allura', 'spreadsheet_id': os.getenv('SPREADSHEET_ID'), 'sheet_name': os.getenv('SHEET_NAME')}
+    targets['ihl'] = {'label': 'IHL', 'spreadsheet_id': os.getenv('IHL_SPREADSHEET_ID'), 'sheet_name': os.getenv('IHL_SHEET_NAME')}
     
-    # IHL configuration
-    ihl_spreadsheet_id = os.getenv('IHL_SPREADSHEET_ID')
-    ihl_sheet_name = os.getenv('IHL_SHEET_NAME')
+    targets_file = os.getenv('SHEET_TARGETS_FILE')
+    if targets_file:
+        with open(targets_file) as f:
+            overrides = json.load(f)
+        for name, target in overrides.items():
+            name = name.lower()
+            if not TARGET_NAME_PATTERN.match(name):
+                raise ValueError(f"Invalid target name in {targets_file}: {name!r}")
+            merged = dict(targets.get(name, {}))
+            merged.update({key: value for key, value in target.items() if value is not None})
+            merged.setdefault('label', name.upper())
+            targets[name] = merged
     
-    if not spreadsheet_id:
+    # Allura and IHL back auto-detection and the legacy routes, so they must always be configured
+    if not targets['allura'].get('spreadsheet_id'):
         raise ValueError("SPREADSHEET_ID environment variable is required")
-    if not sheet_name:
+    if not targets['allura'].get('sheet_name'):
         raise ValueError("SHEET_NAME environment variable is required")
-    if not ihl_spreadsheet_id:
+    if not targets['ihl'].get('spreadsheet_id'):
         raise ValueError("IHL_SPREADSHEET_ID environment variable is required")
-    if not ihl_sheet_name:
+    if not targets['ihl'].get('sheet_name'):
         raise ValueError("IHL_SHEET_NAME environment variable is required")
+    for name, target in targets.items():
+        if not target.get('spreadsheet_id') or not target.get('sheet_name'):
+            raise ValueError(f"Target '{name}' needs both spreadsheet_id and sheet_name")
+    return targets
+
+def get_config():
+    """Get configuration from environment variables"""
+    targets = load_sheet_targets()
     
     # Use PORT from cloud platforms (like Render) if available, otherwise fall back to FLASK_PORT
     port = os.getenv('PORT') or os.getenv('FLASK_PORT', '5550')
     
     return {
-        'spreadsheet_id': spreadsheet_id,
-        'sheet_name': sheet_name,
-        'ihl_spreadsheet_id': ihl_spreadsheet_id,
-        'ihl_sheet_name': ihl_sheet_name,
+        'targets': targets,
+        'spreadsheet_id': targets['allura']['spreadsheet_id'],
+        'sheet_name': targets['allura']['sheet_name'],
+        'ihl_spreadsheet_id': targets['ihl']['spreadsheet_id'],
+        'ihl_sheet_name': targets['ihl']['sheet_name'],
         'flask_host': os.getenv('FLASK_HOST', '0.0.0.0'),
         'flask_port': int(port),
-        'flask_debug': os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+        'flask_debug': os.getenv('FLASK_DEBUG', 'False').lower() == 'true',
+        'server_mode': os.getenv('SERVER_MODE', '').lower(),
+        'web_workers': int(os.getenv('WEB_WORKERS', '1')),  # Job status and idempotency keys are per process
+        'web_threads': int(os.getenv('WEB_THREADS', '16')),
+        'web_timeout': int(os.getenv('WEB_TIMEOUT', '120')),
+        'web_graceful_timeout': int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30')),
+        'sheets_http_pool_size': int(os.getenv('SHEETS_HTTP_POOL_SIZE', '10')),
+        'sheets_api_base_url': os.getenv('SHEETS_API_BASE_URL', GOOGLE_SHEETS_API_BASE_URL).rstrip('/'),
+        'token_refresh_margin': int(os.getenv('TOKEN_REFRESH_MARGIN_SECONDS', '300')),
+        'worksheet_cache_ttl': int(os.getenv('WORKSHEET_CACHE_TTL_SECONDS', '300')),
+        'write_coalesce_window_ms': int(os.getenv('WRITE_COALESCE_WINDOW_MS', '50')),
+        'write_coalesce_max_rows': int(os.getenv('WRITE_COALESCE_MAX_ROWS', '5000')),
+        'write_chunk_rows': int(os.getenv('WRITE_CHUNK_ROWS', '10000')),
+        'write_chunk_bytes': int(os.getenv('WRITE_CHUNK_BYTES', str(2 * 1024 * 1024))),
+        'write_chunk_concurrency': int(os.getenv('WRITE_CHUNK_CONCURRENCY', '4')),
+        'write_chunk_retries': int(os.getenv('WRITE_CHUNK_RETRIES', '3')),
+        'write_resume_ttl': float(os.getenv('WRITE_RESUME_TTL_SECONDS', '3600')),
+        'write_append_retries': int(os.getenv('WRITE_APPEND_RETRIES', '2')),
+        'upload_workers': int(os.getenv('UPLOAD_WORKERS', '4')),
+        'upload_max_retries': int(os.getenv('UPLOAD_MAX_RETRIES', '3')),
+        'job_history_limit': int(os.getenv('JOB_HISTORY_LIMIT', '1000')),
+        'sheet_info_cache_ttl': float(os.getenv('SHEET_INFO_CACHE_TTL_SECONDS', '10')),
+        'sheets_project_rate': float(os.getenv('SHEETS_PROJECT_REQUESTS_PER_MINUTE', '300')),
+        'sheets_spreadsheet_rate': float(os.getenv('SHEETS_SPREADSHEET_REQUESTS_PER_MINUTE', '60')),
+        'sheets_burst': int(os.getenv('SHEETS_BURST', '10')),
+        'sheets_max_retries': int(os.getenv('SHEETS_MAX_RETRIES', '5')),
+        'sheets_backoff_max': float(os.getenv('SHEETS_BACKOFF_MAX_SECONDS', '32')),
+        'spool_enabled': os.getenv('SPOOL_ENABLED', 'False').lower() == 'true',
+        'spool_path': os.getenv('SPOOL_PATH', 'upload_spool.db'),
+        'spool_drain_interval': float(os.getenv('SPOOL_DRAIN_INTERVAL_SECONDS', '5')),
+        'spool_drain_max_rows': int(os.getenv('SPOOL_DRAIN_MAX_ROWS', '10000')),
+        'spool_claim_timeout': float(os.getenv('SPOOL_CLAIM_TIMEOUT_SECONDS', '300')),
+        'spool_reconcile_window': int(os.getenv('SPOOL_RECONCILE_WINDOW_ROWS', '1000')),
+        'idempotency_cache_size': int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000')),
+        'idempotency_ttl': float(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400')),
+        'idempotency_hash_content': os.getenv('IDEMPOTENCY_HASH_CONTENT', 'True').lower() == 'true',
+        'compress_min_bytes': int(os.getenv('COMPRESS_MIN_BYTES', '1024')),
+        'compress_level': int(os.getenv('COMPRESS_LEVEL', '6')),
+        'max_decompressed_bytes': int(os.getenv('MAX_DECOMPRESSED_BYTES', str(256 * 1024 * 1024))),
+        'metrics_enabled': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+        'warmup_enabled': os.getenv('WARMUP_ENABLED', 'True').lower() == 'true',
+        'export_page_rows': int(os.getenv('EXPORT_PAGE_ROWS', '5000')),
+        'export_max_page_rows': int(os.getenv('EXPORT_MAX_PAGE_ROWS', '20000')),
+        'warmup_retry_max': float(os.getenv('WARMUP_RETRY_MAX_SECONDS', '60')),
+        'mirror_enabled': os.getenv('MIRROR_ENABLED', 'False').lower() == 'true',
+        'mirror_refresh_seconds': float(os.getenv('MIRROR_REFRESH_SECONDS', '30')),
+        'mirror_resync_seconds': float(os.getenv('MIRROR_RESYNC_SECONDS', '900')),
+        'mirror_max_rows': int(os.getenv('MIRROR_MAX_ROWS', '500000'))
     }
 
 # Get configuration
 try:
     config = get_config()
-    SPREADSHEET_ID = config['spreadsheet_id']
-    SHEET_NAME = config['sheet_name']
-    IHL_SPREADSHEET_ID = config['ihl_spreadsheet_id']
-    IHL_SHEET_NAME = config['ihl_sheet_name']
+    SHEET_TARGETS = config['targets']
     logger.info("✅ Configuration loaded successfully")
-    logger.info(f"📊 Allura Target Sheet: {SPREADSHEET_ID} - '{SHEET_NAME}'")
-    logger.info(f"📊 IHL Target Sheet: {IHL_SPREADSHEET_ID} - '{IHL_SHEET_NAME}'")
+    for target in SHEET_TARGETS.values():
+        logger.info(f"📊 {target['label']} Target Sheet: {target['spreadsheet_id']} - '{target['sheet_name']}'")
     if os.path.exists('.env'):
         logger.info("📁 Using .env file for configuration (development mode)")
     else:
@@ -113,41 +220,1073 @@ except Exception as e:
     logger.error(f"❌ Configuration error: {str(e)}")
     raise
 
-# Initialize Google Sheets client
-def get_sheets_client():
-    """Initialize and return Google Sheets client"""
+class CompressedBodyError(ValueError):
+    """Request body could not be decompressed or expands past the configured limit"""
+
+class DecompressingStream:
+    """File-like wrapper that inflates a gzip/deflate/br request body as it is read"""
+
+    def __init__(self, raw, encoding, max_bytes, chunk_size=64 * 1024):
+        self.raw = raw
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.total = 0
+        self.buffer = b''
+        self.eof = False
+        self.error = None
+        if encoding == 'br':
+            self._decompressor = brotli.Decompressor()
+        else:
+            # wbits=47 accepts both gzip and zlib (HTTP "deflate") framing
+            self._decompressor = zlib.decompressobj(47)
+
+    def _inflate(self, chunk):
+        if self.encoding == 'br':
+            return self._decompressor.process(chunk)
+        return self._decompressor.decompress(chunk)
+
+    def _fill(self, size):
+        if self.error is not None:
+            raise self.error  # Later readers see the same failure, not a truncated body
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            chunk = self.raw.read(self.chunk_size)
+            try:
+                if chunk:
+                    data = self._inflate(chunk)
+                else:
+                    self.eof = True
+                    data = b'' if self.encoding == 'br' else self._decompressor.flush()
+            except Exception as e:
+                self.error = CompressedBodyError(f'Invalid {self.encoding} request body: {e}')
+                raise self.error from e
+            self.total += len(data)
+            if self.total > self.max_bytes:
+                self.error = CompressedBodyError(f'Decompressed request body exceeds {self.max_bytes} bytes')
+                raise self.error
+            self.buffer += data
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        self._fill(size)
+        if size < 0:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        while b'\n' not in self.buffer and not self.eof:
+            self._fill(len(self.buffer) + self.chunk_size)
+        end = self.buffer.find(b'\n') + 1 or len(self.buffer)
+        if size is not None and 0 <= size < end:
+            end = size
+        data, self.buffer = self.buffer[:end], self.buffer[end:]
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+def supported_content_encodings():
+    """Encodings accepted on request bodies and offered on responses, best first"""
+    return (['br'] if brotli is not None else []) + ['gzip', 'deflate']
+
+class LimitedReader:
+    """Stop reading the raw socket stream at Content-Length"""
+
+    def __init__(self, raw, remaining):
+        self.raw = raw
+        self.remaining = remaining
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        return data
+
+class RequestDecompressionMiddleware:
+    """WSGI middleware that transparently inflates compressed request bodies"""
+
+    def __init__(self, wsgi_app, max_bytes):
+        self.wsgi_app = wsgi_app
+        self.max_bytes = max_bytes
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding and encoding != 'identity':
+            if encoding not in supported_content_encodings():
+                body = json.dumps({
+                    'success': False,
+                    'error': f'Unsupported Content-Encoding: {encoding}',
+                    'timestamp': datetime.now().isoformat()
+                }).encode('utf-8')
+                start_response('415 Unsupported Media Type', [
+                    ('Content-Type', 'application/json'),
+                    ('Content-Length', str(len(body)))
+                ])
+                return [body]
+            
+            raw = environ['wsgi.input']
+            content_length = environ.get('CONTENT_LENGTH')
+            if content_length and not environ.get('wsgi.input_terminated'):
+                raw = LimitedReader(raw, int(content_length))
+            environ['wsgi.input'] = DecompressingStream(raw, encoding, self.max_bytes)
+            # The decompressed length is unknown up front; the stream ends where the body ends
+            environ['wsgi.input_terminated'] = True
+            environ.pop('CONTENT_LENGTH', None)
+            environ.pop('HTTP_CONTENT_ENCODING', None)
+        return self.wsgi_app(environ, start_response)
+
+app.wsgi_app = RequestDecompressionMiddleware(app.wsgi_app, config['max_decompressed_bytes'])
+
+@app.after_request
+def compress_response(response):
+    """Compress large responses with the best encoding the client accepts"""
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 304)):
+        return response
+    
+    if response.is_streamed:
+        encoding = request.accept_encodings.best_match(supported_content_encodings())
+        if encoding:
+            response.response = compress_stream(response.response, encoding)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Length', None)
+        return response
+    
+    body = response.get_data()
+    if len(body) < config['compress_min_bytes']:
+        return response
+    
+    encoding = request.accept_encodings.best_match(supported_content_encodings())
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=min(11, config['compress_level']))
+    elif encoding == 'gzip':
+        compressed = gzip.compress(body, compresslevel=config['compress_level'], mtime=0)
+    elif encoding == 'deflate':
+        compressed = zlib.compress(body, config['compress_level'])
+    else:
+        return response
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body chunk by chunk, flushing each so clients can decode every page as it arrives"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(11, config['compress_level']))
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        # wbits 31 writes a gzip stream, 15 a zlib (deflate) one
+        compressor = zlib.compressobj(config['compress_level'], zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+        compress, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
     try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class MetricsRegistry:
+    """In-process counters and latency histograms, rendered in the Prometheus text format"""
+
+    def __init__(self, enabled=True, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            histogram['buckets'][index] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    def time(self, name, **labels):
+        """Observe how long the block takes (a shared no-op context when metrics are disabled)"""
+        if not self.enabled:
+            return DISABLED_TIMER
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+    def render(self, gauges=()):
+        """Prometheus exposition text for every metric, plus (name, value, labels) gauges sampled at scrape time"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, dict(value, buckets=list(value['buckets']))) for key, value in self._histograms.items())
+        
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{self._format_labels(labels)} {value}')
+        
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), histogram['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{self._format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{self._format_labels(labels)} {histogram["sum"]:.6f}')
+            lines.append(f'{name}_count{self._format_labels(labels)} {histogram["count"]}')
+        
+        for name, value, labels in gauges:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name}{self._format_labels(tuple(sorted(labels.items())))} {value}')
+        return '\n'.join(lines) + '\n'
+
+DISABLED_TIMER = nullcontext()
+
+metrics = MetricsRegistry(enabled=config['metrics_enabled'])
+
+def spreadsheet_target_label(spreadsheet_id):
+    """Target name(s) for a spreadsheet ID, used to label Sheets API metrics"""
+    names = [name for name, target in SHEET_TARGETS.items() if target['spreadsheet_id'] == spreadsheet_id]
+    return '+'.join(names) if names else 'other'
+
+SHEETS_API_VERBS = ('append', 'clear', 'batchGet', 'batchUpdate', 'batchClear')
+
+def sheets_api_operation(method, endpoint):
+    """Short operation name for a Sheets API URL, e.g. values.append or spreadsheets.get"""
+    path = endpoint.split('/spreadsheets/', 1)[-1].split('?', 1)[0]
+    verb = path.rpartition(':')[2]
+    if verb not in SHEETS_API_VERBS:
+        verb = method.lower()
+    return f"{'values' if '/values' in path else 'spreadsheets'}.{verb}"
+
+class TokenBucket:
+    """Token bucket whose refill rate backs off on 429s and recovers on success (AIMD)"""
+
+    def __init__(self, per_minute, burst):
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def penalize(self):
+        """Halve the rate and empty the bucket after a 429"""
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.tokens = min(self.tokens, 0)
+
+    def reward(self):
+        """Creep back toward the configured rate after a success"""
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+# Lower number = served first when callers are waiting for quota
+SHEETS_PRIORITIES = {
+    'upload': 0,
+    'maintenance': 1,
+    'probe': 2
+}
+
+SPREADSHEET_ID_PATTERN = re.compile(r'/spreadsheets/([a-zA-Z0-9-_]+)')
+
+# Repeating these changes the sheet again: an append adds its rows twice, and a structural batchUpdate
+# deletes rows at positions that already shifted. Only 429s and requests that never went out are retried.
+NON_IDEMPOTENT_OPERATIONS = {'values.append', 'spreadsheets.batchUpdate'}
+
+def request_never_sent(error):
+    """Whether a failed call provably never reached Google (the connection was not even established)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), urllib3.exceptions.NewConnectionError)
+    return False
+
+# How often asyncio waiters re-check their place in line; sync waiters are notified instead
+ASYNC_QUEUE_POLL_SECONDS = 0.01
+
+class SheetsAPIScheduler:
+    """Central gate for Sheets API calls: per-project and per-spreadsheet token buckets,
+    priority ordering between waiting callers, and Retry-After aware jittered backoff"""
+
+    def __init__(self, project_rate=300, spreadsheet_rate=60, burst=10, max_retries=5, backoff_max=32, processes=1):
+        self.project_rate = project_rate
+        self.spreadsheet_rate = spreadsheet_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_max = backoff_max
+        self.processes = max(1, processes)
+        self._spreadsheet_rates = {}
+        self._project_bucket = self._bucket(project_rate)
+        self._spreadsheet_buckets = {}
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = 0
+        self._local = threading.local()
+        self._stats = {
+            'calls': 0,
+            'retries': 0,
+            'throttled_429': 0,
+            'wait_seconds': 0.0
+        }
+
+    def _bucket(self, per_minute):
+        # Every server process keeps its own buckets, so each gets an equal share of the quota
+        return TokenBucket(per_minute / self.processes, max(1, self.burst // self.processes))
+
+    def share_between(self, processes):
+        """Limit this process to its share of the quota when several server processes call the API"""
+        with self._condition:
+            self.processes = max(1, processes)
+            self._project_bucket = self._bucket(self.project_rate)
+            self._spreadsheet_buckets = {
+                spreadsheet_id: self._bucket(per_minute) for spreadsheet_id, per_minute in self._spreadsheet_rates.items()
+            }
+
+    @contextmanager
+    def priority(self, name):
+        """Run Sheets calls made by this thread at the given priority"""
+        previous = getattr(self._local, 'priority', None)
+        self._local.priority = SHEETS_PRIORITIES[name]
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def set_spreadsheet_rate(self, spreadsheet_id, per_minute):
+        """Give one spreadsheet its own request budget instead of the default per-spreadsheet rate"""
+        with self._condition:
+            self._spreadsheet_rates[spreadsheet_id] = per_minute
+            self._spreadsheet_buckets[spreadsheet_id] = self._bucket(per_minute)
+
+    def _buckets(self, spreadsheet_id):
+        buckets = [self._project_bucket]
+        if spreadsheet_id:
+            if spreadsheet_id not in self._spreadsheet_buckets:
+                self._spreadsheet_buckets[spreadsheet_id] = self._bucket(self.spreadsheet_rate)
+            buckets.append(self._spreadsheet_buckets[spreadsheet_id])
+        return buckets
+
+    def _enqueue(self, priority):
+        """Join the line; priority is a SHEETS_PRIORITIES name, else this thread's priority(), else maintenance"""
+        if priority is not None:
+            number = SHEETS_PRIORITIES[priority]
+        else:
+            number = getattr(self._local, 'priority', None)
+            if number is None:
+                number = SHEETS_PRIORITIES['maintenance']
+        self._sequence += 1
+        ticket = (number, self._sequence)
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _take(self, ticket, spreadsheet_id, started):
+        """Spend a token if ticket is first in line; returns 0 when taken, else seconds to wait (None: until notified)"""
+        if self._waiting[0] != ticket:
+            return None
+        buckets = self._buckets(spreadsheet_id)
+        now = time.monotonic()
+        wait = max(bucket.wait_time(now) for bucket in buckets)
+        if wait > 0:
+            return wait
+        for bucket in buckets:
+            bucket.consume()
+        heapq.heappop(self._waiting)
+        self._stats['calls'] += 1
+        self._stats['wait_seconds'] += now - started
+        self._condition.notify_all()
+        return 0
+
+    def acquire(self, spreadsheet_id=None, priority=None):
+        """Block until this caller is first in priority order and both buckets have a token"""
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+            while True:
+                wait = self._take(ticket, spreadsheet_id, started)
+                if wait == 0:
+                    return
+                self._condition.wait(wait)
+
+    async def acquire_async(self, spreadsheet_id=None, priority=None):
+        """acquire() for asyncio callers: waits in the same line with asyncio.sleep instead of holding a thread"""
+        import asyncio
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._take(ticket, spreadsheet_id, started)
+                if wait == 0:
+                    return
+                await asyncio.sleep(wait if wait is not None else ASYNC_QUEUE_POLL_SECONDS)
+        except BaseException:
+            # Cancelled (client went away): leave the line so callers behind are not stuck
+            with self._condition:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+            raise
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Delay before retry number `attempt`: Retry-After if given, else full-jitter exponential"""
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, 2 ** attempt))
+
+    def record_result(self, spreadsheet_id, status):
+        """Adapt bucket rates to the outcome of a call"""
+        with self._condition:
+            for bucket in self._buckets(spreadsheet_id):
+                if status == 429:
+                    bucket.penalize()
+                else:
+                    bucket.reward()
+            if status == 429:
+                self._stats['throttled_429'] += 1
+        metrics.inc('sheets_service_sheets_api_attempts_total', target=spreadsheet_target_label(spreadsheet_id), status=status)
+
+    def retryable_status(self, status, idempotent=True):
+        """429 never ran, so it is always safe to repeat; a 5xx may have been applied before it failed"""
+        return status == 429 or (idempotent and status in (500, 502, 503, 504))
+
+    def execute(self, spreadsheet_id, call, idempotent=True):
+        """Run call() under the rate limits, retrying 429s, transient 5xx errors of idempotent calls
+        and connections that were never established"""
+        attempt = 0
+        while True:
+            self.acquire(spreadsheet_id)
+            try:
+                result = call()
+                self.record_result(spreadsheet_id, 200)
+                return result
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not request_never_sent(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = self.backoff_delay(attempt)
+                with self._condition:
+                    self._stats['retries'] += 1
+                logger.warning(f"⏳ Could not connect to the Sheets API, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+            except gspread.exceptions.APIError as e:
+                status = e.response.status_code if e.response is not None else None
+                if not self.retryable_status(status, idempotent) or attempt >= self.max_retries:
+                    raise
+                self.record_result(spreadsheet_id, status)
+                attempt += 1
+                delay = self.backoff_delay(attempt, e.response.headers.get('Retry-After'))
+                with self._condition:
+                    self._stats['retries'] += 1
+                metrics.inc('sheets_service_sheets_api_retries_total', target=spreadsheet_target_label(spreadsheet_id), status=status)
+                logger.warning(f"⏳ Sheets API returned {status}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def stats(self):
+        """Return scheduler counters and current effective rates"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+            stats['waiting'] = len(self._waiting)
+            stats['project_rate_per_minute'] = round(self._project_bucket.rate * 60, 1)
+            stats['processes'] = self.processes
+            return stats
+
+sheets_scheduler = SheetsAPIScheduler(
+    project_rate=config['sheets_project_rate'],
+    spreadsheet_rate=config['sheets_spreadsheet_rate'],
+    burst=config['sheets_burst'],
+    max_retries=config['sheets_max_retries'],
+    backoff_max=config['sheets_backoff_max']
+)
+for target in SHEET_TARGETS.values():
+    if target.get('requests_per_minute'):
+        sheets_scheduler.set_spreadsheet_rate(target['spreadsheet_id'], float(target['requests_per_minute']))
+
+@lru_cache(maxsize=None)
+def scheduled_client_class():
+    """Define the scheduler-aware gspread client on first use, since gspread is imported lazily"""
+
+    class ScheduledClient(gspread.Client):
+        """gspread client whose every API request goes through the Sheets scheduler"""
+
+        def request(self, method, endpoint, *args, **kwargs):
+            match = SPREADSHEET_ID_PATTERN.search(endpoint)
+            spreadsheet_id = match.group(1) if match else None
+            operation = sheets_api_operation(method, endpoint)
+            # Includes time spent waiting for quota and retrying
+            with metrics.time('sheets_service_sheets_api_duration_seconds',
+                              operation=operation,
+                              target=spreadsheet_target_label(spreadsheet_id)):
+                return sheets_scheduler.execute(
+                    spreadsheet_id,
+                    lambda: super(ScheduledClient, self).request(method, endpoint, *args, **kwargs),
+                    idempotent=operation not in NON_IDEMPOTENT_OPERATIONS
+                )
+
+    return ScheduledClient
+
+class BaseURLAdapter(HTTPAdapter):
+    """Pooled adapter that sends Sheets API requests to another base URL (a local mock or a proxy)"""
+
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(GOOGLE_SHEETS_API_BASE_URL):
+            request.url = self.base_url + request.url[len(GOOGLE_SHEETS_API_BASE_URL):]
+        return super().send(request, **kwargs)
+
+class SheetsClientManager:
+    """Process-wide Google Sheets client with token reuse and a pooled HTTP session"""
+
+    def __init__(self, pool_size=10, refresh_margin=300):
+        self.pool_size = pool_size
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._client = None
+        self._credentials = None
+        self._session = None
+        self._auth_request = None
+        self._stats = {
+            'client_builds': 0,
+            'hits': 0,
+            'token_refreshes': 0
+        }
+
+    def _build(self):
+        """Create credentials, a keep-alive session and the authorized gspread client"""
+        from google.auth.transport.requests import AuthorizedSession, Request
+        from google.oauth2.service_account import Credentials
+
         service_account_info = get_service_account_info()
         credentials = Credentials.from_service_account_info(
-            service_account_info, 
+            service_account_info,
             scopes=SCOPES
         )
-        client = gspread.authorize(credentials)
-        logger.info("✅ Google Sheets client initialized successfully")
-        return client
+        # Token refreshes go over their own keep-alive session; API calls share the pooled one
+        token_session = requests.Session()
+        token_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        token_session.mount('https://', token_adapter)
+        token_session.mount('http://', token_adapter)
+        auth_request = Request(token_session)
+        session = AuthorizedSession(credentials, auth_request=auth_request)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if config['sheets_api_base_url'] != GOOGLE_SHEETS_API_BASE_URL:
+            session.mount(GOOGLE_SHEETS_API_BASE_URL, BaseURLAdapter(
+                config['sheets_api_base_url'], pool_connections=self.pool_size, pool_maxsize=self.pool_size
+            ))
+            logger.info(f"🔀 Sending Sheets API requests to {config['sheets_api_base_url']}")
+
+        self._credentials = credentials
+        self._session = session
+        self._auth_request = auth_request
+        self._client = scheduled_client_class()(auth=credentials, session=session)
+        self._stats['client_builds'] += 1
+        self._refresh_token()
+        logger.info(f"✅ Google Sheets client initialized successfully (pool size: {self.pool_size})")
+
+    def _refresh_token(self):
+        """Fetch a new access token over the pooled session"""
+        self._credentials.refresh(self._auth_request)
+        self._stats['token_refreshes'] += 1
+        logger.info("🔑 Google access token refreshed")
+
+    def _token_expiring(self):
+        """Check whether the current token is missing or inside the refresh margin"""
+        if not self._credentials.token:
+            return True
+        if not self._credentials.expiry:
+            return False
+        remaining = (self._credentials.expiry - datetime.utcnow()).total_seconds()
+        return remaining <= self.refresh_margin
+
+    def get_client(self):
+        """Return the shared client, building it or refreshing its token when needed"""
+        with self._lock:
+            if self._client is None:
+                self._build()
+            elif self._token_expiring():
+                self._refresh_token()
+            else:
+                self._stats['hits'] += 1
+            return self._client
+
+    def reset(self):
+        """Drop the cached client so the next call re-authorizes"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._auth_request.session.close()
+            self._client = None
+            self._credentials = None
+            self._session = None
+            self._auth_request = None
+
+    def stats(self):
+        """Return client reuse counters"""
+        with self._lock:
+            return dict(self._stats)
+
+sheets_client_manager = SheetsClientManager(
+    pool_size=config['sheets_http_pool_size'],
+    refresh_margin=config['token_refresh_margin']
+)
+
+# Initialize Google Sheets client
+def get_sheets_client():
+    """Return the process-wide Google Sheets client"""
+    try:
+        return sheets_client_manager.get_client()
     except Exception as e:
         logger.error(f"❌ Failed to initialize Google Sheets client: {str(e)}")
         raise
 
+class WorksheetRegistry:
+    """Cache of opened spreadsheet/worksheet handles per data type with TTL expiry"""
+
+    def __init__(self, targets, ttl=300):
+        self.targets = targets
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._stats = {
+            'hits': 0,
+            'opens': 0,
+            'invalidations': 0
+        }
+
+    def resolve(self, data_type):
+        """Map a data type to a known target key, defaulting to allura"""
+        data_type = (data_type or 'allura').lower()
+        return data_type if data_type in self.targets else 'allura'
+
+    def get(self, data_type):
+        """Return (spreadsheet, worksheet) for a data type, opening them on a miss"""
+        key = self.resolve(data_type)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._handles.get(key)
+            if cached and now - cached['opened_at'] < self.ttl:
+                self._stats['hits'] += 1
+                return cached['spreadsheet'], cached['worksheet']
+
+        target = self.targets[key]
+        client = get_sheets_client()
+        with metrics.time('sheets_service_stage_duration_seconds', stage='open', target=key):
+            spreadsheet = client.open_by_key(target['spreadsheet_id'])
+            worksheet = spreadsheet.worksheet(target['sheet_name'])
+        logger.info(f"📊 Connected to {target['label']} sheet: {worksheet.title}")
+
+        with self._lock:
+            self._handles[key] = {
+                'spreadsheet': spreadsheet,
+                'worksheet': worksheet,
+                'opened_at': now
+            }
+            self._stats['opens'] += 1
+        return spreadsheet, worksheet
+
+    def invalidate(self, data_type=None):
+        """Drop cached handles for one data type, or for all of them"""
+        with self._lock:
+            if data_type is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(self.resolve(data_type), None)
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        """Return handle cache counters"""
+        with self._lock:
+            return dict(self._stats)
+
+worksheet_registry = WorksheetRegistry(SHEET_TARGETS, ttl=config['worksheet_cache_ttl'])
+
+def is_stale_handle_error(error):
+    """Check whether an API error means a cached spreadsheet/worksheet handle is no longer valid"""
+    if isinstance(error, (gspread.exceptions.WorksheetNotFound, gspread.exceptions.SpreadsheetNotFound)):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        status = error.response.status_code if error.response is not None else None
+        # A renamed or deleted tab surfaces as a 400 "Unable to parse range"
+        return status == 404 or (status == 400 and 'Unable to parse range' in str(error))
+    return False
+
+def invalidate_on_stale_handle(data_type, error):
+    """Invalidate cached handles for a data type when the error shows they went stale"""
+    if is_stale_handle_error(error):
+        logger.warning(f"♻️ Dropping cached {data_type.upper()} sheet handles after error: {str(error)}")
+        worksheet_registry.invalidate(data_type)
+        sheet_mirrors.invalidate(data_type)
+
 def get_worksheet(data_type='allura'):
     """Get the appropriate worksheet based on data type"""
     try:
         client = get_sheets_client()
-        
-        if data_type.lower() == 'ihl':
-            spreadsheet = client.open_by_key(IHL_SPREADSHEET_ID)
-            worksheet = spreadsheet.worksheet(IHL_SHEET_NAME)
-            logger.info(f"📊 Connected to IHL sheet: {worksheet.title}")
-        else:  # default to allura
-            spreadsheet = client.open_by_key(SPREADSHEET_ID)
-            worksheet = spreadsheet.worksheet(SHEET_NAME)
-            logger.info(f"📊 Connected to Allura sheet: {worksheet.title}")
-        
+        spreadsheet, worksheet = worksheet_registry.get(data_type)
         return client, spreadsheet, worksheet
     except Exception as e:
         logger.error(f"❌ Failed to get {data_type} worksheet: {str(e)}")
         raise
 
+class SheetSummaryCache:
+    """Short-lived cache of sheet summaries so monitoring probes don't spend read quota"""
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() when missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < self.ttl:
+                return entry[1]
+        value = loader()
+        with self._lock:
+            self._entries[key] = (now, value)
+        return value
+
+    def invalidate(self, data_type):
+        """Drop every cached summary for a data type"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == data_type]:
+                del self._entries[key]
+
+sheet_summary_cache = SheetSummaryCache(ttl=config['sheet_info_cache_ttl'])
+
+# Rows read from the end of the grid to find the last row with data. values:append with OVERWRITE grows the
+# grid only as far as the data, so on a sheet this service fills the last grid row holds data and one short
+# read settles the count, however many rows there are.
+SUMMARY_PROBE_ROWS = 50
+
+def grid_row_count(spreadsheet, worksheet):
+    """Current grid height from sheet metadata (worksheet.row_count is only as fresh as the handle)"""
+    metadata = spreadsheet.fetch_sheet_metadata(params={'fields': 'sheets.properties'})
+    for sheet in metadata.get('sheets', []):
+        if sheet['properties']['sheetId'] == worksheet.id:
+            return sheet['properties']['gridProperties']['rowCount']
+    raise gspread.exceptions.WorksheetNotFound(worksheet.title)
+
+def summary_from_tail(header, read_from, values, tail_rows):
+    """Build the read_sheet_summary() result from full-width values read from row read_from to the data's end"""
+    total_rows = read_from + len(values) - 1 if values else 0
+    last_rows = []
+    if tail_rows and total_rows > 1:
+        first_row = max(2, total_rows - tail_rows + 1)
+        last_rows = values[first_row - read_from:]
+        width = max([len(header)] + [len(row) for row in last_rows])
+        last_rows = gspread.utils.fill_gaps(last_rows, rows=total_rows - first_row + 1, cols=width)
+    return {
+        'header': header,
+        'total_rows': total_rows,
+        'last_rows': last_rows
+    }
+
+def read_sheet_summary(spreadsheet, worksheet, tail_rows=0):
+    """Read the header, last row with data and optionally the last data rows with targeted range reads"""
+    title = worksheet.title
+    last_column = column_number_to_letter(max(worksheet.col_count, 1))
+    window = max(tail_rows, SUMMARY_PROBE_ROWS)
+    read_to = grid_row_count(spreadsheet, worksheet)
+    read_from = max(read_to - window + 1, 1)
+    response = spreadsheet.values_batch_get([
+        gspread.utils.absolute_range_name(title, '1:1'),
+        gspread.utils.absolute_range_name(title, f'A{read_from}:{last_column}{read_to}')
+    ])
+    header_range, tail_range = response.get('valueRanges', [{}, {}])
+    header = (header_range.get('values') or [[]])[0]
+    values = tail_range.get('values', [])
+
+    # Blank rows at the end of the grid (new sheets start with 1000): step back in doubling windows
+    while not values and read_from > 1:
+        read_to, window = read_from - 1, window * 2
+        read_from = max(read_to - window + 1, 1)
+        values = spreadsheet.values_get(
+            gspread.utils.absolute_range_name(title, f'A{read_from}:{last_column}{read_to}')
+        ).get('values', [])
+
+    # The data can end just inside the window it was found in; fetch the rest of the tail before it
+    total_rows = read_from + len(values) - 1
+    if values and tail_rows and read_from > 2 and total_rows - read_from + 1 < tail_rows:
+        prefix_from = max(total_rows - tail_rows + 1, 2)
+        prefix = spreadsheet.values_get(
+            gspread.utils.absolute_range_name(title, f'A{prefix_from}:{last_column}{read_from - 1}')
+        ).get('values', [])
+        values = prefix + [[]] * (read_from - prefix_from - len(prefix)) + values
+        read_from = prefix_from
+
+    return summary_from_tail(header, read_from, values, tail_rows)
+
+def timed_summary_read(target, spreadsheet, worksheet, tail_rows):
+    with metrics.time('sheets_service_stage_duration_seconds', stage='summary_read', target=target):
+        return read_sheet_summary(spreadsheet, worksheet, tail_rows)
+
+class SheetMirror:
+    """Local copy of one target's rows: seeded with a single full read, extended by the
+    service's own appends and topped up with delta reads of the rows past the known tail"""
+
+    def __init__(self, target):
+        self.target = target
+        self.lock = threading.Lock()
+        self.rows = None
+        self.synced_at = 0.0
+        self.resynced_at = 0.0
+        self.stale = False
+
+    def tail_matches(self, row):
+        return bool(self.rows) and self.rows[-1] == normalize_sheet_row(row)
+
+class SheetMirrorRegistry:
+    """Per-target mirrors answering row counts, tail reads and 'TEST' scans without Sheets reads.
+    Rows edited in place by other writers are picked up by the periodic full resync."""
+
+    def __init__(self, enabled=False, refresh_seconds=30, resync_seconds=900, max_rows=500000):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self.resync_seconds = resync_seconds
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._mirrors = {}
+        self._stats = {
+            'full_syncs': 0,
+            'delta_syncs': 0,
+            'rows_fetched': 0,
+            'local_reads': 0,
+            'appends_applied': 0,
+            'oversized': 0
+        }
+
+    def _mirror(self, key):
+        with self._lock:
+            mirror = self._mirrors.get(key)
+            if mirror is None:
+                mirror = self._mirrors[key] = SheetMirror(key)
+            return mirror
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def _full_sync(self, mirror, spreadsheet, worksheet):
+        with metrics.time('sheets_service_stage_duration_seconds', stage='mirror_sync', target=mirror.target):
+            values = spreadsheet.values_get(gspread.utils.absolute_range_name(worksheet.title)).get('values', [])
+        now = time.monotonic()
+        self._count('full_syncs')
+        self._count('rows_fetched', len(values))
+        if len(values) > self.max_rows:
+            # Too big to hold locally; reads fall back to targeted range reads
+            mirror.rows = None
+            self._count('oversized')
+            logger.warning(f"⚠️ {mirror.target.upper()} sheet has {len(values)} rows, above MIRROR_MAX_ROWS; not mirroring")
+        else:
+            mirror.rows = [normalize_sheet_row(row) for row in values]
+            logger.info(f"🪞 Mirrored {len(values)} {mirror.target.upper()} rows")
+        mirror.synced_at = mirror.resynced_at = now
+        mirror.stale = False
+
+    def _delta_sync(self, mirror, spreadsheet, worksheet):
+        """Read from the last known row onwards; a changed last row means rows moved, so resync"""
+        known = len(mirror.rows)
+        last_column = column_number_to_letter(max(worksheet.col_count, 1))
+        delta_range = gspread.utils.absolute_range_name(worksheet.title, f'A{known}:{last_column}')
+        with metrics.time('sheets_service_stage_duration_seconds', stage='mirror_sync', target=mirror.target):
+            values = spreadsheet.values_get(delta_range).get('values', [])
+        self._count('delta_syncs')
+        self._count('rows_fetched', len(values))
+        if not values or not mirror.tail_matches(values[0]) or known + len(values) - 1 > self.max_rows:
+            self._full_sync(mirror, spreadsheet, worksheet)
+            return
+        mirror.rows.extend(normalize_sheet_row(row) for row in values[1:])
+        mirror.synced_at = time.monotonic()
+        mirror.stale = False
+
+    def sync(self, data_type, spreadsheet, worksheet, force=False):
+        """Bring a target's mirror up to date if due; returns it, or None when the target is not mirrored"""
+        if not self.enabled:
+            return None
+        mirror = self._mirror(worksheet_registry.resolve(data_type))
+        with mirror.lock:
+            now = time.monotonic()
+            if mirror.rows is None and mirror.resynced_at and now - mirror.resynced_at < self.resync_seconds:
+                return None  # Oversized at the last full read
+            if mirror.rows is None or now - mirror.resynced_at >= self.resync_seconds:
+                self._full_sync(mirror, spreadsheet, worksheet)
+            elif force or mirror.stale or now - mirror.synced_at >= self.refresh_seconds:
+                if mirror.rows:
+                    self._delta_sync(mirror, spreadsheet, worksheet)
+                else:
+                    self._full_sync(mirror, spreadsheet, worksheet)
+            return mirror if mirror.rows is not None else None
+
+    def summary(self, data_type, spreadsheet, worksheet, tail_rows=0):
+        """Build the read_sheet_summary() result from the mirror, or None when not mirrored"""
+        mirror = self.sync(data_type, spreadsheet, worksheet)
+        if mirror is None:
+            return None
+        with mirror.lock:
+            rows = mirror.rows
+            header = list(rows[0]) if rows else []
+            total_rows = len(rows)
+            last_rows = []
+            if tail_rows and total_rows > 1:
+                first_row = max(2, total_rows - tail_rows + 1)
+                last_rows = [list(row) for row in rows[first_row - 1:]]
+                width = max([len(header)] + [len(row) for row in last_rows])
+                last_rows = gspread.utils.fill_gaps(last_rows, rows=total_rows - first_row + 1, cols=width)
+        self._count('local_reads')
+        return {
+            'header': header,
+            'total_rows': total_rows,
+            'last_rows': last_rows
+        }
+
+    def find_rows(self, data_type, spreadsheet, worksheet, predicate, force=True):
+        """Return the 1-based numbers of mirrored rows matching predicate, or None when not mirrored"""
+        mirror = self.sync(data_type, spreadsheet, worksheet, force=force)
+        if mirror is None:
+            return None
+        with mirror.lock:
+            matches = [index + 1 for index, row in enumerate(mirror.rows) if predicate(row)]
+            expected = {row_number: mirror.rows[row_number - 1] for row_number in matches}
+        self._count('local_reads')
+        return matches, expected
+
+    def apply_append(self, data_type, start_row, data_rows):
+        """Record rows this service appended from column B; a gap means someone else wrote too"""
+        if not self.enabled:
+            return
+        mirror = self._mirror(worksheet_registry.resolve(data_type))
+        with mirror.lock:
+            if mirror.rows is None:
+                return
+            if start_row == len(mirror.rows) + 1:
+                mirror.rows.extend(normalize_sheet_row([''] + list(row)) for row in data_rows)
+                self._count('appends_applied')
+            else:
+                mirror.stale = True
+
+    def apply_delete(self, data_type, ranges):
+        """Drop deleted (start_row, end_row) ranges from a target's mirror"""
+        if not self.enabled:
+            return
+        mirror = self._mirror(worksheet_registry.resolve(data_type))
+        with mirror.lock:
+            if mirror.rows is None:
+                return
+            for start, end in sorted(ranges, reverse=True):
+                del mirror.rows[start - 1:end]
+            mirror.stale = True
+
+    def invalidate(self, data_type):
+        """Force a full read on next use"""
+        if not self.enabled:
+            return
+        mirror = self._mirror(worksheet_registry.resolve(data_type))
+        with mirror.lock:
+            mirror.rows = None
+            mirror.resynced_at = 0.0
+
+    def stats(self):
+        """Return sync counters and per-target mirrored row counts"""
+        with self._lock:
+            stats = dict(self._stats, enabled=self.enabled)
+            mirrors = list(self._mirrors.values())
+        for mirror in mirrors:
+            stats[f'{mirror.target}_rows'] = len(mirror.rows) if mirror.rows is not None else 0
+        return stats
+
+sheet_mirrors = SheetMirrorRegistry(
+    enabled=config['mirror_enabled'],
+    refresh_seconds=config['mirror_refresh_seconds'],
+    resync_seconds=config['mirror_resync_seconds'],
+    max_rows=config['mirror_max_rows']
+)
+
+def get_sheet_summary(data_type, tail_rows=0):
+    """Return (spreadsheet, worksheet, summary) for a data type, served from the mirror or the short-TTL cache"""
+    client, spreadsheet, worksheet = get_worksheet(data_type)
+    summary = sheet_mirrors.summary(data_type, spreadsheet, worksheet, tail_rows)
+    if summary is not None:
+        return spreadsheet, worksheet, summary
+    key = (worksheet_registry.resolve(data_type), tail_rows)
+    summary = sheet_summary_cache.get_or_load(
+        key, lambda: timed_summary_read(key[0], spreadsheet, worksheet, tail_rows)
+    )
+    return spreadsheet, worksheet, summary
+
 def column_number_to_letter(column_number):
     """Convert column number to Excel column letter (1=A, 27=AA, etc.)"""
     column_letter = ""
@@ -157,32 +1296,836 @@ def column_number_to_letter(column_number):
         column_number //= 26
     return column_letter
 
-def parse_csv_content(csv_content):
-    """Parse CSV content into rows"""
+class AppendOutcomeUnknown(Exception):
+    """An append failed in a way that may have written its rows, and the sheet could not confirm either way"""
+
+class AppendPositions:
+    """Last row with data per worksheet, as seen by this process: rows appended from now on land below it.
+    Seeded with one summary read, then advanced by every append response and reset when rows are deleted."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+
+    def mark(self, spreadsheet, worksheet):
+        """Row that the next append lands below"""
+        key = (spreadsheet.id, worksheet.title)
+        with self._lock:
+            row = self._rows.get(key)
+        if row is None:
+            row = read_sheet_summary(spreadsheet, worksheet)['total_rows']
+            self.advance(spreadsheet, worksheet, row)
+        return row
+
+    def advance(self, spreadsheet, worksheet, end_row):
+        key = (spreadsheet.id, worksheet.title)
+        with self._lock:
+            self._rows[key] = max(self._rows.get(key, 0), end_row)
+
+    def invalidate(self, spreadsheet_id):
+        """Forget a spreadsheet's positions after rows were deleted from it"""
+        with self._lock:
+            for key in [key for key in self._rows if key[0] == spreadsheet_id]:
+                del self._rows[key]
+
+append_positions = AppendPositions()
+
+def read_rows_below(spreadsheet, worksheet, after_row, width, max_rows=None):
+    """Rows below after_row as the service writes them (column A dropped, trailing blanks trimmed)"""
+    last_column = column_number_to_letter(max(worksheet.col_count, width + 1))
+    # Start on the known last row: a range that begins past the grid is rejected
+    read_from = max(after_row, 1)
+    if max_rows is None:
+        read_range = f'A{read_from}:{last_column}'
+    else:
+        read_to = min(after_row + max_rows, grid_row_count(spreadsheet, worksheet))
+        if read_to <= after_row:
+            return []
+        read_range = f'A{read_from}:{last_column}{read_to}'
+    values = spreadsheet.values_get(gspread.utils.absolute_range_name(worksheet.title, read_range)).get('values', [])
+    return [normalize_sheet_row(row[1:]) for row in values[after_row + 1 - read_from:]]
+
+def find_appended_rows(spreadsheet, worksheet, data_rows, after_row):
+    """Look for data_rows written from column B below after_row; returns (start_row, end_row) or None"""
+    tail = read_rows_below(spreadsheet, worksheet, after_row, max(len(row) for row in data_rows))
+    expected = [normalize_sheet_row(row) for row in data_rows]
+    for offset in range(len(tail) - len(expected) + 1):
+        if tail[offset:offset + len(expected)] == expected:
+            return after_row + 1 + offset, after_row + offset + len(expected)
+    return None
+
+def append_rows_from_column_b(spreadsheet, worksheet, data_rows):
+    """Append rows after the last used row, starting at column B, without reading the sheet first"""
+    max_columns = max(len(row) for row in data_rows) if data_rows else 1
+    end_column = column_number_to_letter(max_columns + 1)  # Add 1 to account for B start
+    table_range = gspread.utils.absolute_range_name(worksheet.title, f"B1:{end_column}1")
+    after_row = append_positions.mark(spreadsheet, worksheet)
+
+    for attempt in range(1, config['write_append_retries'] + 2):
+        try:
+            # values:append finds the end of the table server-side, so latency does not grow with the sheet
+            response = spreadsheet.values_append(
+                table_range,
+                params={'valueInputOption': 'RAW', 'insertDataOption': 'OVERWRITE'},
+                body={'values': data_rows}
+            )
+            break
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+            # A 5xx or a dropped connection can follow a committed append: check before appending again
+            try:
+                found = find_appended_rows(spreadsheet, worksheet, data_rows, after_row)
+            except Exception as read_error:
+                raise AppendOutcomeUnknown(f"Append failed and the sheet could not be checked: {str(e)} ({str(read_error)})") from e
+            if found is not None:
+                start_row, end_row = found
+                logger.warning(f"♻️ Append to {worksheet.title} reported {str(e)} but its rows are at {start_row}-{end_row}")
+                append_positions.advance(spreadsheet, worksheet, end_row)
+                updated_range = gspread.utils.absolute_range_name(worksheet.title, f'B{start_row}:{end_column}{end_row}')
+                return start_row, end_row, updated_range
+            if attempt > config['write_append_retries']:
+                raise AppendOutcomeUnknown(f"Append failed after {attempt} attempts: {str(e)}") from e
+            delay = min(2 ** (attempt - 1), config['sheets_backoff_max'])
+            logger.warning(f"⚠️ Append to {worksheet.title} failed and its rows are not in the sheet, retrying in {delay}s: {str(e)}")
+            time.sleep(delay)
+
+    updated_range = response['updates']['updatedRange']
+    first_cell, _, last_cell = updated_range.split('!')[-1].partition(':')
+    start_row, _ = gspread.utils.a1_to_rowcol(first_cell)
+    end_row, _ = gspread.utils.a1_to_rowcol(last_cell or first_cell)
+    append_positions.advance(spreadsheet, worksheet, end_row)
+    return start_row, end_row, updated_range
+
+class ChunkedWriteError(Exception):
+    """Some chunks of a large write still failed after retries; the rows of the others are in the sheet"""
+
+    def __init__(self, message, written_ranges, failed_ranges, resumable=False):
+        super().__init__(message)
+        self.written_ranges = written_ranges
+        self.failed_ranges = failed_ranges
+        self.resumable = resumable
+
+def chunk_rows(data_rows, max_rows, max_bytes):
+    """Split rows into (offset, rows) slices bounded by row count and approximate JSON payload size"""
+    chunks, start, size = [], 0, 0
+    for index, row in enumerate(data_rows):
+        # Quotes, comma and the cell text; close enough to keep requests under the limit
+        row_bytes = sum(len(str(cell)) + 3 for cell in row) + 2
+        if index > start and (index - start >= max_rows or size + row_bytes > max_bytes):
+            chunks.append((start, data_rows[start:index]))
+            start, size = index, 0
+        size += row_bytes
+    if start < len(data_rows):
+        chunks.append((start, data_rows[start:]))
+    return chunks
+
+# Single-cell marker rows that hold a reserved range until its chunk is written
+CHUNK_PLACEHOLDER = '…'
+
+class ChunkedWriter:
+    """Writes uploads too big for one request: one append reserves a contiguous block of marker rows,
+    then size-bounded chunks are written into it concurrently, each retried on its own"""
+
+    def __init__(self, chunk_rows=10000, chunk_bytes=2 * 1024 * 1024, concurrency=4, max_retries=3,
+                 resume_ttl=3600, max_resumable=100):
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.max_retries = max_retries
+        self.resume_ttl = resume_ttl
+        self.max_resumable = max_resumable
+        self._executor = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix='chunk-write')
+        self._lock = threading.Lock()
+        # resume key -> reserved block and the (offset, count) chunks still holding markers
+        self._resumable = OrderedDict()
+        self._stats = {
+            'chunked_writes': 0,
+            'chunks_written': 0,
+            'chunk_retries': 0,
+            'chunks_failed': 0,
+            'resumed_writes': 0,
+            'resumes_abandoned': 0
+        }
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def append(self, spreadsheet, worksheet, data_rows, resume_key=None):
+        """Append rows from column B like append_rows_from_column_b, chunking large ones.
+        With a resume_key, a partial failure keeps its reserved block, and the next call with the same
+        key and rows writes only the chunks that failed."""
+        self._expire_resumable()
+        resume = self._take_resumable(resume_key, spreadsheet, worksheet, data_rows)
+        if resume is not None:
+            start_row, end_row = resume['start_row'], resume['end_row']
+            chunks = [(offset, data_rows[offset:offset + count]) for offset, count in resume['failed']]
+            self._count('resumed_writes')
+            logger.info(f"🧩 Resuming write to {worksheet.title}: rewriting {len(chunks)} failed chunks "
+                        f"of rows {start_row}-{end_row}")
+        else:
+            chunks = chunk_rows(data_rows, self.chunk_rows, self.chunk_bytes)
+            if len(chunks) <= 1:
+                return append_rows_from_column_b(spreadsheet, worksheet, data_rows)
+
+            # Reserving first keeps other appenders (other workers, other clients) out of the block
+            start_row, end_row, _ = append_rows_from_column_b(
+                spreadsheet, worksheet, [[CHUNK_PLACEHOLDER]] * len(data_rows)
+            )
+            self._count('chunked_writes')
+            logger.info(f"🧩 Writing {len(data_rows)} rows to {worksheet.title} in {len(chunks)} chunks (rows {start_row}-{end_row})")
+
+        futures = [
+            self._executor.submit(self._write_chunk, spreadsheet, worksheet, start_row + offset, rows)
+            for offset, rows in chunks
+        ]
+        written, failed, errors = [], [], []
+        for future in futures:
+            first_row, last_row, error = future.result()
+            if error is None:
+                written.append((first_row, last_row))
+            else:
+                failed.append((first_row, last_row))
+                errors.append(error)
+
+        if failed:
+            ranges = ', '.join(f'{first}-{last}' for first, last in failed)
+            if resume_key is None:
+                self._clear_placeholders(spreadsheet, worksheet, failed)
+                raise ChunkedWriteError(
+                    f"{len(failed)} of {len(chunks)} chunks failed (rows {ranges} left empty): {errors[0]}",
+                    written, failed
+                )
+            # Keep the markers so a retry of the same upload fills exactly these rows
+            self._store_resumable(resume_key, spreadsheet, worksheet, start_row, end_row, len(data_rows), failed)
+            raise ChunkedWriteError(
+                f"{len(failed)} of {len(chunks)} chunks failed (rows {ranges} still reserved); "
+                f"retry the same upload to write only those rows: {errors[0]}",
+                written, failed, resumable=True
+            )
+
+        end_column = column_number_to_letter(max(len(row) for row in data_rows) + 1)
+        updated_range = gspread.utils.absolute_range_name(worksheet.title, f'B{start_row}:{end_column}{end_row}')
+        return start_row, end_row, updated_range
+
+    def _write_chunk(self, spreadsheet, worksheet, first_row, rows):
+        """Write one chunk over its reserved rows; returns (first_row, last_row, error)"""
+        last_row = first_row + len(rows) - 1
+        # Every row needs a cell in column B so its marker is overwritten
+        values = [row if row else [''] for row in rows]
+        end_column = column_number_to_letter(max(len(row) for row in values) + 1)
+        chunk_range = gspread.utils.absolute_range_name(worksheet.title, f'B{first_row}:{end_column}{last_row}')
+        # Pool threads do not inherit the uploader's priority
+        with sheets_scheduler.priority('upload'):
+            for attempt in range(1, self.max_retries + 2):
+                try:
+                    spreadsheet.values_update(chunk_range, params={'valueInputOption': 'RAW'}, body={'values': values})
+                    self._count('chunks_written')
+                    return first_row, last_row, None
+                except Exception as e:
+                    # The scheduler already retried 429/5xx answers; only connection failures get another go here
+                    if attempt > self.max_retries or not is_transient_error(e) or isinstance(e, gspread.exceptions.APIError):
+                        self._count('chunks_failed')
+                        logger.error(f"❌ Chunk {chunk_range} failed after {attempt} attempt(s): {str(e)}")
+                        return first_row, last_row, e
+                    self._count('chunk_retries')
+                    delay = min(2 ** (attempt - 1), config['sheets_backoff_max'])
+                    logger.warning(f"⚠️ Chunk {chunk_range} attempt {attempt} failed, retrying in {delay}s: {str(e)}")
+                    time.sleep(delay)
+
+    def _store_resumable(self, resume_key, spreadsheet, worksheet, start_row, end_row, row_count, failed):
+        """Remember a partially written block so the same upload can finish it"""
+        evicted = []
+        with self._lock:
+            self._resumable.pop(resume_key, None)
+            self._resumable[resume_key] = {
+                'spreadsheet': spreadsheet,
+                'worksheet': worksheet,
+                'start_row': start_row,
+                'end_row': end_row,
+                'row_count': row_count,
+                'failed': [(first - start_row, last - first + 1) for first, last in failed],
+                'stored_at': time.monotonic()
+            }
+            while len(self._resumable) > self.max_resumable:
+                evicted.append(self._resumable.popitem(last=False)[1])
+        self._abandon(evicted)
+
+    def _take_resumable(self, resume_key, spreadsheet, worksheet, data_rows):
+        """Claim the stored block for this key if its failed chunks still hold their markers"""
+        if resume_key is None:
+            return None
+        with self._lock:
+            resume = self._resumable.pop(resume_key, None)
+        if resume is None:
+            return None
+        if (resume['spreadsheet'].id != spreadsheet.id or resume['worksheet'].title != worksheet.title
+                or resume['row_count'] != len(data_rows)):
+            self._abandon([resume])
+            return None
+        if not self._still_reserved(resume):
+            # Rows were deleted or edited above or inside the block; its position can no longer be trusted
+            self._count('resumes_abandoned')
+            logger.warning(f"⚠️ Reserved rows {resume['start_row']}-{resume['end_row']} in {worksheet.title} changed, "
+                           f"writing the upload again")
+            return None
+        return resume
+
+    def _failed_ranges(self, resume):
+        return [(resume['start_row'] + offset, resume['start_row'] + offset + count - 1)
+                for offset, count in resume['failed']]
+
+    def _still_reserved(self, resume):
+        """Check with one read that every failed chunk of a stored block still holds its markers"""
+        worksheet = resume['worksheet']
+        ranges = self._failed_ranges(resume)
+        try:
+            value_ranges = resume['spreadsheet'].values_batch_get([
+                gspread.utils.absolute_range_name(worksheet.title, f'B{first}:B{last}') for first, last in ranges
+            ]).get('valueRanges', [])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not check reserved rows in {worksheet.title}: {str(e)}")
+            return False
+        return len(value_ranges) == len(ranges) and all(
+            value_range.get('values', []) == [[CHUNK_PLACEHOLDER]] * (last - first + 1)
+            for value_range, (first, last) in zip(value_ranges, ranges)
+        )
+
+    def _expire_resumable(self):
+        """Clear the markers of blocks nobody came back to finish"""
+        cutoff = time.monotonic() - self.resume_ttl
+        expired = []
+        with self._lock:
+            while self._resumable:
+                resume = next(iter(self._resumable.values()))
+                if resume['stored_at'] > cutoff:
+                    break
+                expired.append(self._resumable.popitem(last=False)[1])
+        self._abandon(expired)
+
+    def _abandon(self, resumes):
+        """Give up on stored blocks, clearing their markers only if the rows have not moved"""
+        for resume in resumes:
+            self._count('resumes_abandoned')
+            if self._still_reserved(resume):
+                self._clear_placeholders(resume['spreadsheet'], resume['worksheet'], self._failed_ranges(resume))
+
+    def _clear_placeholders(self, spreadsheet, worksheet, ranges):
+        """Best-effort removal of the markers left in chunks that were never written"""
+        try:
+            spreadsheet.values_batch_clear(body={'ranges': [
+                gspread.utils.absolute_range_name(worksheet.title, f'B{first}:B{last}') for first, last in ranges
+            ]})
+        except Exception as e:
+            logger.error(f"❌ Could not clear reserved rows in {worksheet.title}: {str(e)}")
+
+    def apply_delete(self, spreadsheet, worksheet, ranges):
+        """Move stored blocks of a worksheet up past rows deleted above them (ranges: 1-based, inclusive)"""
+        with self._lock:
+            for resume in self._resumable.values():
+                if resume['spreadsheet'].id != spreadsheet.id or resume['worksheet'].title != worksheet.title:
+                    continue
+                # A delete inside the block leaves it for the marker check to reject
+                if any(start <= resume['end_row'] and end >= resume['start_row'] for start, end in ranges):
+                    continue
+                shift = sum(end - start + 1 for start, end in ranges if end < resume['start_row'])
+                resume['start_row'] -= shift
+                resume['end_row'] -= shift
+
+    def stats(self):
+        """Return chunk counters"""
+        with self._lock:
+            return dict(self._stats, resumable=len(self._resumable))
+
+chunked_writer = ChunkedWriter(
+    chunk_rows=config['write_chunk_rows'],
+    chunk_bytes=config['write_chunk_bytes'],
+    concurrency=config['write_chunk_concurrency'],
+    max_retries=config['write_chunk_retries'],
+    resume_ttl=config['write_resume_ttl']
+)
+
+class PendingWrite:
+    """Rows from one upload waiting in a coalesced batch"""
+
+    def __init__(self, data_rows, resume_key=None):
+        self.data_rows = data_rows
+        self.resume_key = resume_key
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class WriteCoalescer:
+    """Per-target queue that merges uploads arriving within a short window into one append"""
+
+    def __init__(self, window_ms=50, max_rows=5000):
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flush_locks = {}
+        self._stats = {
+            'uploads': 0,
+            'batches': 0
+        }
+
+    def submit(self, data_type, data_rows, resume_key=None):
+        """Queue rows for a target and block until written; returns (start_row, end_row)"""
+        key = worksheet_registry.resolve(data_type)
+        item = PendingWrite(data_rows, resume_key)
+
+        if len(data_rows) >= self.max_rows:
+            # Fills a batch by itself: write it alone so a partial chunk failure can be resumed by its key
+            with self._lock:
+                self._stats['uploads'] += 1
+                self._flush_locks.setdefault(key, threading.Lock())
+            self._flush(key, [item])
+            if item.error is not None:
+                raise item.error
+            return item.result
+
+        with self._lock:
+            self._stats['uploads'] += 1
+            batch = self._pending.get(key)
+            is_leader = batch is None
+            if is_leader:
+                batch = {'items': [], 'rows': 0}
+                self._pending[key] = batch
+                self._flush_locks.setdefault(key, threading.Lock())
+            batch['items'].append(item)
+            batch['rows'] += len(data_rows)
+            # Close a full batch so later uploads start a new one
+            if batch['rows'] >= self.max_rows and self._pending.get(key) is batch:
+                del self._pending[key]
+
+        if is_leader:
+            if self.window > 0:
+                time.sleep(self.window)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            self._flush(key, batch['items'])
+
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    @contextmanager
+    def exclusive(self, data_type):
+        """Keep a target's writes out while rows are deleted: a delete shifts the rows of a reserved
+        block that chunk writes still address by number"""
+        key = worksheet_registry.resolve(data_type)
+        with self._lock:
+            flush_lock = self._flush_locks.setdefault(key, threading.Lock())
+        with flush_lock:
+            yield
+
+    def _flush(self, key, items):
+        """Write one batch with a single append and hand each upload its own row range"""
+        with self._flush_locks[key]:
+            try:
+                client, spreadsheet, worksheet = get_worksheet(key)
+                rows = [row for item in items for row in item.data_rows]
+                # A merged batch has no single upload to resume for
+                resume_key = items[0].resume_key if len(items) == 1 else None
+                with metrics.time('sheets_service_stage_duration_seconds', stage='append', target=key):
+                    start_row, end_row, updated_range = chunked_writer.append(spreadsheet, worksheet, rows, resume_key)
+                metrics.inc('sheets_service_rows_written_total', len(rows), target=key)
+                logger.info(f"📦 Coalesced {len(items)} {key.upper()} uploads into one write: {updated_range}")
+                sheet_summary_cache.invalidate(key)
+                sheet_mirrors.apply_append(key, start_row, rows)
+
+                offset = start_row
+                for item in items:
+                    item.result = (offset, offset + len(item.data_rows) - 1)
+                    offset += len(item.data_rows)
+                with self._lock:
+                    self._stats['batches'] += 1
+                startup_tracker.record_first_upload()
+            except Exception as e:
+                for item in items:
+                    item.error = e
+            finally:
+                for item in items:
+                    item.done.set()
+
+    def stats(self):
+        """Return queue counters"""
+        with self._lock:
+            return dict(self._stats)
+
+write_coalescer = WriteCoalescer(
+    window_ms=config['write_coalesce_window_ms'],
+    max_rows=config['write_coalesce_max_rows']
+)
+
+def is_transient_error(error):
+    """Check whether a failed Sheets call is worth retrying"""
+    if isinstance(error, gspread.exceptions.APIError):
+        status = error.response.status_code if error.response is not None else None
+        return status in (429, 500, 502, 503, 504)
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+class UploadJobManager:
+    """Background worker pool for async uploads, with retries and a bounded job history"""
+
+    def __init__(self, workers=4, max_retries=3, history_limit=1000):
+        self.max_retries = max_retries
+        self.history_limit = history_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload-job')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+
+    def submit(self, data_type, data_rows, resume_key=None):
+        """Queue a write and return its job ID"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'jobId': job_id,
+            'status': 'queued',
+            'dataType': data_type.upper(),
+            'rowsQueued': len(data_rows),
+            'attempts': 0,
+            'result': None,
+            'error': None,
+            'createdAt': datetime.now().isoformat(),
+            'finishedAt': None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict()
+        self._executor.submit(self._run, job_id, data_type, data_rows, resume_key)
+        logger.info(f"🧾 Queued {data_type.upper()} upload job {job_id} ({len(data_rows)} rows)")
+        return job_id
+
+    def _run(self, job_id, data_type, data_rows, resume_key=None):
+        """Write the rows, retrying transient failures with exponential backoff"""
+        self._update(job_id, status='running')
+        for attempt in range(1, self.max_retries + 2):
+            self._update(job_id, attempts=attempt)
+            try:
+                result = write_rows(data_type, data_rows, resume_key)
+                if result.get('spooled'):
+                    # Sheets is down; the spool drainer owns the rows now
+                    self._update(job_id, status='spooled', result=result, spoolId=result['spoolId'], error=None,
+                                 finishedAt=datetime.now().isoformat())
+                    logger.info(f"🗄️ Upload job {job_id} handed its rows to spool entry {result['spoolId']}")
+                    return
+                self._update(job_id, status='succeeded', result=result, error=None,
+                             finishedAt=datetime.now().isoformat())
+                logger.info(f"✅ Upload job {job_id} finished (rows {result['startRow']}-{result['endRow']})")
+                return
+            except Exception as e:
+                invalidate_on_stale_handle(data_type, e)
+                if attempt > self.max_retries or not is_transient_error(e):
+                    self._update(job_id, status='failed', error=str(e),
+                                 finishedAt=datetime.now().isoformat())
+                    logger.error(f"❌ Upload job {job_id} failed after {attempt} attempt(s): {str(e)}")
+                    return
+                delay = 2 ** (attempt - 1)
+                self._update(job_id, error=str(e))
+                logger.warning(f"⚠️ Upload job {job_id} attempt {attempt} failed, retrying in {delay}s: {str(e)}")
+                time.sleep(delay)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _evict(self):
+        """Drop the oldest finished jobs once the history limit is exceeded"""
+        overflow = len(self._jobs) - self.history_limit
+        if overflow <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items() if job['finishedAt']][:overflow]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        """Stop accepting jobs and wait for queued and running ones to finish"""
+        self._executor.shutdown(wait=True)
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self):
+        """Return job counts by status"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return counts
+
+upload_job_manager = UploadJobManager(
+    workers=config['upload_workers'],
+    max_retries=config['upload_max_retries'],
+    history_limit=config['job_history_limit']
+)
+
+def normalize_sheet_row(row):
+    """Strip trailing empty cells so written rows and rows read back compare equal"""
+    row = [str(cell) for cell in row]
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+class UploadSpool:
+    """Durable SQLite write-ahead spool: rows are recorded before the Sheets write and
+    replayed in bulk by a background drainer if the write does not complete"""
+
+    def __init__(self, path, drain_interval=5, drain_max_rows=10000, claim_timeout=300, reconcile_window=1000):
+        self.path = path
+        self.reconcile_window = reconcile_window
+        self.drain_interval = drain_interval
+        self.drain_max_rows = drain_max_rows
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._connection = None
+        self._drainer = None
+        self._stop = threading.Event()
+        self._in_flight = set()  # Entries this process is writing right now; their claims are kept fresh
+
+    def _db(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=FULL')
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS spool (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    target TEXT NOT NULL,
+                    rows TEXT NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    claimed_at REAL,
+                    start_row INTEGER,
+                    end_row INTEGER,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    append_after INTEGER
+                )
+            """)
+            columns = [column[1] for column in self._connection.execute('PRAGMA table_info(spool)')]
+            if 'append_after' not in columns:
+                # Spools created before appends were marked; their entries were never marked as attempted
+                self._connection.execute('ALTER TABLE spool ADD COLUMN append_after INTEGER')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS spool_status ON spool (status, target, id)')
+        return self._connection
+
+    def record(self, target, data_rows):
+        """Durably store rows for a target before writing them; returns the spool entry ID"""
+        now = time.time()
+        with self._lock:
+            cursor = self._db().execute(
+                'INSERT INTO spool (target, rows, row_count, status, claimed_at, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (target, json.dumps(data_rows), len(data_rows), 'active', now, now)
+            )
+            self._in_flight.add(cursor.lastrowid)
+            return cursor.lastrowid
+
+    def mark_attempted(self, entry_ids, after_row):
+        """Note that the entries' append is about to be sent; their rows can only land below after_row"""
+        with self._lock:
+            self._db().executemany(
+                'UPDATE spool SET append_after = ? WHERE id = ?', [(after_row, entry_id) for entry_id in entry_ids]
+            )
+
+    def _append_marks(self, entry_ids):
+        """append_after of the given entries that were ever sent to Sheets"""
+        with self._lock:
+            return dict(self._db().execute(
+                f"SELECT id, append_after FROM spool WHERE append_after IS NOT NULL AND id IN ({','.join('?' * len(entry_ids))})",
+                entry_ids
+            ).fetchall())
+
+    def mark_written(self, entry_id, start_row, end_row):
+        with self._lock:
+            self._db().execute(
+                "UPDATE spool SET status = 'written', start_row = ?, end_row = ?, rows = '[]', error = NULL WHERE id = ?",
+                (start_row, end_row, entry_id)
+            )
+            self._in_flight.discard(entry_id)
+
+    def mark_failed(self, entry_id, error):
+        with self._lock:
+            self._db().execute(
+                "UPDATE spool SET status = 'failed', error = ? WHERE id = ?", (str(error), entry_id)
+            )
+            self._in_flight.discard(entry_id)
+
+    def release(self, entry_id, error=None):
+        """Hand an entry whose write did not complete over to the drainer"""
+        with self._lock:
+            self._db().execute(
+                "UPDATE spool SET status = 'pending', claimed_at = NULL, error = ? WHERE id = ?",
+                (str(error) if error else None, entry_id)
+            )
+            self._in_flight.discard(entry_id)
+
+    def get(self, entry_id):
+        """Return the state of a spool entry, or None if unknown"""
+        with self._lock:
+            row = self._db().execute(
+                'SELECT id, target, row_count, status, start_row, end_row, error, created_at FROM spool WHERE id = ?',
+                (entry_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('spoolId', 'dataType', 'rowCount', 'status', 'startRow', 'endRow', 'error', 'createdAt')
+        entry = dict(zip(keys, row))
+        entry['dataType'] = entry['dataType'].upper()
+        entry['createdAt'] = datetime.fromtimestamp(entry['createdAt']).isoformat()
+        return entry
+
+    def stats(self):
+        """Return entry counts by status"""
+        with self._lock:
+            return dict(self._db().execute('SELECT status, COUNT(*) FROM spool GROUP BY status').fetchall())
+
+    def _claim(self):
+        """Atomically claim the oldest pending (or orphaned) entries of one target for draining"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                # A write that is merely slow must not be replayed alongside itself: renew this process's
+                # claims, so only entries of a process that died mid-write look orphaned below
+                db.executemany("UPDATE spool SET claimed_at = ? WHERE id = ?", [(now, entry_id) for entry_id in self._in_flight])
+                # Entries claimed by a process that died mid-write become pending again
+                db.execute(
+                    "UPDATE spool SET status = 'pending', claimed_at = NULL "
+                    "WHERE status IN ('active', 'draining') AND claimed_at < ?",
+                    (now - self.claim_timeout,)
+                )
+                first = db.execute("SELECT target FROM spool WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+                if first is None:
+                    db.execute('COMMIT')
+                    return None, []
+                claimed, total = [], 0
+                for entry_id, rows in db.execute(
+                        "SELECT id, rows FROM spool WHERE status = 'pending' AND target = ? ORDER BY id", (first[0],)):
+                    data_rows = json.loads(rows)
+                    if claimed and total + len(data_rows) > self.drain_max_rows:
+                        break
+                    claimed.append((entry_id, data_rows))
+                    total += len(data_rows)
+                db.executemany(
+                    "UPDATE spool SET status = 'draining', claimed_at = ? WHERE id = ?",
+                    [(now, entry_id) for entry_id, _ in claimed]
+                )
+                db.execute('COMMIT')
+                self._in_flight.update(entry_id for entry_id, _ in claimed)
+                return first[0], claimed
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+
+    def _reconcile(self, target, entries):
+        """Find entries whose rows already reached the sheet (e.g. crash after the append).
+        Only entries whose append was sent are candidates, and only rows below the position recorded
+        when it was sent can be theirs, so an earlier identical upload is never mistaken for one."""
+        marks = self._append_marks([entry_id for entry_id, _ in entries])
+        attempted = [(entry_id, data_rows) for entry_id, data_rows in entries if entry_id in marks]
+        if not attempted:
+            return {}
+        client, spreadsheet, worksheet = get_worksheet(target)
+        after_row = min(marks.values())
+        # Far enough to cover these entries plus uploads that landed between them
+        window = sum(len(data_rows) for _, data_rows in attempted) + self.reconcile_window
+        width = max(len(row) for _, data_rows in attempted for row in data_rows)
+        tail = read_rows_below(spreadsheet, worksheet, after_row, width, max_rows=window)
+
+        found, search_from = {}, 0
+        for entry_id, data_rows in attempted:
+            expected = [normalize_sheet_row(row) for row in data_rows]
+            for offset in range(max(search_from, marks[entry_id] - after_row), len(tail) - len(expected) + 1):
+                if tail[offset:offset + len(expected)] == expected:
+                    found[entry_id] = (after_row + 1 + offset, after_row + offset + len(expected))
+                    search_from = offset + len(expected)
+                    break
+        return found
+
+    def drain_once(self):
+        """Replay one batch of spooled entries; returns the number of entries written"""
+        target, entries = self._claim()
+        if not entries:
+            return 0
+        try:
+            with sheets_scheduler.priority('upload'):
+                already_written = self._reconcile(target, entries)
+                for entry_id, (start_row, end_row) in already_written.items():
+                    self.mark_written(entry_id, start_row, end_row)
+                remaining = [(entry_id, rows) for entry_id, rows in entries if entry_id not in already_written]
+                if remaining:
+                    rows = [row for _, data_rows in remaining for row in data_rows]
+                    client, spreadsheet, worksheet = get_worksheet(target)
+                    self.mark_attempted([entry_id for entry_id, _ in remaining], append_positions.mark(spreadsheet, worksheet))
+                    start_row, _ = write_coalescer.submit(target, rows)
+                    for entry_id, data_rows in remaining:
+                        self.mark_written(entry_id, start_row, start_row + len(data_rows) - 1)
+                        start_row += len(data_rows)
+            logger.info(f"📤 Replayed {len(remaining)} spooled {target.upper()} uploads "
+                        f"({len(already_written)} already present in the sheet)")
+            return len(entries)
+        except Exception as e:
+            for entry_id, _ in entries:
+                self.release(entry_id, e)
+            logger.warning(f"⚠️ Spool drain for {target.upper()} failed, will retry: {str(e)}")
+            return 0
+
+    def _drain_loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.drain_once():
+                    continue  # Keep going while there is a backlog
+            except Exception as e:
+                logger.error(f"❌ Spool drainer error: {str(e)}")
+            self._stop.wait(self.drain_interval)
+
+    def start_drainer(self):
+        """Start the background drainer thread for this process"""
+        if self._drainer is None or not self._drainer.is_alive():
+            self._stop.clear()
+            self._drainer = threading.Thread(target=self._drain_loop, name='spool-drainer', daemon=True)
+            self._drainer.start()
+            logger.info(f"🗄️ Upload spool drainer started ({self.path})")
+
+    def stop_drainer(self):
+        self._stop.set()
+        if self._drainer is not None:
+            self._drainer.join(timeout=self.drain_interval + 5)
+
+upload_spool = UploadSpool(
+    config['spool_path'],
+    drain_interval=config['spool_drain_interval'],
+    drain_max_rows=config['spool_drain_max_rows'],
+    claim_timeout=config['spool_claim_timeout'],
+    reconcile_window=config['spool_reconcile_window']
+) if config['spool_enabled'] else None
+
+def iter_csv_rows(text_stream):
+    """Lazily yield cleaned CSV rows from a text stream in a single pass"""
+    for row in csv.reader(text_stream):
+        # Skip blank lines (including whitespace-only ones)
+        if not row or (len(row) == 1 and not row[0].strip()):
+            continue
+        # Clean and strip each cell
+        yield [cell.strip() for cell in row]
+
+def parse_csv_stream(text_stream):
+    """Parse a CSV text stream (file-like object or iterable of lines) into header and data rows"""
     try:
-        # Handle different line endings
-        csv_content = csv_content.replace('\r\n', '\n').replace('\r', '\n')
+        rows = iter_csv_rows(text_stream)
+        header = next(rows, None)
+        data_rows = list(rows)
         
-        # Split into lines and filter empty ones
-        lines = [line.strip() for line in csv_content.split('\n') if line.strip()]
-        
-        if len(lines) <= 1:
+        if header is None or not data_rows:
             raise ValueError("CSV must contain at least header and one data row")
         
-        # Parse each line as CSV
-        parsed_rows = []
-        csv_reader = csv.reader(lines)
-        
-        for row in csv_reader:
-            if row:  # Skip empty rows
-                # Clean and strip each cell
-                cleaned_row = [cell.strip() for cell in row]
-                parsed_rows.append(cleaned_row)
-        
-        # Separate header and data
-        header = parsed_rows[0] if parsed_rows else []
-        data_rows = parsed_rows[1:] if len(parsed_rows) > 1 else []
-        
         logger.info(f"📊 Parsed CSV: {len(data_rows)} data rows, {len(header)} columns")
         return header, data_rows
         
@@ -190,50 +2133,121 @@ def parse_csv_content(csv_content):
         logger.error(f"❌ CSV parsing failed: {str(e)}")
         raise ValueError(f"Invalid CSV format: {str(e)}")
 
-def detect_data_type(csv_content, header=None, data_rows=None):
+CSV_LINE_PATTERN = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$')
+
+def iter_text_lines(text):
+    """Yield lines of a string with their endings, without copying the whole string"""
+    for match in CSV_LINE_PATTERN.finditer(text):
+        yield match.group(0)
+
+def parse_csv_content(csv_content):
+    """Parse CSV content into rows"""
+    return parse_csv_stream(iter_text_lines(csv_content))
+
+def iter_stream_lines(binary_stream, encoding='utf-8-sig', chunk_size=64 * 1024, on_block=None):
+    """Decode a binary stream incrementally and yield its lines; on_block sees each decoded block of whole lines"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    while True:
+        chunk = binary_stream.read(chunk_size)
+        text = pending + decoder.decode(chunk, final=not chunk)
+        if chunk:
+            # Hold back the partial last line until the next chunk completes it
+            cut = text.rfind('\n') + 1
+            block, pending = text[:cut], text[cut:]
+        else:
+            block, pending = text, ''
+        if block:
+            if on_block is not None:
+                on_block(block)
+            yield from iter_text_lines(block)
+        if not chunk:
+            return
+
+# IHL detection keywords, weights and patterns (override with a JSON file via DETECTION_RULES_FILE)
+DEFAULT_DETECTION_RULES = {
+    'keywords': {
+        'ihl': 1, 'sensual': 1, 'sensuelle': 1, 'intimate': 1, 'intimates': 1,
+        'lingerie': 1, 'bra': 1, 'panty': 1, 'panties': 1, 'sleepwear': 1,
+        'nightwear': 1, 'hosiery': 1, 'shapewear': 1, 'bodysuit': 1
+    },
+    'header_weight': 2,  # Header matches are weighted higher
+    'patterns': [
+        {'any': ['sensual', 'sensuelle'], 'score': 5},  # Strong indicator
+        {'all': ['intimate', 'apparel'], 'score': 3}
+    ],
+    'threshold': 3
+}
+
+def load_detection_rules():
+    """Load detection rules, overlaying DETECTION_RULES_FILE on the defaults"""
+    rules = dict(DEFAULT_DETECTION_RULES)
+    rules_file = os.getenv('DETECTION_RULES_FILE')
+    if rules_file:
+        with open(rules_file) as f:
+            overrides = json.load(f)
+        if isinstance(overrides.get('keywords'), list):
+            overrides['keywords'] = {keyword: 1 for keyword in overrides['keywords']}
+        rules.update(overrides)
+        logger.info(f"🔧 Loaded detection rules from {rules_file}")
+    rules['keywords'] = {keyword.lower(): weight for keyword, weight in rules['keywords'].items()}
+    return rules
+
+DETECTION_RULES = load_detection_rules()
+# Every keyword that detection needs a count for, scanned once per upload
+DETECTION_SCAN_KEYWORDS = list(dict.fromkeys(
+    list(DETECTION_RULES['keywords']) +
+    [keyword for pattern in DETECTION_RULES['patterns'] for keyword in pattern.get('any', []) + pattern.get('all', [])]
+))
+
+def count_keywords(text):
+    """Return {keyword: occurrence count} for the detection keywords present in text"""
+    # One C-level str.count per keyword is several times faster than any pure-Python single pass
+    counts = {}
+    for keyword in DETECTION_SCAN_KEYWORDS:
+        count = text.count(keyword)
+        if count:
+            counts[keyword] = count
+    return counts
+
+def detect_data_type(csv_content, header=None, data_rows=None, content_counts=None):
     """Detect if CSV data is IHL or Allura based on content analysis"""
     try:
         # If header and data_rows aren't provided, parse them
         if header is None or data_rows is None:
             header, data_rows = parse_csv_content(csv_content)
         
-        # Convert all content to lowercase for case-insensitive matching
-        content_lower = csv_content.lower()
         header_lower = [col.lower() for col in header] if header else []
+        keyword_weights = DETECTION_RULES['keywords']
         
-        # IHL detection keywords and patterns
-        ihl_indicators = [
-            'ihl', 'sensual', 'sensuelle', 'intimate', 'intimates',
-            'lingerie', 'bra', 'panty', 'panties', 'sleepwear',
-            'nightwear', 'hosiery', 'shapewear', 'bodysuit'
-        ]
-        
-        # Check content for IHL indicators
-        ihl_score = 0
-        for indicator in ihl_indicators:
-            if indicator in content_lower:
-                ihl_score += content_lower.count(indicator)
+        # Count each keyword once (case-insensitively); pattern checks below reuse these counts instead of rescanning.
+        # Streamed uploads pass the counts gathered while they were parsed.
+        if content_counts is None:
+            content_counts = count_keywords(csv_content.lower())
+        ihl_score = sum(count * keyword_weights[keyword]
+                        for keyword, count in content_counts.items() if keyword in keyword_weights)
         
         # Check header columns for IHL-specific terms
         header_ihl_score = 0
         for col in header_lower:
-            for indicator in ihl_indicators:
-                if indicator in col:
-                    header_ihl_score += 2  # Header matches are weighted higher
+            for keyword in keyword_weights:
+                if keyword in col:
+                    header_ihl_score += DETECTION_RULES['header_weight']
         
         total_ihl_score = ihl_score + header_ihl_score
         
         # Additional pattern checks
         pattern_score = 0
-        if 'sensual' in content_lower or 'sensuelle' in content_lower:
-            pattern_score += 5  # Strong indicator
-        if 'intimate' in content_lower and 'apparel' in content_lower:
-            pattern_score += 3
+        for pattern in DETECTION_RULES['patterns']:
+            if pattern.get('any') and any(keyword in content_counts for keyword in pattern['any']):
+                pattern_score += pattern['score']
+            elif pattern.get('all') and all(keyword in content_counts for keyword in pattern['all']):
+                pattern_score += pattern['score']
         
         total_score = total_ihl_score + pattern_score
         
-        # Decision logic: if score >= 3, likely IHL data
-        is_ihl = total_score >= 3
+        # Decision logic: if score >= threshold (3 by default), likely IHL data
+        is_ihl = total_score >= DETECTION_RULES['threshold']
         
         detected_type = 'ihl' if is_ihl else 'allura'
         
@@ -247,27 +2261,216 @@ def detect_data_type(csv_content, header=None, data_rows=None):
         logger.warning(f"⚠️ Data type detection failed, defaulting to Allura: {str(e)}")
         return 'allura', 0
 
+class StartupTracker:
+    """Cold-start timings for this process: module import, warm-up and the first successful upload"""
+
+    def __init__(self, started):
+        self.started = started
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+        self._stats = {
+            'import_seconds': None,
+            'warmup_seconds': None,
+            'warmup_attempts': 0,
+            'warmup_error': None,
+            'ready_seconds': None,
+            'first_upload_seconds': None,
+            'ready': False
+        }
+
+    def _since_start(self):
+        return round(time.perf_counter() - self.started, 3)
+
+    def mark_imported(self):
+        with self._lock:
+            self._stats['import_seconds'] = self._since_start()
+        logger.info(f"⚡ Service module loaded in {self._stats['import_seconds'] * 1000:.0f} ms")
+
+    def mark_ready(self, warmup_seconds=None):
+        with self._lock:
+            self._stats['ready'] = True
+            self._stats['warmup_seconds'] = round(warmup_seconds, 3) if warmup_seconds is not None else None
+            self._stats['warmup_error'] = None
+            self._stats['ready_seconds'] = self._since_start()
+
+    def record_warmup_failure(self, error):
+        with self._lock:
+            self._stats['warmup_error'] = str(error)
+
+    def record_first_upload(self):
+        """Note when the first rows reach a sheet; later calls are ignored"""
+        with self._lock:
+            if self._stats['first_upload_seconds'] is not None:
+                return
+            self._stats['first_upload_seconds'] = self._since_start()
+        logger.info(f"⚡ First upload written {self._stats['first_upload_seconds']:.2f}s after startup")
+
+    def start_warm_up(self, target):
+        """Run target in a background thread once per process"""
+        with self._lock:
+            if self._warmup_thread is not None or self._stats['ready']:
+                return
+            self._warmup_thread = threading.Thread(target=target, name='warm-up', daemon=True)
+        self._warmup_thread.start()
+
+    def reset(self):
+        """Forget readiness so a forked worker warms up its own client"""
+        with self._lock:
+            self._warmup_thread = None
+            self._stats.update(ready=False, warmup_seconds=None, warmup_attempts=0, warmup_error=None, ready_seconds=None)
+
+    def count_warmup_attempt(self):
+        with self._lock:
+            self._stats['warmup_attempts'] += 1
+
+    def ready(self):
+        with self._lock:
+            return self._stats['ready']
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+startup_tracker = StartupTracker(MODULE_LOAD_STARTED)
+
+def warm_up():
+    """Authorize the client and open every target worksheet (and its mirror) before traffic needs them"""
+    started = time.perf_counter()
+    get_sheets_client()
+    for name in SHEET_TARGETS:
+        client, spreadsheet, worksheet = get_worksheet(name)
+        sheet_mirrors.sync(name, spreadsheet, worksheet)
+    return time.perf_counter() - started
+
+def run_warm_up():
+    """Warm up in the background, retrying with capped backoff until it succeeds"""
+    delay = 1
+    while True:
+        startup_tracker.count_warmup_attempt()
+        try:
+            seconds = warm_up()
+        except Exception as e:
+            startup_tracker.record_warmup_failure(e)
+            logger.warning(f"⚠️ Warm-up failed, retrying in {delay}s: {str(e)}")
+            time.sleep(delay)
+            delay = min(delay * 2, config['warmup_retry_max'])
+            continue
+        startup_tracker.mark_ready(seconds)
+        logger.info(f"🔥 Warm-up finished in {seconds:.2f}s: client authorized, {len(SHEET_TARGETS)} worksheets opened")
+        return
+
+def start_warm_up():
+    """Begin warm-up for this process, or report ready straight away when it is disabled"""
+    if config['warmup_enabled']:
+        startup_tracker.start_warm_up(run_warm_up)
+    else:
+        startup_tracker.mark_ready()
+
+def initialize_worker():
+    """Per-process setup for server workers: fresh client and handles, warmed up in the background"""
+    sheets_client_manager.reset()
+    worksheet_registry.invalidate()
+    startup_tracker.reset()
+    start_warm_up()
+    if upload_spool is not None:
+        # Replays anything left over from a previous run
+        upload_spool.start_drainer()
+
+def shutdown_service():
+    """Drain in-flight background writes before the process exits"""
+    logger.info("🛑 Draining queued upload jobs before shutdown")
+    upload_job_manager.shutdown()
+    if upload_spool is not None:
+        upload_spool.stop_drainer()
+    logger.info("✅ Upload jobs drained")
+
+def target_config(name):
+    """Public view of one target's configuration"""
+    target = SHEET_TARGETS[name]
+    return {
+        'label': target['label'],
+        'spreadsheet_id': target['spreadsheet_id'],
+        'sheet_name': target['sheet_name']
+    }
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count and time every request per endpoint and target"""
+    if metrics.enabled and 'request_started' in g:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        target = g.get('metrics_target', '')
+        metrics.observe('sheets_service_http_request_duration_seconds', time.perf_counter() - g.request_started,
+                        endpoint=endpoint, method=request.method, target=target)
+        metrics.inc('sheets_service_http_requests_total', endpoint=endpoint, method=request.method,
+                    target=target, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint: request/stage/API histograms plus component gauges"""
+    components = {
+        'client': sheets_client_manager.stats(),
+        'scheduler': sheets_scheduler.stats(),
+        'worksheet_cache': worksheet_registry.stats(),
+        'write_queue': write_coalescer.stats(),
+        'chunked_writes': chunked_writer.stats(),
+        'upload_jobs': upload_job_manager.stats(),
+        'idempotency': idempotency_index.stats(),
+        'startup': startup_tracker.stats(),
+        'mirror': sheet_mirrors.stats(),
+        'spool': upload_spool.stats() if upload_spool is not None else {}
+    }
+    gauges = [
+        (f'sheets_service_{component}_{key}', value, {})
+        for component, stats in components.items()
+        for key, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+    return metrics.render(gauges), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 until the client is authorized and the target worksheets are open"""
+    start_warm_up()
+    ready = startup_tracker.ready()
+    return jsonify({
+        'ready': ready,
+        'startup': startup_tracker.stats(),
+        'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'service': 'Google Sheets BOL Processor',
-        'allura_config': {
-            'spreadsheet_id': SPREADSHEET_ID,
-            'sheet_name': SHEET_NAME
-        },
-        'ihl_config': {
-            'spreadsheet_id': IHL_SPREADSHEET_ID,
-            'sheet_name': IHL_SHEET_NAME
-        },
+        'allura_config': target_config('allura'),
+        'ihl_config': target_config('ihl'),
+        'targets': {name: target_config(name) for name in SHEET_TARGETS},
+        'client_stats': sheets_client_manager.stats(),
+        'scheduler_stats': sheets_scheduler.stats(),
+        'worksheet_cache_stats': worksheet_registry.stats(),
+        'write_queue_stats': write_coalescer.stats(),
+        'chunked_write_stats': chunked_writer.stats(),
+        'upload_jobs': upload_job_manager.stats(),
+        'idempotency_stats': idempotency_index.stats(),
+        'mirror_stats': sheet_mirrors.stats(),
+        'startup': startup_tracker.stats(),
+        'spool': upload_spool.stats() if upload_spool is not None else None,
         'timestamp': datetime.now().isoformat()
     })
 
 def test_connection_generic(data_type='allura'):
     """Generic function to test Google Sheets connection"""
+    g.metrics_target = worksheet_registry.resolve(data_type)
     try:
-        client, spreadsheet, worksheet = get_worksheet(data_type)
+        with sheets_scheduler.priority('probe'):
+            spreadsheet, worksheet, summary = get_sheet_summary(data_type)
         
         # Get basic sheet info
         sheet_info = {
@@ -275,7 +2478,7 @@ def test_connection_generic(data_type='allura'):
             'sheet_name': worksheet.title,
             'row_count': worksheet.row_count,
             'col_count': worksheet.col_count,
-            'last_row_with_data': len(worksheet.get_all_values()),
+            'last_row_with_data': summary['total_rows'],
             'data_type': data_type.upper()
         }
         
@@ -289,6 +2492,7 @@ def test_connection_generic(data_type='allura'):
         
     except Exception as e:
         logger.error(f"❌ {data_type.upper()} Google Sheets connection test failed: {str(e)}")
+        invalidate_on_stale_handle(data_type, e)
         return jsonify({
             'success': False,
             'error': str(e),
@@ -306,30 +2510,338 @@ def test_connection_ihl():
     """Test IHL Google Sheets connection"""
     return test_connection_generic('ihl')
 
+def is_async_request():
+    """Check whether the client asked for the upload to be queued (?async=1 or Prefer: respond-async)"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '').lower()
+
+class UploadPayload:
+    """CSV upload decoded and parsed once per request, shared by detection, validation and writing.
+    Holds either the csvContent string of a JSON upload or the binary stream of a raw/multipart one."""
+
+    def __init__(self, csv_content=None, stream=None, encoding='utf-8-sig', source='json'):
+        self.csv_content = csv_content
+        self.stream = stream
+        self.encoding = encoding
+        self.source = source
+        self.header = None
+        self.data_rows = None
+        self.parse_error = None
+        self.content_counts = None
+        self.timings = {}
+
+    def describe(self):
+        """Short description of the upload for log lines"""
+        if self.csv_content is not None:
+            return f'{len(self.csv_content)} characters'
+        return f'{self.source} stream'
+
+    def _count_block(self, block):
+        for keyword, count in count_keywords(block.lower()).items():
+            self.content_counts[keyword] = self.content_counts.get(keyword, 0) + count
+
+    def parse(self):
+        """Parse the CSV on first use and return (header, data_rows)"""
+        if self.parse_error is not None:
+            raise self.parse_error
+        if self.data_rows is None:
+            with self.timed('parse'):
+                try:
+                    if self.csv_content is not None:
+                        self.header, self.data_rows = parse_csv_content(self.csv_content)
+                    else:
+                        # Keywords are tallied block by block so detection never needs the whole text
+                        self.content_counts = {}
+                        lines = iter_stream_lines(self.stream, self.encoding, on_block=self._count_block)
+                        self.header, self.data_rows = parse_csv_stream(lines)
+                except ValueError as ve:
+                    self.parse_error = ve
+                    raise
+        return self.header, self.data_rows
+
+    def keyword_counts(self):
+        """Detection keyword counts over the whole upload (call after parse())"""
+        if self.content_counts is None:
+            self.content_counts = count_keywords(self.csv_content.lower())
+        return self.content_counts
+
+    @contextmanager
+    def timed(self, stage):
+        """Record how long a pipeline stage took, in milliseconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+
+CSV_MIMETYPES = ('text/csv', 'application/csv')
+
+def get_upload_payload():
+    """Decode the upload body once per request; returns (payload, error_response)"""
+    if 'upload_payload' in g:
+        return g.upload_payload, None
+    
+    started = time.perf_counter()
+    if request.mimetype in CSV_MIMETYPES or request.mimetype == 'multipart/form-data':
+        payload, error_response = get_streamed_upload_payload()
+        if error_response:
+            return None, error_response
+        payload.timings['decode'] = round((time.perf_counter() - started) * 1000, 2)
+        g.upload_payload = payload
+        return payload, None
+    
+    data = request.get_json(silent=True)
+    
+    if not isinstance(data, dict) or 'csvContent' not in data:
+        return None, (jsonify({
+            'success': False,
+            'error': 'No CSV content provided'
+        }), 400)
+    
+    csv_content = data['csvContent']
+    
+    if not csv_content or not csv_content.strip():
+        return None, (jsonify({
+            'success': False,
+            'error': 'Empty CSV content'
+        }), 400)
+    
+    payload = UploadPayload(csv_content)
+    payload.timings['decode'] = round((time.perf_counter() - started) * 1000, 2)
+    g.upload_payload = payload
+    return payload, None
+
+def get_streamed_upload_payload():
+    """Wrap a raw text/csv body or a multipart file part for streaming parse; returns (payload, error_response)"""
+    if request.mimetype == 'multipart/form-data':
+        # Werkzeug spools large parts to a temporary file rather than holding them in memory
+        upload = request.files.get('file') or next(iter(request.files.values()), None)
+        if upload is None:
+            return None, (jsonify({
+                'success': False,
+                'error': 'No CSV file provided (expected a multipart file field named "file")'
+            }), 400)
+        encoding = upload.mimetype_params.get('charset', 'utf-8-sig')
+        return UploadPayload(stream=upload.stream, encoding=encoding, source=f"multipart file '{upload.filename}'"), None
+    
+    encoding = request.mimetype_params.get('charset', 'utf-8-sig')
+    return UploadPayload(stream=request.stream, encoding=encoding, source=request.mimetype), None
+
+def write_rows(data_type, data_rows, resume_key=None):
+    """Write parsed data rows to the target sheet and return the upload result.
+    resume_key (the upload's idempotency key) lets a retry finish a partially failed chunked write."""
+    if upload_spool is not None:
+        return write_rows_spooled(data_type, data_rows, resume_key)
+    
+    with sheets_scheduler.priority('upload'):
+        # Connect to appropriate Google Sheet
+        client, spreadsheet, worksheet = get_worksheet(data_type)
+        
+        # Append after the last row without downloading the sheet, batched with concurrent uploads
+        # SHIFT DATA ONE COLUMN TO THE RIGHT - START AT COLUMN B INSTEAD OF A
+        logger.info(f"📍 Appending {len(data_rows)} rows starting at column B")
+        start_row, end_row = write_coalescer.submit(data_type, data_rows, resume_key)
+    logger.info(f"📊 Wrote rows {start_row}-{end_row}")
+    
+    logger.info(f"✅ Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets")
+    
+    return {
+        'success': True,
+        'message': f'Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets',
+        'rowsAdded': len(data_rows),
+        'startRow': start_row,
+        'endRow': end_row,
+        'sheetName': worksheet.title,
+        'spreadsheetId': spreadsheet.id,
+        'dataType': data_type.upper(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def write_rows_spooled(data_type, data_rows, resume_key=None):
+    """Record rows in the durable spool, then write them; transient failures are left to the drainer"""
+    target = worksheet_registry.resolve(data_type)
+    entry_id = upload_spool.record(target, data_rows)
+    upload_spool.start_drainer()
+    try:
+        with sheets_scheduler.priority('upload'):
+            client, spreadsheet, worksheet = get_worksheet(data_type)
+            upload_spool.mark_attempted([entry_id], append_positions.mark(spreadsheet, worksheet))
+            start_row, end_row = write_coalescer.submit(data_type, data_rows, resume_key)
+    except Exception as e:
+        # The drainer checks the sheet before writing an entry whose append may have landed
+        if not is_transient_error(e) and not isinstance(e, AppendOutcomeUnknown):
+            upload_spool.mark_failed(entry_id, e)
+            raise
+        upload_spool.release(entry_id, e)
+        logger.warning(f"🗄️ Sheets unavailable, spooled {len(data_rows)} {data_type.upper()} rows as entry {entry_id}: {str(e)}")
+        return {
+            'success': True,
+            'spooled': True,
+            'message': f'Google Sheets is unavailable; {len(data_rows)} rows were accepted and will be written to {data_type.upper()} Google Sheets when it recovers',
+            'rowsAccepted': len(data_rows),
+            'spoolId': entry_id,
+            'statusUrl': f'/spool/{entry_id}',
+            'dataType': data_type.upper(),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    upload_spool.mark_written(entry_id, start_row, end_row)
+    logger.info(f"✅ Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets (rows {start_row}-{end_row})")
+    return {
+        'success': True,
+        'message': f'Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets',
+        'rowsAdded': len(data_rows),
+        'startRow': start_row,
+        'endRow': end_row,
+        'sheetName': worksheet.title,
+        'spreadsheetId': spreadsheet.id,
+        'dataType': data_type.upper(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+class IdempotencyIndex:
+    """Bounded, expiring index of recent upload keys mapped to their results"""
+
+    def __init__(self, max_entries=10000, ttl=86400, replayable=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.replayable = replayable  # replayable(result) -> False once a remembered result turns out to have failed
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired_failures': 0
+        }
+
+    def run(self, key, perform):
+        """Return (result, status, duplicate); perform() runs at most once per key while its result is kept"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry['done'].is_set() and time.monotonic() - entry['stored_at'] > self.ttl:
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    entry = {'done': threading.Event(), 'outcome': None, 'stored_at': time.monotonic()}
+                    self._entries[key] = entry
+                    self._stats['misses'] += 1
+                    is_owner = True
+                else:
+                    self._entries.move_to_end(key)
+                    is_owner = False
+            
+            if not is_owner:
+                # A concurrent retry waits for the original request instead of writing again
+                entry['done'].wait()
+                if entry['outcome'] is None:
+                    continue  # The original failed; try again as the owner
+                if self.replayable is not None and not self.replayable(entry['outcome'][0]):
+                    # Accepted at the time (e.g. a queued job) but failed since: forget it and write again
+                    self._forget(key, entry)
+                    with self._lock:
+                        self._stats['expired_failures'] += 1
+                    continue
+                with self._lock:
+                    self._stats['hits'] += 1
+                result, status = entry['outcome']
+                return result, status, True
+            
+            try:
+                result, status = perform()
+            except Exception:
+                self._forget(key, entry)
+                raise
+            if status >= 400:
+                self._forget(key, entry)
+                return result, status, False
+            with self._lock:
+                entry['outcome'] = (result, status)
+                entry['stored_at'] = time.monotonic()
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            entry['done'].set()
+            return result, status, False
+
+    def _forget(self, key, entry):
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry['done'].set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            return stats
+
+def upload_result_replayable(result):
+    """Whether a remembered upload result still stands: its queued job or spooled rows have not failed since"""
+    spool_id = result.get('spoolId')
+    if result.get('jobId'):
+        job = upload_job_manager.get(result['jobId'])
+        if job is not None:
+            if job['status'] == 'failed':
+                return False
+            spool_id = spool_id or job.get('spoolId')
+    if spool_id is not None and upload_spool is not None:
+        entry = upload_spool.get(spool_id)
+        if entry is not None and entry['status'] == 'failed':
+            return False
+    return True
+
+idempotency_index = IdempotencyIndex(
+    max_entries=config['idempotency_cache_size'],
+    ttl=config['idempotency_ttl'],
+    replayable=upload_result_replayable
+)
+
+def upload_idempotency_key(data_type, data_rows):
+    """Client-supplied Idempotency-Key, else a hash of the target and normalized rows (None if disabled)"""
+    target = worksheet_registry.resolve(data_type)
+    if request.mimetype == 'multipart/form-data':
+        body_key = request.form.get('idempotencyKey')
+    else:
+        body_key = (request.get_json(silent=True) or {}).get('idempotencyKey')
+    client_key = request.headers.get('Idempotency-Key') or body_key
+    if client_key:
+        return f'{target}:key:{client_key}'
+    if not config['idempotency_hash_content']:
+        return None
+    digest = hashlib.sha256(json.dumps(data_rows, separators=(',', ':')).encode('utf-8')).hexdigest()
+    return f'{target}:sha256:{digest}'
+
+def perform_upload(data_type, data_rows, queued=False, resume_key=None):
+    """Queue (queued=True) or write the rows; returns (result, status)"""
+    if queued:
+        job_id = upload_job_manager.submit(data_type, data_rows, resume_key)
+        return {
+            'success': True,
+            'message': f'Queued {len(data_rows)} rows for {data_type.upper()} Google Sheets',
+            'jobId': job_id,
+            'statusUrl': f'/jobs/{job_id}',
+            'rowsQueued': len(data_rows),
+            'dataType': data_type.upper(),
+            'timestamp': datetime.now().isoformat()
+        }, 202
+    
+    result = write_rows(data_type, data_rows, resume_key)
+    return result, 202 if result.get('spooled') else 200
+
 def upload_csv_generic(data_type='allura'):
     """Generic function to upload CSV data to Google Sheets"""
+    g.metrics_target = worksheet_registry.resolve(data_type)
     try:
-        # Get CSV content from request
-        data = request.get_json()
+        # Get CSV content from request (decoded once, shared with /upload-csv detection)
+        payload, error_response = get_upload_payload()
+        if error_response:
+            return error_response
         
-        if not data or 'csvContent' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'No CSV content provided'
-            }), 400
-        
-        csv_content = data['csvContent']
-        
-        if not csv_content or not csv_content.strip():
-            return jsonify({
-                'success': False,
-                'error': 'Empty CSV content'
-            }), 400
-        
-        logger.info(f"📥 Received {data_type.upper()} CSV upload request ({len(csv_content)} characters)")
+        logger.info(f"📥 Received {data_type.upper()} CSV upload request ({payload.describe()})")
         
-        # Parse CSV content
-        header, data_rows = parse_csv_content(csv_content)
+        # Parse CSV content (reuses the rows parsed for detection, if any)
+        header, data_rows = payload.parse()
         
         if not data_rows:
             return jsonify({
@@ -337,44 +2849,22 @@ def upload_csv_generic(data_type='allura'):
                 'error': 'No data rows to add'
             }), 400
         
-        # Connect to appropriate Google Sheet
-        client, spreadsheet, worksheet = get_worksheet(data_type)
-        
-        # Find next empty row
-        all_values = worksheet.get_all_values()
-        last_row = len(all_values)
-        start_row = last_row + 1
-        
-        # Add data to sheet (skip header - assume it already exists)
-        logger.info(f"📍 Adding {len(data_rows)} rows starting at row {start_row}")
-        
-        # Determine the correct column range based on actual data width
-        # SHIFT DATA ONE COLUMN TO THE RIGHT - START AT COLUMN B INSTEAD OF A
-        max_columns = max(len(row) for row in data_rows) if data_rows else 1
-        start_column = "B"  # Changed from "A" to "B"
-        end_column = column_number_to_letter(max_columns + 1)  # Add 1 to account for B start
-        
-        # Batch update for better performance with dynamic range
-        cell_range = f"{start_column}{start_row}:{end_column}{start_row + len(data_rows) - 1}"
-        logger.info(f"📊 Writing to range: {cell_range} (for {max_columns} columns, shifted to start at B)")
-        
-        worksheet.update(cell_range, data_rows)
-        
-        end_row = start_row + len(data_rows) - 1
-        
-        logger.info(f"✅ Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets")
-        
-        return jsonify({
-            'success': True,
-            'message': f'Successfully added {len(data_rows)} rows to {data_type.upper()} Google Sheets',
-            'rowsAdded': len(data_rows),
-            'startRow': start_row,
-            'endRow': end_row,
-            'sheetName': worksheet.title,
-            'spreadsheetId': spreadsheet.id,
-            'dataType': data_type.upper(),
-            'timestamp': datetime.now().isoformat()
-        })
+        idempotency_key = upload_idempotency_key(data_type, data_rows)
+        with payload.timed('write'):
+            if idempotency_key is None:
+                result, status = perform_upload(data_type, data_rows, is_async_request())
+            else:
+                queued = is_async_request()
+                result, status, duplicate = idempotency_index.run(
+                    idempotency_key, lambda: perform_upload(data_type, data_rows, queued, idempotency_key)
+                )
+                if duplicate:
+                    logger.info(f"♻️ Duplicate {data_type.upper()} upload, returning the original result without writing")
+                    result = dict(result, duplicate=True)
+        logger.info(f"⏱️ {data_type.upper()} upload stage timings (ms): {payload.timings}")
+        for stage, elapsed_ms in payload.timings.items():
+            metrics.observe('sheets_service_stage_duration_seconds', elapsed_ms / 1000, stage=stage, target=g.metrics_target)
+        return jsonify(result), status
         
     except ValueError as ve:
         logger.error(f"❌ {data_type.upper()} validation error: {str(ve)}")
@@ -384,9 +2874,22 @@ def upload_csv_generic(data_type='allura'):
             'dataType': data_type.upper(),
             'timestamp': datetime.now().isoformat()
         }), 400
-        
+
+    except ChunkedWriteError as e:
+        logger.error(f"❌ {data_type.upper()} upload partially failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Upload failed: {str(e)}',
+            'resumable': e.resumable,
+            'writtenRanges': [f'{first}-{last}' for first, last in e.written_ranges],
+            'failedRanges': [f'{first}-{last}' for first, last in e.failed_ranges],
+            'dataType': data_type.upper(),
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
     except Exception as e:
         logger.error(f"❌ {data_type.upper()} upload failed: {str(e)}")
+        invalidate_on_stale_handle(data_type, e)
         return jsonify({
             'success': False,
             'error': f'Upload failed: {str(e)}',
@@ -399,24 +2902,16 @@ def upload_csv():
     """Upload CSV data with automatic data type detection and routing"""
     try:
         # Get CSV content from request for detection
-        data = request.get_json()
-        
-        if not data or 'csvContent' not in data:
-            return jsonify({
-                'success': False,
-                'error': 'No CSV content provided'
-            }), 400
+        payload, error_response = get_upload_payload()
+        if error_response:
+            return error_response
         
-        csv_content = data['csvContent']
-        
-        if not csv_content or not csv_content.strip():
-            return jsonify({
-                'success': False,
-                'error': 'Empty CSV content'
-            }), 400
-        
-        # Detect data type automatically
-        detected_type, detection_score = detect_data_type(csv_content)
+        # Detect data type automatically from the rows parsed once for the whole request
+        header, data_rows = payload.parse()
+        with payload.timed('detect'):
+            detected_type, detection_score = detect_data_type(
+                payload.csv_content, header, data_rows, payload.keyword_counts()
+            )
         
         logger.info(f"🎯 Auto-routing to {detected_type.upper()} endpoint (detection score: {detection_score})")
         
@@ -439,25 +2934,179 @@ def upload_csv_ihl():
     """Upload CSV data to IHL Google Sheets (explicit)"""
     return upload_csv_generic('ihl')
 
+@app.route('/upload-csv-bulk', methods=['POST'])
+def upload_csv_bulk():
+    """Upload many CSV documents in one request, routing each to its detected sheet"""
+    try:
+        documents, error_response = read_bulk_documents()
+        if error_response:
+            return error_response
+        
+        logger.info(f"📥 Received bulk CSV upload request ({len(documents)} files)")
+        file_results = []
+        groups = OrderedDict()  # data_type -> [(file_result, data_rows)]
+        for name, payload, data_type in documents:
+            file_result = {'name': name}
+            file_results.append(file_result)
+            try:
+                header, data_rows = payload.parse()
+                if data_type is None:
+                    data_type, _ = detect_data_type(payload.csv_content, header, data_rows, payload.keyword_counts())
+                elif data_type.lower() not in SHEET_TARGETS:
+                    raise ValueError(f'Unknown dataType: {data_type}')
+            except ValueError as ve:
+                file_result.update(success=False, error=str(ve))
+                continue
+            data_type = data_type.lower()
+            file_result.update(dataType=data_type.upper(), rowCount=len(data_rows))
+            groups.setdefault(data_type, []).append((file_result, data_rows))
+        
+        # One batched append per target sheet, with the targets written in parallel
+        queued = is_async_request()
+        group_outcomes = {}
+        if groups:
+            with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+                futures = {}
+                for data_type, members in groups.items():
+                    rows = [row for _, data_rows in members for row in data_rows]
+                    idempotency_key = upload_idempotency_key(data_type, rows)
+                    futures[data_type] = executor.submit(write_bulk_group, data_type, rows, idempotency_key, queued)
+                for data_type, future in futures.items():
+                    try:
+                        group_outcomes[data_type] = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Bulk {data_type.upper()} write failed: {str(e)}")
+                        invalidate_on_stale_handle(data_type, e)
+                        group_outcomes[data_type] = ({'success': False, 'error': f'Upload failed: {str(e)}'}, 500)
+        
+        for data_type, members in groups.items():
+            result, status = group_outcomes[data_type]
+            offset = 0
+            for file_result, data_rows in members:
+                if status >= 400:
+                    file_result.update(success=False, error=result.get('error'))
+                elif 'startRow' in result:
+                    start_row = result['startRow'] + offset
+                    file_result.update(success=True, startRow=start_row, endRow=start_row + len(data_rows) - 1,
+                                       sheetName=result['sheetName'])
+                else:
+                    # Queued as a job or held in the spool; the group's status URL covers every file in it
+                    file_result.update(success=True, statusUrl=result.get('statusUrl'))
+                offset += len(data_rows)
+        
+        failed = sum(1 for file_result in file_results if not file_result['success'])
+        if not failed:
+            status = 202 if any(status == 202 for _, status in group_outcomes.values()) else 200
+        elif failed < len(file_results):
+            status = 207
+        else:
+            status = 500 if group_outcomes else 400
+        
+        logger.info(f"✅ Bulk upload finished: {len(file_results) - failed}/{len(file_results)} files across {len(groups)} sheets")
+        return jsonify({
+            'success': not failed,
+            'message': f'Processed {len(file_results)} files into {len(groups)} sheets ({failed} failed)',
+            'files': file_results,
+            'targets': {data_type.upper(): result for data_type, (result, _) in group_outcomes.items()},
+            'timestamp': datetime.now().isoformat()
+        }), status
+        
+    except Exception as e:
+        logger.error(f"❌ Bulk upload failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Bulk upload failed: {str(e)}',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+def read_bulk_documents():
+    """Collect (name, UploadPayload, dataType or None) for each CSV in a bulk request; returns (documents, error_response)"""
+    documents = []
+    if request.mimetype == 'multipart/form-data':
+        for field, upload in request.files.items(multi=True):
+            encoding = upload.mimetype_params.get('charset', 'utf-8-sig')
+            payload = UploadPayload(stream=upload.stream, encoding=encoding, source=f"multipart file '{upload.filename}'")
+            documents.append((upload.filename or field, payload, None))
+    else:
+        # Bodies that are not JSON (or not the expected shape) fall through to the 400 below
+        data = request.get_json(silent=True)
+        files = data.get('files') if isinstance(data, dict) else None
+        for index, item in enumerate(files if isinstance(files, list) else []):
+            if isinstance(item, dict):
+                documents.append((item.get('name') or f'file-{index + 1}', UploadPayload(item.get('csvContent') or ''), item.get('dataType')))
+    
+    if not documents:
+        return None, (jsonify({
+            'success': False,
+            'error': 'No CSV files provided (send {"files": [{"name", "csvContent"}]} or multipart file parts)'
+        }), 400)
+    return documents, None
+
+def write_bulk_group(data_type, rows, idempotency_key, queued):
+    """Write one target's combined bulk rows; returns (result, status)"""
+    if idempotency_key is None:
+        return perform_upload(data_type, rows, queued)
+    result, status, duplicate = idempotency_index.run(
+        idempotency_key, lambda: perform_upload(data_type, rows, queued, idempotency_key)
+    )
+    return (dict(result, duplicate=True) if duplicate else result), status
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status of an async upload job"""
+    job = upload_job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown job ID: {job_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    
+    if job['status'] == 'spooled' and upload_spool is not None:
+        # Follow the rows into the spool: pending until the drainer writes them
+        job['spool'] = upload_spool.get(job['spoolId'])
+    
+    return jsonify({
+        'success': job['status'] != 'failed',
+        'job': job,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/spool/<int:entry_id>', methods=['GET'])
+def get_spool_entry(entry_id):
+    """Get the status of a spooled upload"""
+    entry = upload_spool.get(entry_id) if upload_spool is not None else None
+    if entry is None:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown spool entry: {entry_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    
+    return jsonify({
+        'success': entry['status'] != 'failed',
+        'entry': entry,
+        'timestamp': datetime.now().isoformat()
+    })
+
 def get_sheet_info_generic(data_type='allura'):
     """Generic function to get information about the target sheet"""
+    g.metrics_target = worksheet_registry.resolve(data_type)
     try:
-        client, spreadsheet, worksheet = get_worksheet(data_type)
-        
-        # Get sheet data
-        all_values = worksheet.get_all_values()
-        header = all_values[0] if all_values else []
-        data_rows = all_values[1:] if len(all_values) > 1 else []
+        # Get header, row count and the last 5 rows without downloading the sheet
+        with sheets_scheduler.priority('probe'):
+            spreadsheet, worksheet, summary = get_sheet_summary(data_type, tail_rows=5)
+        header = summary['header']
         
         sheet_info = {
             'spreadsheet_title': spreadsheet.title,
             'spreadsheet_id': spreadsheet.id,
             'sheet_name': worksheet.title,
-            'total_rows': len(all_values),
-            'data_rows': len(data_rows),
+            'total_rows': summary['total_rows'],
+            'data_rows': max(summary['total_rows'] - 1, 0),
             'columns': len(header),
             'header': header,
-            'last_5_rows': data_rows[-5:] if len(data_rows) >= 5 else data_rows,
+            'last_5_rows': summary['last_rows'],
             'data_type': data_type.upper()
         }
         
@@ -469,6 +3118,7 @@ def get_sheet_info_generic(data_type='allura'):
         
     except Exception as e:
         logger.error(f"❌ Failed to get {data_type.upper()} sheet info: {str(e)}")
+        invalidate_on_stale_handle(data_type, e)
         return jsonify({
             'success': False,
             'error': str(e),
@@ -486,19 +3136,206 @@ def get_sheet_info_ihl():
     """Get information about the IHL target sheet"""
     return get_sheet_info_generic('ihl')
 
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+
+class SheetPageReader:
+    """Reads a worksheet in bounded row ranges, from its mirror when one is kept and otherwise from the API"""
+
+    def __init__(self, data_type, spreadsheet, worksheet):
+        self.spreadsheet = spreadsheet
+        self.worksheet = worksheet
+        self.target = worksheet_registry.resolve(data_type)
+        self.mirror = sheet_mirrors.sync(data_type, spreadsheet, worksheet)
+        # The API rejects reads past the grid
+        self.last_row = len(self.mirror.rows) if self.mirror is not None else grid_row_count(spreadsheet, worksheet)
+
+    def read(self, first_row, last_row):
+        """Rows first_row..last_row (1-based, inclusive) as the API returns them, trailing empty rows trimmed"""
+        if self.mirror is not None:
+            with self.mirror.lock:
+                if self.mirror.rows is not None:
+                    return [list(row) for row in self.mirror.rows[first_row - 1:last_row]]
+            self.mirror = None  # Invalidated mid-export; carry on from the API
+        page_range = gspread.utils.absolute_range_name(self.worksheet.title, f'{first_row}:{last_row}')
+        with sheets_scheduler.priority('maintenance'):
+            with metrics.time('sheets_service_stage_duration_seconds', stage='export_page', target=self.target):
+                return self.spreadsheet.values_get(page_range).get('values', [])
+
+def export_keys(header, width):
+    """NDJSON field names: the header text, or the column letter where it is blank, repeated or missing"""
+    keys, seen = [], set()
+    for index in range(width):
+        name = str(header[index]).strip() if index < len(header) else ''
+        if not name or name in seen:
+            name = column_number_to_letter(index + 1)
+        seen.add(name)
+        keys.append(name)
+    return keys
+
+def format_export_rows(rows, header, export_format):
+    """Render (row_number, values) pairs as CSV lines or NDJSON objects"""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(values for _, values in rows)
+        return buffer.getvalue()
+    return ''.join(
+        json.dumps({'row': row_number, 'values': dict(zip(export_keys(header, len(values)), values))},
+                   ensure_ascii=False) + '\n'
+        for row_number, values in rows
+    )
+
+def iter_export(reader, header, first_row, last_row, page_size, export_format, label):
+    """Yield the export one page at a time. CSV keeps blank rows so line N is still sheet row N, but
+    holds them back until data follows, so the output never ends in blank lines"""
+    if export_format == 'csv':
+        yield format_export_rows([(1, header)], header, export_format)
+    row_number, pending_blank, exported = first_row, 0, 0
+    try:
+        while row_number <= last_row:
+            page_end = min(row_number + page_size - 1, last_row)
+            values = reader.read(row_number, page_end)
+            rows = []
+            for offset, row in enumerate(values):
+                if not any(cell != '' for cell in row):
+                    pending_blank += 1
+                    continue
+                if export_format == 'csv':
+                    rows.extend((None, []) for _ in range(pending_blank))
+                pending_blank = 0
+                rows.append((row_number + offset, row))
+            pending_blank += page_end - row_number + 1 - len(values)
+            if rows:
+                exported += len(rows)
+                yield format_export_rows(rows, header, export_format)
+            row_number = page_end + 1
+        logger.info(f"📤 Exported {exported} {label} rows ({first_row}-{last_row})")
+    except Exception as e:
+        # Headers are gone already; NDJSON readers get a final error line, CSV ends early
+        logger.error(f"❌ {label} export stopped at row {row_number}: {str(e)}")
+        if export_format == 'ndjson':
+            yield json.dumps({'error': str(e), 'row': row_number}) + '\n'
+
+def export_sheet_generic(data_type='allura'):
+    """Stream the sheet as CSV or NDJSON in bounded pages, optionally only the rows after since_row"""
+    g.metrics_target = worksheet_registry.resolve(data_type)
+    export_format = request.args.get('format', 'csv').lower()
+    try:
+        since_row = int(request.args.get('since_row', 0))
+        page_size = int(request.args.get('page_size', config['export_page_rows']))
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError:
+        since_row = page_size = -1
+    if export_format not in EXPORT_FORMATS or since_row < 0 or page_size < 1 or (limit is not None and limit < 1):
+        return jsonify({
+            'success': False,
+            'error': f"Invalid export parameters: format must be one of {', '.join(EXPORT_FORMATS)}; "
+                     f"since_row must be >= 0; page_size and limit must be positive integers",
+            'data_type': data_type.upper(),
+            'timestamp': datetime.now().isoformat()
+        }), 400
+    page_size = min(page_size, config['export_max_page_rows'])
+    
+    try:
+        client, spreadsheet, worksheet = get_worksheet(data_type)
+        with sheets_scheduler.priority('maintenance'):
+            reader = SheetPageReader(data_type, spreadsheet, worksheet)
+            header = (reader.read(1, 1) or [[]])[0]
+    except Exception as e:
+        logger.error(f"❌ Failed to export {data_type.upper()} sheet: {str(e)}")
+        invalidate_on_stale_handle(data_type, e)
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'data_type': data_type.upper(),
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    
+    # The header is always row 1, so data starts at row 2 at the earliest
+    first_row = max(2, since_row + 1)
+    last_row = reader.last_row if limit is None else min(reader.last_row, first_row + limit - 1)
+    body = iter_export(reader, header, first_row, last_row, page_size, export_format, data_type.upper())
+    response = Response(stream_with_context(body), content_type=EXPORT_FORMATS[export_format])
+    response.headers['X-Export-First-Row'] = str(first_row)
+    response.headers['Content-Disposition'] = f'attachment; filename="{g.metrics_target}-export.{export_format}"'
+    return response
+
+@app.route('/export', methods=['GET'])
+def export_sheet():
+    """Stream the Allura sheet (default) as CSV or NDJSON"""
+    return export_sheet_generic('allura')
+
+@app.route('/export-ihl', methods=['GET'])
+def export_sheet_ihl():
+    """Stream the IHL sheet as CSV or NDJSON"""
+    return export_sheet_generic('ihl')
+
+def group_contiguous_rows(row_numbers):
+    """Collapse sorted 1-based row numbers into inclusive (start_row, end_row) ranges"""
+    ranges = []
+    for row_num in row_numbers:
+        if ranges and row_num == ranges[-1][1] + 1:
+            ranges[-1][1] = row_num
+        else:
+            ranges.append([row_num, row_num])
+    return [tuple(r) for r in ranges]
+
+def is_dry_run_request():
+    """Check whether the client asked to preview a destructive operation (?dry_run=1 or {"dryRun": true})"""
+    if request.args.get('dry_run', '').lower() in ('1', 'true', 'yes'):
+        return True
+    data = request.get_json(silent=True) or {}
+    return bool(data.get('dryRun'))
+
+# Candidate ranges re-read per batchGet when confirming mirrored rows before a delete
+MIRROR_VERIFY_RANGES_PER_CALL = 100
+
+def row_has_test_marker(row):
+    return any('TEST' in str(cell) for cell in row)
+
+def rows_still_match(spreadsheet, worksheet, row_numbers, expected):
+    """Re-read only the candidate rows and check they still hold what the mirror expects"""
+    ranges = group_contiguous_rows(row_numbers)
+    for index in range(0, len(ranges), MIRROR_VERIFY_RANGES_PER_CALL):
+        chunk = ranges[index:index + MIRROR_VERIFY_RANGES_PER_CALL]
+        response = spreadsheet.values_batch_get([
+            gspread.utils.absolute_range_name(worksheet.title, f'{start}:{end}') for start, end in chunk
+        ])
+        value_ranges = response.get('valueRanges', [])
+        if len(value_ranges) != len(chunk):
+            return False
+        for (start, end), value_range in zip(chunk, value_ranges):
+            values = value_range.get('values', [])
+            for offset, row_number in enumerate(range(start, end + 1)):
+                actual = values[offset] if offset < len(values) else []
+                if normalize_sheet_row(actual) != expected[row_number]:
+                    return False
+    return True
+
+def find_test_rows(data_type, spreadsheet, worksheet):
+    """Return the 1-based rows containing 'TEST', from the mirror when its matches still hold in the sheet"""
+    mirrored = sheet_mirrors.find_rows(data_type, spreadsheet, worksheet, row_has_test_marker)
+    if mirrored is not None:
+        rows_to_delete, expected = mirrored
+        if rows_still_match(spreadsheet, worksheet, rows_to_delete, expected):
+            return rows_to_delete
+        logger.warning(f"⚠️ {data_type.upper()} mirror is out of date, rescanning the whole sheet")
+        sheet_mirrors.invalidate(data_type)
+
+    all_values = worksheet.get_all_values()
+    return [i + 1 for i, row in enumerate(all_values) if row_has_test_marker(row)]  # 1-based indexing
+
 def clear_test_data_generic(data_type='allura'):
     """Generic function to clear test data from the sheet (rows containing 'TEST')"""
     try:
+        g.metrics_target = worksheet_registry.resolve(data_type)
         client, spreadsheet, worksheet = get_worksheet(data_type)
         
-        # Get all data
-        all_values = worksheet.get_all_values()
-        
-        # Find rows to delete (containing 'TEST')
-        rows_to_delete = []
-        for i, row in enumerate(all_values):
-            if any('TEST' in str(cell) for cell in row):
-                rows_to_delete.append(i + 1)  # 1-based indexing
+        with metrics.time('sheets_service_stage_duration_seconds', stage='scan', target=g.metrics_target):
+            # Find rows to delete (containing 'TEST')
+            rows_to_delete = find_test_rows(data_type, spreadsheet, worksheet)
         
         if not rows_to_delete:
             return jsonify({
@@ -508,22 +3345,57 @@ def clear_test_data_generic(data_type='allura'):
                 'data_type': data_type.upper()
             })
         
-        # Delete rows (from bottom to top to avoid index shifting)
-        for row_num in reversed(rows_to_delete):
-            worksheet.delete_rows(row_num)
+        ranges = group_contiguous_rows(rows_to_delete)
+        
+        if is_dry_run_request():
+            return jsonify({
+                'success': True,
+                'dry_run': True,
+                'message': f'Would clear {len(rows_to_delete)} test rows in {len(ranges)} ranges from {data_type.upper()} sheet',
+                'rows_to_delete': len(rows_to_delete),
+                'ranges': [{'start_row': start, 'end_row': end} for start, end in ranges],
+                'data_type': data_type.upper(),
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        # Delete all ranges in one batchUpdate (from bottom to top to avoid index shifting), with no
+        # append or chunk write to this target in flight
+        with write_coalescer.exclusive(data_type), \
+                metrics.time('sheets_service_stage_duration_seconds', stage='delete', target=g.metrics_target):
+            spreadsheet.batch_update({
+                'requests': [
+                    {
+                        'deleteDimension': {
+                            'range': {
+                                'sheetId': worksheet.id,
+                                'dimension': 'ROWS',
+                                'startIndex': start - 1,  # 0-based, end exclusive
+                                'endIndex': end
+                            }
+                        }
+                    }
+                    for start, end in reversed(ranges)
+                ]
+            })
+            sheet_summary_cache.invalidate(worksheet_registry.resolve(data_type))
+            sheet_mirrors.apply_delete(data_type, ranges)
+            append_positions.invalidate(spreadsheet.id)
+            chunked_writer.apply_delete(spreadsheet, worksheet, ranges)
         
-        logger.info(f"✅ Deleted {len(rows_to_delete)} test rows from {data_type.upper()} sheet")
+        logger.info(f"✅ Deleted {len(rows_to_delete)} test rows in {len(ranges)} ranges from {data_type.upper()} sheet")
         
         return jsonify({
             'success': True,
             'message': f'Cleared {len(rows_to_delete)} test rows from {data_type.upper()} sheet',
             'rows_deleted': len(rows_to_delete),
+            'ranges': [{'start_row': start, 'end_row': end} for start, end in ranges],
             'data_type': data_type.upper(),
             'timestamp': datetime.now().isoformat()
         })
         
     except Exception as e:
         logger.error(f"❌ Failed to clear {data_type.upper()} test data: {str(e)}")
+        invalidate_on_stale_handle(data_type, e)
         return jsonify({
             'success': False,
             'error': str(e),
@@ -541,17 +3413,68 @@ def clear_test_data_ihl():
     """Clear test data from the IHL sheet"""
     return clear_test_data_generic('ihl')
 
+@app.route('/targets', methods=['GET'])
+def list_targets():
+    """List the configured sheet targets"""
+    return jsonify({
+        'success': True,
+        'targets': {name: target_config(name) for name in SHEET_TARGETS},
+        'timestamp': datetime.now().isoformat()
+    })
+
+def dispatch_target(name, handler):
+    """Run a generic handler for a configured target, or return 404 for an unknown one"""
+    key = name.lower()
+    if key not in SHEET_TARGETS:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown target: {name}',
+            'available_targets': list(SHEET_TARGETS),
+            'timestamp': datetime.now().isoformat()
+        }), 404
+    return handler(key)
+
+@app.route('/targets/<name>/test', methods=['GET'])
+def test_target(name):
+    """Test the Google Sheets connection for any configured target"""
+    return dispatch_target(name, test_connection_generic)
+
+@app.route('/targets/<name>/upload-csv', methods=['POST'])
+def upload_csv_target(name):
+    """Upload CSV data to any configured target"""
+    return dispatch_target(name, upload_csv_generic)
+
+@app.route('/targets/<name>/sheet-info', methods=['GET'])
+def get_sheet_info_target(name):
+    """Get sheet information for any configured target"""
+    return dispatch_target(name, get_sheet_info_generic)
+
+@app.route('/targets/<name>/export', methods=['GET'])
+def export_sheet_target(name):
+    """Stream any configured target as CSV or NDJSON"""
+    return dispatch_target(name, export_sheet_generic)
+
+@app.route('/targets/<name>/clear-test-data', methods=['POST'])
+def clear_test_data_target(name):
+    """Clear test data from any configured target"""
+    return dispatch_target(name, clear_test_data_generic)
+
+startup_tracker.mark_imported()
+
 if __name__ == '__main__':
     # Load configuration for development
     try:
         config = get_config()
         logger.info(f"🚀 Starting Flask server on {config['flask_host']}:{config['flask_port']}")
         logger.info(f"📊 Debug mode: {config['flask_debug']}")
+        initialize_worker()
         
+        # Development server only; use start_google_sheets_service.py for production serving
         app.run(
             debug=config['flask_debug'],
             host=config['flask_host'],
-            port=config['flask_port']
+            port=config['flask_port'],
+            threaded=True
         )
     except Exception as e:
         logger.error(f"❌ Failed to start server: {str(e)}")
@@ -0,0 +1,444 @@
+"""
+Mock Google Sheets API for BOL Processor benchmarks and offline development
+Serves the OAuth token endpoint and the Sheets v4 calls the service makes, from in-memory sheets,
+with configurable latency, a request quota and injected 429s
+
+Point the service at it with:
+    SHEETS_API_BASE_URL=http://127.0.0.1:8089
+    GOOGLE_TOKEN_URI=http://127.0.0.1:8089/token
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+SPREADSHEET_PATH_PATTERN = re.compile(r'^/v4/spreadsheets/([^/:]+)(.*)$')
+VALUES_PATH_PATTERN = re.compile(r'^/values/(.+?)(:append|:clear)?$')
+CELL_PATTERN = re.compile(r'^([A-Z]*)(\d*)$')
+
+def column_letter_to_number(letters):
+    """Convert column letters (A, Z, AA) to a 1-based column number"""
+    number = 0
+    for char in letters:
+        number = number * 26 + ord(char) - 64
+    return number
+
+def column_number_to_letter(number):
+    """Convert a 1-based column number to column letters"""
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def parse_a1_range(range_name):
+    """Split 'Sheet'!B2:C9 into (sheet_name, first_row, last_row, first_col, last_col); open ends are None"""
+    range_name = unquote(range_name)
+    if '!' in range_name:
+        sheet_name, cells = range_name.rsplit('!', 1)
+    else:
+        sheet_name, cells = range_name, None
+    if sheet_name.startswith("'") and sheet_name.endswith("'"):
+        sheet_name = sheet_name[1:-1].replace("''", "'")
+    if not cells:
+        return sheet_name, 1, None, 1, None
+
+    bounds = []
+    for cell in cells.split(':'):
+        match = CELL_PATTERN.match(cell)
+        if not match:
+            raise KeyError(range_name)
+        letters, digits = match.groups()
+        bounds.append((int(digits) if digits else None, column_letter_to_number(letters) if letters else None))
+    (first_row, first_col), (last_row, last_col) = bounds[0], bounds[-1]
+    return sheet_name, first_row or 1, last_row, first_col or 1, last_col
+
+class MockQuota:
+    """Requests-per-minute budget; calls beyond it get a 429 like the real API"""
+
+    def __init__(self, per_minute=0):
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+
+    def allow(self):
+        if not self.per_minute:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_minute, self._tokens + (now - self._updated) * self.per_minute / 60.0)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+class MockSheetsState:
+    """In-memory spreadsheets plus the latency, quota and fault-injection settings"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, quota_per_minute=0, error_rate=0.0, error_status=429, error_format='json'):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.quota = MockQuota(quota_per_minute)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_format = error_format  # 'json' like Google, 'html' like a proxy or load balancer
+        self.fail_next = 0
+        self.lock = threading.Lock()
+        self.spreadsheets = {}
+        self.stats = {}
+
+    def configure(self, latency_ms=None, jitter_ms=None, quota_per_minute=None, error_rate=None, error_status=None,
+                  error_format=None, fail_next=None):
+        """Change fault settings at runtime (None leaves a setting unchanged); fail_next fails that many calls outright"""
+        if latency_ms is not None:
+            self.latency_ms = latency_ms
+        if jitter_ms is not None:
+            self.jitter_ms = jitter_ms
+        if quota_per_minute is not None:
+            self.quota = MockQuota(quota_per_minute)
+        if error_rate is not None:
+            self.error_rate = error_rate
+        if error_status is not None:
+            self.error_status = error_status
+        if error_format is not None:
+            self.error_format = error_format
+        if fail_next is not None:
+            with self.lock:
+                self.fail_next = fail_next
+
+    def should_fail(self):
+        """Whether to answer this call with an injected error"""
+        with self.lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                return True
+        return bool(self.error_rate) and random.random() < self.error_rate
+
+    def add_sheet(self, spreadsheet_id, sheet_name, rows=None, title=None):
+        """Create (or replace) a tab holding rows, a list of lists of strings"""
+        with self.lock:
+            spreadsheet = self.spreadsheets.setdefault(spreadsheet_id, {'title': title or f'Mock {spreadsheet_id}', 'sheets': {}})
+            sheet_id = next((sheet['id'] for name, sheet in spreadsheet['sheets'].items() if name == sheet_name),
+                            len(spreadsheet['sheets']))
+            spreadsheet['sheets'][sheet_name] = {'id': sheet_id, 'rows': rows if rows is not None else []}
+
+    def seed_sheet(self, spreadsheet_id, sheet_name, data_rows, test_every=0, columns=5):
+        """Fill a tab with a header and data_rows synthetic BOL rows starting at column B, like the service writes them"""
+        header = ['', 'Order', 'Carrier', 'Product', 'Quantity', 'Status'][:columns + 1]
+        carriers = ['UPS', 'FedEx', 'DHL', 'USPS']
+        rows = [header]
+        for index in range(data_rows):
+            status = 'TEST' if test_every and index % test_every == 0 else 'Shipped'
+            row = ['', f'ORD-{index:07d}', carriers[index % 4], f'Item {index % 97}', str(index % 50 + 1), status]
+            rows.append(row[:columns + 1])
+        self.add_sheet(spreadsheet_id, sheet_name, rows)
+
+    def count(self, operation):
+        with self.lock:
+            self.stats[operation] = self.stats.get(operation, 0) + 1
+
+    def snapshot(self):
+        """Call counters plus the current size of every tab"""
+        with self.lock:
+            return {
+                'calls': dict(self.stats),
+                'sheets': {
+                    f'{spreadsheet_id}/{name}': len(sheet['rows'])
+                    for spreadsheet_id, spreadsheet in self.spreadsheets.items()
+                    for name, sheet in spreadsheet['sheets'].items()
+                }
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+
+class MockSheetsHandler(BaseHTTPRequestHandler):
+    """Routes token, metadata, values and batchUpdate requests to the shared MockSheetsState"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like googleapis.com
+    state = None
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        return json.loads(body) if body else {}
+
+    def _send(self, payload, status=200, headers=None):
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_html(self, html, status, headers=None):
+        body = html.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, reason):
+        self._send({'error': {'code': status, 'message': message, 'status': reason}}, status)
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path.startswith('/__mock__/'):
+                return self._admin(method, url.path)
+            if url.path == '/token':
+                self._drain_body()
+                self.state.count('token')
+                return self._send({'access_token': f'mock-token-{time.time():.0f}', 'expires_in': 3600, 'token_type': 'Bearer'})
+
+            # Every Sheets call pays the configured latency and is subject to quota and fault injection
+            delay = self.state.latency_ms + random.uniform(0, self.state.jitter_ms)
+            if delay:
+                time.sleep(delay / 1000.0)
+            if not self.state.quota.allow():
+                self.state.count('throttled')
+                self._drain_body()
+                return self._send({'error': {'code': 429, 'message': 'Quota exceeded (mock)', 'status': 'RESOURCE_EXHAUSTED'}},
+                                  429, {'Retry-After': '1'})
+            if self.state.should_fail():
+                self.state.count('injected_errors')
+                self._drain_body()
+                status = self.state.error_status
+                headers = {'Retry-After': '1'} if status == 429 else None
+                if self.state.error_format == 'html':
+                    return self._send_html(f'<html><body><h1>{status} Server Error</h1></body></html>', status, headers)
+                return self._send({'error': {'code': status, 'message': 'Injected failure (mock)', 'status': 'UNAVAILABLE'}},
+                                  status, headers)
+            return self._sheets(method, url.path, query)
+        except KeyError as e:
+            self._error(400, f'Unable to parse range: {e}', 'INVALID_ARGUMENT')
+        except Exception as e:
+            logger.exception('Mock Sheets request failed')
+            self._error(500, str(e), 'INTERNAL')
+
+    def _drain_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+    def _admin(self, method, path):
+        if path == '/__mock__/stats':
+            return self._send(self.state.snapshot())
+        if path == '/__mock__/reset-stats' and method == 'POST':
+            self.state.reset_stats()
+            return self._send({'success': True})
+        if path == '/__mock__/configure' and method == 'POST':
+            self.state.configure(**self._read_json())
+            return self._send({'success': True})
+        if path == '/__mock__/seed' and method == 'POST':
+            body = self._read_json()
+            self.state.seed_sheet(body['spreadsheet_id'], body['sheet_name'], int(body.get('rows', 0)),
+                                  test_every=int(body.get('test_every', 0)))
+            return self._send({'success': True})
+        return self._error(404, 'Unknown mock admin path', 'NOT_FOUND')
+
+    def _sheets(self, method, path, query):
+        match = SPREADSHEET_PATH_PATTERN.match(path)
+        if not match:
+            return self._error(404, 'Requested entity was not found.', 'NOT_FOUND')
+        spreadsheet_id, rest = match.groups()
+        spreadsheet = self.state.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            return self._error(404, 'Requested entity was not found.', 'NOT_FOUND')
+
+        if rest == '' and method == 'GET':
+            self.state.count('spreadsheets.get')
+            return self._send(self._metadata(spreadsheet_id, spreadsheet))
+        if rest == ':batchUpdate' and method == 'POST':
+            self.state.count('spreadsheets.batchUpdate')
+            return self._send(self._batch_update(spreadsheet_id, spreadsheet, self._read_json()))
+        if rest == '/values:batchGet' and method == 'GET':
+            self.state.count('values.batchGet')
+            with self.state.lock:
+                value_ranges = [self._read_range(spreadsheet, range_name) for range_name in query.get('ranges', [])]
+            return self._send({'spreadsheetId': spreadsheet_id, 'valueRanges': value_ranges})
+        if rest == '/values:batchClear' and method == 'POST':
+            self.state.count('values.batchClear')
+            cleared = [self._clear(spreadsheet_id, spreadsheet, range_name)['clearedRange']
+                       for range_name in self._read_json().get('ranges', [])]
+            return self._send({'spreadsheetId': spreadsheet_id, 'clearedRanges': cleared})
+
+        values_match = VALUES_PATH_PATTERN.match(rest)
+        if not values_match:
+            return self._error(400, f'Unsupported mock request: {method} {rest}', 'INVALID_ARGUMENT')
+        range_name, operation = values_match.groups()
+        if method == 'GET':
+            self.state.count('values.get')
+            with self.state.lock:
+                value_range = self._read_range(spreadsheet, range_name)
+            return self._send(value_range)
+        if operation == ':clear':
+            self.state.count('values.clear')
+            return self._send(self._clear(spreadsheet_id, spreadsheet, range_name))
+
+        body = self._read_json()
+        self.state.count('values.append' if operation == ':append' else 'values.update')
+        with self.state.lock:
+            result = self._write(spreadsheet_id, spreadsheet, range_name, body.get('values', []), append=operation == ':append')
+        return self._send(result)
+
+    def _metadata(self, spreadsheet_id, spreadsheet):
+        with self.state.lock:
+            sheets = [
+                {'properties': {
+                    'sheetId': sheet['id'],
+                    'title': name,
+                    'index': sheet['id'],
+                    'sheetType': 'GRID',
+                    'gridProperties': {'rowCount': max(1000, len(sheet['rows'])), 'columnCount': 26}
+                }}
+                for name, sheet in spreadsheet['sheets'].items()
+            ]
+        return {'spreadsheetId': spreadsheet_id, 'properties': {'title': spreadsheet['title']}, 'sheets': sheets}
+
+    def _sheet(self, spreadsheet, sheet_name):
+        return spreadsheet['sheets'][sheet_name]  # KeyError -> 400 "Unable to parse range", as Google reports it
+
+    def _read_range(self, spreadsheet, range_name):
+        sheet_name, first_row, last_row, first_col, last_col = parse_a1_range(range_name)
+        rows = self._sheet(spreadsheet, sheet_name)['rows'][first_row - 1:last_row]
+        values = [row[first_col - 1:last_col] for row in rows]
+        # Google trims trailing empty cells and rows
+        values = [row[:max((i + 1 for i, cell in enumerate(row) if cell != ''), default=0)] for row in values]
+        while values and not values[-1]:
+            values.pop()
+        return {'range': unquote(range_name), 'majorDimension': 'ROWS', 'values': values}
+
+    def _write(self, spreadsheet_id, spreadsheet, range_name, values, append=False):
+        sheet_name, first_row, _, first_col, _ = parse_a1_range(range_name)
+        rows = self._sheet(spreadsheet, sheet_name)['rows']
+        if append:
+            # Append after the last row that has any data
+            last = len(rows)
+            while last and not any(rows[last - 1]):
+                last -= 1
+            first_row = last + 1
+
+        for offset, values_row in enumerate(values):
+            row_index = first_row - 1 + offset
+            while len(rows) <= row_index:
+                rows.append([])
+            row = rows[row_index]
+            if len(row) < first_col - 1 + len(values_row):
+                row.extend([''] * (first_col - 1 + len(values_row) - len(row)))
+            row[first_col - 1:first_col - 1 + len(values_row)] = ['' if value is None else str(value) for value in values_row]
+
+        width = max((len(values_row) for values_row in values), default=1)
+        last_row = first_row + max(len(values), 1) - 1
+        quoted_name = "'" + sheet_name.replace("'", "''") + "'"
+        updated_range = f'{quoted_name}!{column_number_to_letter(first_col)}{first_row}:{column_number_to_letter(first_col + width - 1)}{last_row}'
+        updates = {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': updated_range,
+            'updatedRows': len(values),
+            'updatedColumns': width,
+            'updatedCells': sum(len(values_row) for values_row in values)
+        }
+        if append:
+            return {'spreadsheetId': spreadsheet_id, 'tableRange': quoted_name, 'updates': updates}
+        return updates
+
+    def _clear(self, spreadsheet_id, spreadsheet, range_name):
+        sheet_name, first_row, last_row, first_col, last_col = parse_a1_range(range_name)
+        with self.state.lock:
+            rows = self._sheet(spreadsheet, sheet_name)['rows']
+            for row in rows[first_row - 1:last_row]:
+                end = len(row) if last_col is None else min(len(row), last_col)
+                for col in range(first_col - 1, end):
+                    row[col] = ''
+        return {'spreadsheetId': spreadsheet_id, 'clearedRange': unquote(range_name)}
+
+    def _batch_update(self, spreadsheet_id, spreadsheet, body):
+        replies = []
+        with self.state.lock:
+            sheets_by_id = {sheet['id']: sheet for sheet in spreadsheet['sheets'].values()}
+            for request in body.get('requests', []):
+                if 'deleteDimension' in request:
+                    dimension_range = request['deleteDimension']['range']
+                    if dimension_range.get('dimension') == 'ROWS':
+                        rows = sheets_by_id[dimension_range['sheetId']]['rows']
+                        del rows[dimension_range['startIndex']:dimension_range['endIndex']]
+                replies.append({})
+        return {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+def start_mock_server(state=None, host='127.0.0.1', port=0):
+    """Serve a MockSheetsState from a background thread; returns (server, base_url)"""
+    state = state or MockSheetsState()
+    handler = type('BoundMockSheetsHandler', (MockSheetsHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, name='mock-sheets', daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Google Sheets API for offline runs and benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--rows', type=int, default=1000, help='Data rows seeded into each target sheet')
+    parser.add_argument('--test-every', type=int, default=0, help='Mark every Nth seeded row as TEST')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--quota', type=float, default=0, help='Requests per minute before 429s (0 = unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls failed with --error-status')
+    parser.add_argument('--error-status', type=int, default=429)
+    parser.add_argument('--error-format', choices=['json', 'html'], default='json', help='Body of injected errors')
+    parser.add_argument('--sheet', action='append', default=[],
+                        help='spreadsheet_id:sheet_name to seed (default: mock-allura:Allura Test and mock-ihl:IHL Test)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    state = MockSheetsState(args.latency_ms, args.jitter_ms, args.quota, args.error_rate, args.error_status, args.error_format)
+    sheets = [sheet.split(':', 1) for sheet in args.sheet] or [
+        ('mock-allura', 'Allura Test'),
+        ('mock-ihl', 'IHL Test')
+    ]
+    for spreadsheet_id, sheet_name in sheets:
+        state.seed_sheet(spreadsheet_id, sheet_name, args.rows, test_every=args.test_every)
+        logger.info(f"📄 Seeded {spreadsheet_id} '{sheet_name}' with {args.rows} rows")
+
+    server, base_url = start_mock_server(state, args.host, args.port)
+    logger.info(f"🧪 Mock Sheets API listening on {base_url}")
+    logger.info(f"   SHEETS_API_BASE_URL={base_url} GOOGLE_TOKEN_URI={base_url}/token")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -8,27 +8,34 @@ Works with both .env files (development) and system environment variables (produ
 import os
 import sys
 import subprocess
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 def check_dependencies():
-    """Check if required Python packages are installed"""
-    required_packages = [
-        'flask',
-        'flask-cors', 
-        'gspread',
-        'google-auth',
-        'google-auth-oauthlib',
-        'google-api-python-client',
-        'requests',
-        'python-dotenv'
-    ]
+    """Check if required Python packages are installed (located on disk, not imported, to keep startup fast)"""
+    # pip package name -> importable module name
+    required_packages = {
+        'flask': 'flask',
+        'flask-cors': 'flask_cors',
+        'gspread': 'gspread',
+        'google-auth': 'google.auth',
+        'google-auth-oauthlib': 'google_auth_oauthlib',
+        'google-api-python-client': 'googleapiclient',
+        'requests': 'requests',
+        'python-dotenv': 'dotenv',
+        'gunicorn': 'gunicorn',
+        'aiohttp': 'aiohttp',
+        'brotli': 'brotli'
+    }
     
     missing_packages = []
     
-    for package in required_packages:
+    for package, module in required_packages.items():
         try:
-            __import__(package.replace('-', '_'))
+            if find_spec(module) is None:
+                missing_packages.append(package)
         except ImportError:
+            # find_spec imports the parent package of a dotted name
             missing_packages.append(package)
     
     return missing_packages
@@ -47,6 +54,51 @@ def install_dependencies(packages):
         print(f"❌ Failed to install dependencies: {e}")
         return False
 
+def run_production_server(app, config):
+    """Serve the app with gunicorn: multiple worker processes, threads per worker and graceful shutdown"""
+    from gunicorn.app.base import BaseApplication
+    import google_sheets_service
+
+    def post_fork(server, worker):
+        # Each worker gets its own authorized Sheets client and connection pool
+        google_sheets_service.initialize_worker()
+
+    def worker_exit(server, worker):
+        # Finish queued async uploads before the worker goes away
+        google_sheets_service.shutdown_service()
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f"{config['flask_host']}:{config['flask_port']}",
+        'workers': config['web_workers'],
+        'threads': config['web_threads'],
+        'worker_class': 'gthread',
+        'timeout': config['web_timeout'],
+        'graceful_timeout': config['web_graceful_timeout'],
+        'keepalive': 5,
+        'accesslog': '-',
+        'post_fork': post_fork,
+        'worker_exit': worker_exit
+    }
+    # Each worker process rate-limits itself, so split the Sheets quota between them
+    google_sheets_service.sheets_scheduler.share_between(config['web_workers'])
+    print(f"🏭 Production server: {config['web_workers']} workers x {config['web_threads']} threads")
+    if config['web_workers'] > 1:
+        print("⚠️  Job status and idempotency keys are per worker: /jobs/<id> may 404 and retried uploads may write twice")
+    ProductionServer(app, options).run()
+
 def check_environment_variables():
     """Check if required environment variables are set"""
     # Try to load .env file if it exists (for development)
@@ -105,6 +157,12 @@ def main():
 
     # Check dependencies
     print("🔍 Checking dependencies...")
+    missing_packages = check_dependencies()
+    if missing_packages:
+        print(f"❌ Missing packages: {', '.join(missing_packages)}")
+        if not install_dependencies(missing_packages):
+            print("💡 Install them with: pip install -r requirements.txt")
+            return False
     
     # Load configuration to display info (try .env first, then system env)
     if os.path.exists('.env'):
@@ -129,18 +187,24 @@ def main():
     print(f"📊 IHL Target Sheet: {ihl_spreadsheet_id} - '{ihl_sheet_name}'")
     print("\n🔧 Available endpoints:")
     print(f"   GET  http://{flask_host}:{flask_port}/health - Health check (both sheets)")
+    print(f"   GET  http://{flask_host}:{flask_port}/ready - Readiness (503 until warm-up finishes)")
     print(f"   🤖 SMART UPLOAD:")
     print(f"   POST http://{flask_host}:{flask_port}/upload-csv - Auto-detect & route (IHL/Allura)")
     print(f"   📊 ALLURA ENDPOINTS:")
     print(f"   GET  http://{flask_host}:{flask_port}/test - Test Allura connection")
     print(f"   POST http://{flask_host}:{flask_port}/upload-csv-allura - Upload CSV to Allura (explicit)")
     print(f"   GET  http://{flask_host}:{flask_port}/sheet-info - Get Allura sheet info")
+    print(f"   GET  http://{flask_host}:{flask_port}/export - Stream Allura sheet as CSV/NDJSON")
     print(f"   POST http://{flask_host}:{flask_port}/clear-test-data - Clear Allura test data")
     print(f"   🏷️  IHL ENDPOINTS:")
     print(f"   GET  http://{flask_host}:{flask_port}/test-ihl - Test IHL connection")
     print(f"   POST http://{flask_host}:{flask_port}/upload-csv-ihl - Upload CSV to IHL (explicit)")
     print(f"   GET  http://{flask_host}:{flask_port}/sheet-info-ihl - Get IHL sheet info")
+    print(f"   GET  http://{flask_host}:{flask_port}/export-ihl - Stream IHL sheet as CSV/NDJSON")
     print(f"   POST http://{flask_host}:{flask_port}/clear-test-data-ihl - Clear IHL test data")
+    print("   🗂️  ANY TARGET (see SHEET_TARGETS_FILE):")
+    print(f"   GET  http://{flask_host}:{flask_port}/targets - List configured targets")
+    print(f"   *    http://{flask_host}:{flask_port}/targets/<name>/test|upload-csv|sheet-info|export|clear-test-data")
     print("\n💡 Test from browser console:")
     print("   await bolProcessor.testPythonService()")
     print("\n🛑 Press Ctrl+C to stop the service")
@@ -150,11 +214,24 @@ def main():
         # Import and run the service
         from google_sheets_service import app, get_config
         config = get_config()
-        app.run(
-            debug=config['flask_debug'],
-            host=config['flask_host'],
-            port=config['flask_port']
-        )
+        server_mode = config['server_mode'] or ('development' if config['flask_debug'] else 'production')
+        if server_mode == 'production':
+            run_production_server(app, config)
+        elif server_mode == 'async':
+            from aiohttp import web
+            from async_google_sheets_service import create_app
+            print("⚡ Using the asyncio/aiohttp service variant (SERVER_MODE=async)")
+            web.run_app(create_app(), host=config['flask_host'], port=config['flask_port'])
+        else:
+            print("⚠️ Using the Flask development server (SERVER_MODE=development)")
+            import google_sheets_service
+            google_sheets_service.initialize_worker()
+            app.run(
+                debug=config['flask_debug'],
+                host=config['flask_host'],
+                port=config['flask_port'],
+                threaded=True
+            )
     except ImportError as e:
         print(f"❌ Failed to import service: {e}")
         print("💡 Make sure google_sheets_service.py is in the current directory")
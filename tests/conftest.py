@@ -0,0 +1,82 @@
+"""Shared fixtures: the service under test wired to an in-process mock Sheets API"""
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mock_sheets_server
+from benchmark_service import MOCK_TARGETS, WORKER_ENV_DEFAULTS, fake_credentials_env
+
+MOCK_STATE = mock_sheets_server.MockSheetsState()
+MOCK_SERVER, MOCK_URL = mock_sheets_server.start_mock_server(MOCK_STATE)
+
+# The service reads its configuration at import time, so point it at the mock before anything imports it
+os.environ.update(MOCK_TARGETS)
+os.environ.update(WORKER_ENV_DEFAULTS)
+os.environ.update(fake_credentials_env())
+os.environ.update({
+    'SHEETS_API_BASE_URL': MOCK_URL,
+    'GOOGLE_TOKEN_URI': f'{MOCK_URL}/token',
+    'WRITE_COALESCE_WINDOW_MS': '0',
+    'WARMUP_ENABLED': 'False',
+    'SPOOL_ENABLED': 'False',
+    'MIRROR_ENABLED': 'False',
+    'METRICS_ENABLED': 'False'
+})
+os.environ.pop('SHEET_TARGETS_FILE', None)
+
+ALLURA_ROWS = 20
+IHL_ROWS = 5
+TEST_EVERY = 5
+
+@pytest.fixture
+def mock_sheets():
+    """Mock API with freshly seeded sheets (every TEST_EVERY-th Allura row is test data) and zeroed counters"""
+    MOCK_STATE.configure(latency_ms=0, jitter_ms=0, quota_per_minute=0, error_rate=0.0, error_status=429,
+                         error_format='json', fail_next=0)
+    MOCK_STATE.seed_sheet(MOCK_TARGETS['SPREADSHEET_ID'], MOCK_TARGETS['SHEET_NAME'], ALLURA_ROWS, test_every=TEST_EVERY)
+    MOCK_STATE.seed_sheet(MOCK_TARGETS['IHL_SPREADSHEET_ID'], MOCK_TARGETS['IHL_SHEET_NAME'], IHL_ROWS)
+    MOCK_STATE.reset_stats()
+    return MOCK_STATE
+
+@pytest.fixture
+def service(mock_sheets):
+    """The service module with every client, handle and result cache emptied"""
+    import google_sheets_service
+    google_sheets_service.sheets_client_manager.reset()
+    google_sheets_service.worksheet_registry.invalidate()
+    for data_type in google_sheets_service.SHEET_TARGETS:
+        google_sheets_service.sheet_summary_cache.invalidate(data_type)
+        google_sheets_service.sheet_mirrors.invalidate(data_type)
+    google_sheets_service.idempotency_index._entries.clear()
+    google_sheets_service.chunked_writer._resumable.clear()
+    google_sheets_service.append_positions._rows.clear()
+    mock_sheets.reset_stats()
+    return google_sheets_service
+
+@pytest.fixture
+def client(service):
+    return service.app.test_client()
+
+def sheet_rows(state, data_type='allura'):
+    """Current rows of a mock tab, header included"""
+    spreadsheet_id, sheet_name = {
+        'allura': (MOCK_TARGETS['SPREADSHEET_ID'], MOCK_TARGETS['SHEET_NAME']),
+        'ihl': (MOCK_TARGETS['IHL_SPREADSHEET_ID'], MOCK_TARGETS['IHL_SHEET_NAME'])
+    }[data_type]
+    with state.lock:
+        return [list(row) for row in state.spreadsheets[spreadsheet_id]['sheets'][sheet_name]['rows']]
+
+def wait_for_job(client, job_id, timeout=5):
+    """Poll /jobs/<job_id> until the job leaves queued/running; returns the job"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/jobs/{job_id}').get_json()['job']
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job {job_id} did not finish')
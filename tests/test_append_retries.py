@@ -0,0 +1,75 @@
+"""Appends are not idempotent: they are repeated only after the sheet shows their rows did not land"""
+import gspread
+import pytest
+import requests
+
+from conftest import ALLURA_ROWS, sheet_rows
+
+UPLOAD = {'csvContent': 'Order,Carrier,Status\nRETRY-1,UPS,Shipped\nRETRY-2,DHL,Shipped'}
+
+@pytest.fixture
+def no_backoff(service, monkeypatch):
+    monkeypatch.setitem(service.config, 'sheets_backoff_max', 0)
+    monkeypatch.setattr(service.sheets_scheduler, 'backoff_delay', lambda attempt, retry_after=None: 0)
+    return service
+
+def retry_rows(state):
+    return [row[1] for row in sheet_rows(state) if row[1:2] and row[1].startswith('RETRY-')]
+
+def fail_append_once(monkeypatch, after_commit):
+    """Make the next values:append time out, before or after the mock applied it"""
+    original = gspread.Spreadsheet.values_append
+    calls = []
+
+    def values_append(self, *args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            if after_commit:
+                original(self, *args, **kwargs)
+            raise requests.exceptions.ReadTimeout('read timed out')
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(gspread.Spreadsheet, 'values_append', values_append)
+    return calls
+
+def test_append_that_landed_is_not_repeated(client, mock_sheets, no_backoff, monkeypatch):
+    calls = fail_append_once(monkeypatch, after_commit=True)
+
+    response = client.post('/upload-csv-allura', json=UPLOAD)
+    body = response.get_json()
+
+    assert response.status_code == 200, body
+    assert len(calls) == 1
+    assert retry_rows(mock_sheets) == ['RETRY-1', 'RETRY-2']
+    assert (body['startRow'], body['endRow']) == (ALLURA_ROWS + 2, ALLURA_ROWS + 3)
+
+def test_append_that_did_not_land_is_repeated(client, mock_sheets, no_backoff, monkeypatch):
+    calls = fail_append_once(monkeypatch, after_commit=False)
+
+    response = client.post('/upload-csv-allura', json=UPLOAD)
+
+    assert response.status_code == 200, response.get_json()
+    assert len(calls) == 2
+    assert retry_rows(mock_sheets) == ['RETRY-1', 'RETRY-2']
+
+def test_scheduler_does_not_retry_a_5xx_append(client, mock_sheets, no_backoff, service):
+    service.append_positions.mark(*service.get_worksheet('allura')[1:])  # Seed before injecting the failure
+    mock_sheets.reset_stats()
+    mock_sheets.configure(error_status=502, fail_next=1)
+
+    response = client.post('/upload-csv-allura', json=UPLOAD)
+    calls = mock_sheets.snapshot()['calls']
+
+    assert response.status_code == 200, response.get_json()
+    # The 502 was checked against the sheet (one read) before the single repeat
+    assert calls['injected_errors'] == 1
+    assert calls['values.get'] == 1
+    assert calls['values.append'] == 1
+    assert retry_rows(mock_sheets) == ['RETRY-1', 'RETRY-2']
+
+def test_only_idempotent_calls_are_retried_on_5xx(service):
+    scheduler = service.sheets_scheduler
+
+    assert scheduler.retryable_status(503, idempotent=True)
+    assert not scheduler.retryable_status(503, idempotent=False)
+    assert scheduler.retryable_status(429, idempotent=False)
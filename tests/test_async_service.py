@@ -0,0 +1,72 @@
+"""Async service: Sheets API responses are status-checked before their bodies are decoded"""
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from conftest import ALLURA_ROWS, sheet_rows
+
+UPLOAD = {'csvContent': 'Order,Carrier,Status\nASYNC-1,UPS,Shipped'}
+
+@pytest.fixture
+def async_service(service, monkeypatch):
+    import async_google_sheets_service
+    monkeypatch.setattr(service.sheets_scheduler, 'backoff_delay', lambda attempt, retry_after=None: 0)
+    return async_google_sheets_service
+
+def run_with_client(async_service, scenario):
+    async def main():
+        async with TestClient(TestServer(async_service.create_app())) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+def upload_after(mock_sheets, **faults):
+    async def scenario(client):
+        mock_sheets.configure(**faults)  # After startup, which opens every target
+        response = await client.post('/upload-csv-allura', json=UPLOAD)
+        return response.status, await response.json()
+    return scenario
+
+def test_html_502_on_a_read_is_retried(async_service, mock_sheets):
+    async def scenario(client):
+        mock_sheets.configure(error_status=502, error_format='html', fail_next=1)
+        response = await client.get('/sheet-info')
+        return response.status, await response.json()
+
+    status, body = run_with_client(async_service, scenario)
+
+    assert status == 200, body
+    assert body['sheet_info']['total_rows'] == ALLURA_ROWS + 1
+    assert mock_sheets.snapshot()['calls']['injected_errors'] == 1
+
+def test_502_on_an_append_is_not_retried(async_service, mock_sheets):
+    status, body = run_with_client(async_service, upload_after(mock_sheets, error_status=502, fail_next=1))
+
+    assert status == 500
+    assert 'values.append' not in mock_sheets.snapshot()['calls']  # Rejected by the mock before counting
+
+def test_html_error_is_an_upstream_failure(async_service, service, mock_sheets, monkeypatch):
+    monkeypatch.setattr(service.sheets_scheduler, 'max_retries', 0)
+
+    status, body = run_with_client(async_service, upload_after(mock_sheets, error_status=502, error_format='html', fail_next=1))
+
+    assert status == 500
+    assert 'HTTP 502' in body['error']
+
+def test_json_error_message_is_kept(async_service, service, mock_sheets, monkeypatch):
+    monkeypatch.setattr(service.sheets_scheduler, 'max_retries', 0)
+
+    status, body = run_with_client(async_service, upload_after(mock_sheets, error_status=503, fail_next=1))
+
+    assert status == 500
+    assert 'Injected failure (mock)' in body['error']
+
+def test_sheet_info_tail_matches_the_sheet(async_service, mock_sheets):
+    async def scenario(client):
+        response = await client.get('/sheet-info')
+        return await response.json()
+
+    info = run_with_client(async_service, scenario)['sheet_info']
+
+    assert info['total_rows'] == ALLURA_ROWS + 1
+    assert info['last_5_rows'] == sheet_rows(mock_sheets)[-5:]
@@ -0,0 +1,136 @@
+"""Chunked writes: a partial failure keeps its reserved rows, and a retry of the same upload fills only those"""
+import threading
+
+import gspread
+import pytest
+
+from conftest import MOCK_TARGETS, sheet_rows
+
+ORDERS = [f'CHUNK-{index}' for index in range(1, 11)]
+UPLOAD = {'csvContent': 'Order,Carrier,Status\n' + '\n'.join(f'{order},UPS,Shipped' for order in ORDERS)}
+
+@pytest.fixture
+def small_chunks(service, monkeypatch):
+    monkeypatch.setattr(service.chunked_writer, 'chunk_rows', 3)
+    return service
+
+@pytest.fixture
+def chunk_writes(small_chunks, monkeypatch):
+    """Record the first order of every chunk written, and the scheduler priority it ran at;
+    chunks whose first order is in the returned 'fail' set fail once, non-transiently"""
+    service = small_chunks
+    record = {'written': [], 'priorities': [], 'fail': set()}
+    original = gspread.Spreadsheet.values_update
+
+    def values_update(self, range_name, params=None, body=None):
+        first_order = body['values'][0][0]
+        record['priorities'].append(getattr(service.sheets_scheduler._local, 'priority', None))
+        if first_order in record['fail']:
+            record['fail'].discard(first_order)
+            raise ValueError(f'injected failure for {first_order}')
+        record['written'].append(first_order)
+        return original(self, range_name, params=params, body=body)
+
+    monkeypatch.setattr(gspread.Spreadsheet, 'values_update', values_update)
+    return record
+
+def overwrite_markers(state, value):
+    with state.lock:
+        rows = state.spreadsheets[MOCK_TARGETS['SPREADSHEET_ID']]['sheets'][MOCK_TARGETS['SHEET_NAME']]['rows']
+        for row in rows:
+            if row[1:2] == ['…']:
+                row[1] = value
+
+def chunk_rows_in_sheet(state):
+    return [(index + 1, row[1]) for index, row in enumerate(sheet_rows(state))
+            if row[1:2] and row[1].startswith(('CHUNK-', '…'))]
+
+def test_chunks_run_at_upload_priority(client, service, chunk_writes):
+    response = client.post('/upload-csv-allura', json=UPLOAD)
+
+    assert response.status_code == 200
+    assert sorted(chunk_writes['written']) == sorted(['CHUNK-1', 'CHUNK-4', 'CHUNK-7', 'CHUNK-10'])
+    assert set(chunk_writes['priorities']) == {service.SHEETS_PRIORITIES['upload']}
+
+def test_retry_rewrites_only_the_failed_chunk(client, service, mock_sheets, chunk_writes):
+    chunk_writes['fail'].add('CHUNK-4')
+    failed = client.post('/upload-csv-allura', json=UPLOAD)
+    body = failed.get_json()
+
+    assert failed.status_code == 500
+    assert body['resumable'] is True
+    assert len(body['failedRanges']) == 1
+    first, last = map(int, body['failedRanges'][0].split('-'))
+    assert [value for row, value in chunk_rows_in_sheet(mock_sheets) if first <= row <= last] == ['…'] * 3
+
+    chunk_writes['written'].clear()
+    retry = client.post('/upload-csv-allura', json=UPLOAD)
+
+    assert retry.status_code == 200
+    assert chunk_writes['written'] == ['CHUNK-4']
+    rows = chunk_rows_in_sheet(mock_sheets)
+    assert [value for _, value in rows] == ORDERS
+    assert [row for row, _ in rows] == list(range(rows[0][0], rows[0][0] + len(ORDERS)))
+    assert service.chunked_writer.stats()['resumed_writes'] == 1
+
+def test_retry_writes_everything_again_when_the_block_moved(client, service, mock_sheets, chunk_writes):
+    chunk_writes['fail'].add('CHUNK-7')
+    assert client.post('/upload-csv-allura', json=UPLOAD).status_code == 500
+    overwrite_markers(mock_sheets, 'EDITED')  # Someone types over the reserved rows before the retry
+
+    chunk_writes['written'].clear()
+    retry = client.post('/upload-csv-allura', json=UPLOAD)
+
+    assert retry.status_code == 200
+    assert len(chunk_writes['written']) == 4
+    assert service.chunked_writer.stats()['resumes_abandoned'] == 1
+
+def test_without_a_resume_key_markers_are_cleared(small_chunks, mock_sheets, chunk_writes):
+    service = small_chunks
+    chunk_writes['fail'].add('CHUNK-1')
+    _, spreadsheet, worksheet = service.get_worksheet('allura')
+    rows = [[order, 'UPS', 'Shipped'] for order in ORDERS]
+
+    with pytest.raises(service.ChunkedWriteError) as error:
+        service.chunked_writer.append(spreadsheet, worksheet, rows)
+
+    assert error.value.resumable is False
+    assert '…' not in [value for _, value in chunk_rows_in_sheet(mock_sheets)]
+    assert service.chunked_writer.stats()['resumable'] == 0
+
+def test_clear_waits_for_chunk_writes(client, service, mock_sheets, small_chunks, monkeypatch):
+    original = gspread.Spreadsheet.values_update
+    clears = []
+
+    def values_update(self, range_name, params=None, body=None):
+        if not clears:
+            # A clear arrives while the block is reserved and its chunks are being written
+            clear = threading.Thread(target=lambda: clears.append(service.app.test_client().post('/clear-test-data')))
+            clears.append(clear)
+            clear.start()
+            clear.join(0.3)
+            assert clear.is_alive()  # Held back until the chunks are in place
+        return original(self, range_name, params=params, body=body)
+
+    monkeypatch.setattr(gspread.Spreadsheet, 'values_update', values_update)
+    response = client.post('/upload-csv-allura', json=UPLOAD)
+    clears[0].join(5)
+
+    assert response.status_code == 200
+    assert clears[1].status_code == 200
+    assert not any('TEST' in row for row in sheet_rows(mock_sheets))
+    rows = chunk_rows_in_sheet(mock_sheets)
+    assert [value for _, value in rows] == ORDERS
+    assert [row for row, _ in rows] == list(range(rows[0][0], rows[0][0] + len(ORDERS)))
+
+def test_clear_moves_a_stored_block_up(client, service, mock_sheets, chunk_writes):
+    chunk_writes['fail'].add('CHUNK-4')
+    assert client.post('/upload-csv-allura', json=UPLOAD).status_code == 500
+    assert client.post('/clear-test-data').get_json()['rows_deleted'] > 0
+
+    chunk_writes['written'].clear()
+    retry = client.post('/upload-csv-allura', json=UPLOAD)
+
+    assert retry.status_code == 200
+    assert chunk_writes['written'] == ['CHUNK-4']
+    assert [value for _, value in chunk_rows_in_sheet(mock_sheets)] == ORDERS
@@ -0,0 +1,44 @@
+"""Clearing test data: one batchUpdate leaves exactly what per-row deletion would"""
+from conftest import ALLURA_ROWS, TEST_EVERY, sheet_rows
+
+def delete_rows_one_by_one(rows):
+    """Reference: the original bottom-up worksheet.delete_rows(row) loop over every 'TEST' row"""
+    remaining = [list(row) for row in rows]
+    matches = [index for index, row in enumerate(rows) if any('TEST' in cell for cell in row)]
+    for index in reversed(matches):
+        del remaining[index]
+    return remaining
+
+def test_clear_matches_per_row_deletion(client, mock_sheets):
+    before = sheet_rows(mock_sheets)
+    expected = delete_rows_one_by_one(before)
+
+    response = client.post('/clear-test-data')
+    body = response.get_json()
+
+    assert response.status_code == 200, body
+    assert body['rows_deleted'] == len(range(0, ALLURA_ROWS, TEST_EVERY))
+    assert sheet_rows(mock_sheets) == expected
+    assert mock_sheets.snapshot()['calls']['spreadsheets.batchUpdate'] == 1
+
+def test_clear_merges_contiguous_rows(client, mock_sheets):
+    rows = sheet_rows(mock_sheets)
+    for index in (6, 7, 8, len(rows) - 1):
+        rows[index][-1] = 'TEST'
+    mock_sheets.add_sheet('mock-allura', 'Allura Test', rows)
+    expected = delete_rows_one_by_one(rows)
+
+    response = client.post('/clear-test-data')
+
+    assert response.status_code == 200, response.get_json()
+    assert sheet_rows(mock_sheets) == expected
+    assert mock_sheets.snapshot()['calls']['spreadsheets.batchUpdate'] == 1
+
+def test_dry_run_deletes_nothing(client, mock_sheets):
+    before = sheet_rows(mock_sheets)
+
+    response = client.post('/clear-test-data?dry_run=1')
+
+    assert response.get_json()['dry_run'] is True
+    assert sheet_rows(mock_sheets) == before
+    assert 'spreadsheets.batchUpdate' not in mock_sheets.snapshot()['calls']
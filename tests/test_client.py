@@ -0,0 +1,12 @@
+"""Client reuse: one authorized session and access token serve every request"""
+
+UPLOADS = 5
+
+def test_uploads_share_one_access_token(client, mock_sheets):
+    for index in range(UPLOADS):
+        response = client.post('/upload-csv-allura', json={'csvContent': f'Order,Carrier,Status\nREUSE-{index},UPS,Shipped'})
+        assert response.status_code == 200, response.get_json()
+
+    calls = mock_sheets.snapshot()['calls']
+    assert calls['token'] == 1
+    assert calls['values.append'] == UPLOADS
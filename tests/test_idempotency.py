@@ -0,0 +1,41 @@
+"""Idempotent uploads: retries replay the original result, unless that result has failed since"""
+from conftest import sheet_rows, wait_for_job
+
+UPLOAD = {'csvContent': 'Order,Carrier,Status\nIDEM-1,UPS,Shipped'}
+
+def idem_rows(state):
+    return [row for row in sheet_rows(state) if row[1:2] == ['IDEM-1']]
+
+def test_retry_returns_the_original_result(client, mock_sheets):
+    first = client.post('/upload-csv-allura', json=UPLOAD)
+    retry = client.post('/upload-csv-allura', json=UPLOAD)
+
+    assert retry.status_code == first.status_code == 200
+    assert retry.get_json()['duplicate'] is True
+    assert retry.get_json()['startRow'] == first.get_json()['startRow']
+    assert len(idem_rows(mock_sheets)) == 1
+
+def test_retry_of_a_running_job_returns_the_same_job(client, mock_sheets):
+    first = client.post('/upload-csv-allura?async=1', json=UPLOAD).get_json()
+    retry = client.post('/upload-csv-allura?async=1', json=UPLOAD).get_json()
+
+    assert retry['duplicate'] is True
+    assert retry['jobId'] == first['jobId']
+    assert wait_for_job(client, first['jobId'])['status'] == 'succeeded'
+    assert len(idem_rows(mock_sheets)) == 1
+
+def test_retry_after_the_queued_job_failed_writes_again(client, mock_sheets):
+    mock_sheets.configure(error_status=400, fail_next=1)  # Not transient: the job fails without retrying
+    first = client.post('/upload-csv-allura?async=1', json=UPLOAD)
+    assert first.status_code == 202
+    assert wait_for_job(client, first.get_json()['jobId'])['status'] == 'failed'
+    assert idem_rows(mock_sheets) == []
+
+    retry = client.post('/upload-csv-allura?async=1', json=UPLOAD)
+    body = retry.get_json()
+
+    assert retry.status_code == 202
+    assert 'duplicate' not in body
+    assert body['jobId'] != first.get_json()['jobId']
+    assert wait_for_job(client, body['jobId'])['status'] == 'succeeded'
+    assert len(idem_rows(mock_sheets)) == 1
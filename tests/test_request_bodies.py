@@ -0,0 +1,31 @@
+"""Malformed upload bodies are rejected with a 400, not a 500"""
+import pytest
+
+@pytest.mark.parametrize('data, content_type', [
+    ('Order,Status\nX,Shipped', 'text/plain'),
+    ('not json', 'application/json'),
+    ('["a.csv"]', 'application/json'),
+    ('{"files": "a.csv"}', 'application/json'),
+    ('{"files": ["a.csv"]}', 'application/json')
+])
+def test_bulk_rejects_bodies_without_files(client, data, content_type):
+    response = client.post('/upload-csv-bulk', data=data, content_type=content_type)
+
+    assert response.status_code == 400
+    assert 'No CSV files provided' in response.get_json()['error']
+
+@pytest.mark.parametrize('data, content_type', [
+    ('Order,Status\nX,Shipped', 'text/plain'),
+    ('not json', 'application/json'),
+    ('["csvContent"]', 'application/json')
+])
+def test_upload_rejects_bodies_without_csv(client, data, content_type):
+    response = client.post('/upload-csv-allura', data=data, content_type=content_type)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'No CSV content provided'
+
+def test_bulk_json_upload_still_works(client, mock_sheets):
+    response = client.post('/upload-csv-bulk', json={'files': [{'name': 'a.csv', 'csvContent': 'Order,Status\nBULK-1,Shipped'}]})
+
+    assert response.status_code == 200, response.get_json()
@@ -0,0 +1,78 @@
+"""Sheets API scheduler: quota shares, priority order and asyncio waiting"""
+import asyncio
+import threading
+import time
+
+def make_scheduler(service, per_minute=600, burst=1):
+    return service.SheetsAPIScheduler(project_rate=per_minute, spreadsheet_rate=per_minute, burst=burst)
+
+def test_quota_is_shared_between_processes(service):
+    scheduler = service.SheetsAPIScheduler(project_rate=300, spreadsheet_rate=60, burst=10)
+    scheduler.set_spreadsheet_rate('sheet-a', 120)
+
+    scheduler.share_between(2)
+
+    assert scheduler.stats()['project_rate_per_minute'] == 150
+    assert scheduler._project_bucket.capacity == 5
+    assert scheduler._buckets('sheet-a')[1].max_rate * 60 == 60
+    assert scheduler._buckets('sheet-b')[1].max_rate * 60 == 30
+
+def test_explicit_priority_is_served_first(service):
+    scheduler = make_scheduler(service)
+    scheduler.acquire('sheet')  # Spend the only token so the next callers queue
+    order = []
+
+    def call(priority):
+        scheduler.acquire('sheet', priority=priority)
+        order.append(priority)
+
+    probe = threading.Thread(target=call, args=('probe',))
+    probe.start()
+    time.sleep(0.02)
+    upload = threading.Thread(target=call, args=('upload',))
+    upload.start()
+    probe.join()
+    upload.join()
+
+    assert order == ['upload', 'probe']
+
+def test_async_waiters_hold_no_threads(service):
+    scheduler = make_scheduler(service, per_minute=6000)
+    threads_before = threading.active_count()
+
+    async def main():
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            await scheduler.acquire_async('sheet', 'upload')
+            peak = max(peak, threading.active_count())
+
+        await asyncio.gather(*(call() for _ in range(20)))
+        return peak
+
+    assert asyncio.run(main()) == threads_before
+    assert scheduler.stats()['calls'] == 20
+
+def test_async_priority_and_cancellation(service):
+    scheduler = make_scheduler(service)
+    scheduler.acquire('sheet')
+
+    async def main():
+        order = []
+
+        async def call(priority):
+            await scheduler.acquire_async('sheet', priority)
+            order.append(priority)
+
+        probe = asyncio.create_task(call('probe'))
+        cancelled = asyncio.create_task(call('maintenance'))
+        await asyncio.sleep(0.02)
+        upload = asyncio.create_task(call('upload'))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(probe, upload, return_exceptions=True)
+        return order
+
+    assert asyncio.run(main()) == ['upload', 'probe']
+    assert scheduler.stats()['waiting'] == 0
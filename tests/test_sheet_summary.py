@@ -0,0 +1,48 @@
+"""Sheet summaries count every row with data, including rows whose first CSV cell is empty"""
+from conftest import ALLURA_ROWS, MOCK_TARGETS, sheet_rows
+
+BLANK_LEADING_CSV = 'Order,Carrier,Status\n,x,y\n,,z'
+
+def test_rows_with_empty_first_cell_are_counted(client, mock_sheets):
+    response = client.post('/upload-csv-allura', json={'csvContent': BLANK_LEADING_CSV})
+    assert response.status_code == 200, response.get_json()
+    total_rows = ALLURA_ROWS + 3  # header + seeded rows + the two uploaded ones
+    assert len(sheet_rows(mock_sheets)) == total_rows
+
+    info = client.get('/sheet-info').get_json()['sheet_info']
+    assert info['total_rows'] == total_rows
+    assert [row[1:4] for row in info['last_5_rows'][-2:]] == [['', 'x', 'y'], ['', '', 'z']]
+
+    test = client.get('/test').get_json()['sheet_info']
+    assert test['last_row_with_data'] == total_rows
+
+def test_tail_matches_the_sheet(client, mock_sheets):
+    info = client.get('/sheet-info').get_json()['sheet_info']
+
+    assert info['total_rows'] == ALLURA_ROWS + 1
+    assert info['last_5_rows'] == sheet_rows(mock_sheets)[-5:]
+
+def summary_calls(service, mock_sheets, tail_rows):
+    _, spreadsheet, worksheet = service.get_worksheet('allura')
+    mock_sheets.reset_stats()
+    summary = service.read_sheet_summary(spreadsheet, worksheet, tail_rows=tail_rows)
+    return summary, mock_sheets.snapshot()['calls']
+
+def test_full_grid_is_counted_from_metadata(service, mock_sheets):
+    mock_sheets.seed_sheet(MOCK_TARGETS['SPREADSHEET_ID'], MOCK_TARGETS['SHEET_NAME'], 3000)
+
+    summary, calls = summary_calls(service, mock_sheets, tail_rows=5)
+
+    assert summary['total_rows'] == 3001
+    assert summary['last_rows'] == sheet_rows(mock_sheets)[-5:]
+    # One metadata call and one short read, whatever the sheet's size
+    assert calls == {'spreadsheets.get': 1, 'values.batchGet': 1}
+
+def test_tail_spanning_a_probe_window_is_complete(service, mock_sheets):
+    # The data ends 3 rows into the 251-650 window, so the first 2 tail rows come from before it
+    mock_sheets.seed_sheet(MOCK_TARGETS['SPREADSHEET_ID'], MOCK_TARGETS['SHEET_NAME'], 252)
+
+    summary, _ = summary_calls(service, mock_sheets, tail_rows=5)
+
+    assert summary['total_rows'] == 253
+    assert summary['last_rows'] == sheet_rows(mock_sheets)[-5:]
@@ -0,0 +1,110 @@
+"""Upload spool: spooled async jobs and exactly-once replay after crashes"""
+import threading
+
+import pytest
+
+from conftest import sheet_rows, wait_for_job
+
+ROWS = [['SPOOL-1', 'UPS', 'Shipped'], ['SPOOL-2', 'DHL', 'Shipped']]
+
+@pytest.fixture
+def spool(service, tmp_path, monkeypatch):
+    """A fresh spool whose drainer only runs when a test calls drain_once(); every claim times out at once"""
+    spool = service.UploadSpool(str(tmp_path / 'spool.db'), drain_interval=3600, claim_timeout=0)
+    monkeypatch.setattr(spool, 'start_drainer', lambda: None)
+    monkeypatch.setattr(service, 'upload_spool', spool)
+    yield spool
+    spool._connection.close()
+
+@pytest.fixture
+def no_retries(service, monkeypatch):
+    monkeypatch.setattr(service.sheets_scheduler, 'max_retries', 0)
+    monkeypatch.setattr(service.upload_job_manager, 'max_retries', 0)
+
+def occurrences(state, rows):
+    """Start rows (1-based) where rows appear, written from column B"""
+    sheet = [row[1:len(rows[0]) + 1] for row in sheet_rows(state)]
+    return [index + 1 for index in range(len(sheet) - len(rows) + 1) if sheet[index:index + len(rows)] == rows]
+
+def attempt_append(service, spool, entry_ids):
+    """What write_rows_spooled() does right before the append"""
+    _, spreadsheet, worksheet = service.get_worksheet('allura')
+    spool.mark_attempted(entry_ids, service.append_positions.mark(spreadsheet, worksheet))
+
+def test_async_job_hands_rows_to_the_spool(client, mock_sheets, spool, no_retries):
+    mock_sheets.configure(error_status=503, error_rate=1.0)
+    response = client.post('/upload-csv-allura?async=1', json={'csvContent': 'Order,Carrier,Status\nSPOOL-1,UPS,Shipped\nSPOOL-2,DHL,Shipped'})
+    assert response.status_code == 202
+
+    job = wait_for_job(client, response.get_json()['jobId'])
+    assert job['status'] == 'spooled'
+    assert job['spool']['status'] == 'pending'
+
+    mock_sheets.configure(error_rate=0.0)
+    assert spool.drain_once() == 1
+    job = client.get(f"/jobs/{job['jobId']}").get_json()['job']
+    assert job['spool']['status'] == 'written'
+    assert occurrences(mock_sheets, ROWS) == [job['spool']['startRow']]
+
+def test_replay_after_crash_between_append_and_mark_written(service, mock_sheets, spool):
+    entry_id = spool.record('allura', ROWS)
+    attempt_append(service, spool, [entry_id])
+    start_row, end_row = service.write_coalescer.submit('allura', ROWS)
+    spool._in_flight.discard(entry_id)  # The process died before mark_written() ran
+    appends = mock_sheets.snapshot()['calls']['values.append']
+
+    assert spool.drain_once() == 1
+
+    entry = spool.get(entry_id)
+    assert entry['status'] == 'written'
+    assert (entry['startRow'], entry['endRow']) == (start_row, end_row)
+    assert occurrences(mock_sheets, ROWS) == [start_row]
+    assert mock_sheets.snapshot()['calls']['values.append'] == appends
+
+def test_write_in_flight_when_its_claim_times_out(service, mock_sheets, spool, monkeypatch):
+    submit = service.write_coalescer.submit
+    writer_started, release_writer = threading.Event(), threading.Event()
+
+    def slow_submit(data_type, data_rows, resume_key=None):
+        if threading.current_thread().name == 'slow-writer':
+            writer_started.set()
+            release_writer.wait(5)  # The append is still on its way to Sheets
+        return submit(data_type, data_rows, resume_key)
+
+    monkeypatch.setattr(service.write_coalescer, 'submit', slow_submit)
+    results = []
+    writer = threading.Thread(target=lambda: results.append(service.write_rows('allura', ROWS)), name='slow-writer')
+    writer.start()
+    assert writer_started.wait(5)
+
+    # Its claim is already past claim_timeout, but the write is alive: the drainer must leave it alone
+    assert spool.drain_once() == 0
+    release_writer.set()
+    writer.join(5)
+    assert spool.drain_once() == 0
+
+    entry = spool.get(1)  # The only entry in this fresh spool
+    assert entry['status'] == 'written'
+    assert occurrences(mock_sheets, ROWS) == [results[0]['startRow']] == [entry['startRow']]
+
+def test_earlier_identical_upload_is_not_taken_for_an_unsent_entry(service, mock_sheets, spool):
+    earlier_start, _ = service.write_coalescer.submit('allura', ROWS)  # Allowed with IDEMPOTENCY_HASH_CONTENT=False
+    entry_id = spool.record('allura', ROWS)
+    spool.release(entry_id)  # Sheets was down before the append was sent
+
+    assert spool.drain_once() == 1
+
+    entry = spool.get(entry_id)
+    assert occurrences(mock_sheets, ROWS) == [earlier_start, entry['startRow']]
+
+def test_earlier_identical_upload_is_not_taken_for_a_lost_append(service, mock_sheets, spool):
+    earlier_start, _ = service.write_coalescer.submit('allura', ROWS)
+    entry_id = spool.record('allura', ROWS)
+    attempt_append(service, spool, [entry_id])
+    spool.release(entry_id)  # The append was sent but never reached the sheet
+
+    assert spool.drain_once() == 1
+
+    entry = spool.get(entry_id)
+    assert entry['startRow'] > earlier_start
+    assert occurrences(mock_sheets, ROWS) == [earlier_start, entry['startRow']]